@@ -6,19 +6,38 @@ Bu dosya web arayüzü için Flask uygulamasını içerir.
 from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for, session, Response
 from flask_cors import CORS
 import os
+import atexit
 from datetime import datetime
 import asyncio
 from config import Config
 import json
 import csv
 import io
-from services.database import DatabaseService
+from services.database import DatabaseService, next_cursor
+from services.invalidation_bus import get_invalidation_bus
+from services.metrics import collect_metrics, read_metrics_snapshot
+from services.outbox import get_outbox, INVITE_USER, INVITE_FROM_WISHLIST
+from services.scheduler import get_scheduler, register_maintenance_jobs
+from services.locks import set_lock_mode
 from passlib.hash import bcrypt
+import hmac
 
 app = Flask(__name__, static_folder='assets', static_url_path='/static')
 app.config['SECRET_KEY'] = Config.FLASK_SECRET_KEY
 CORS(app)
 
+# Gunicorn thread'leri cache/throttle'a eşzamanlı erişir: key hash'ine göre dilimlenmiş lock'lar
+# (global servisler ilk kullanımda oluşturulur; bu satır ilk kullanımdan önce çalışmalı)
+set_lock_mode(Config.WEB_LOCK_MODE)
+
+# Bot process'inden (ve diğer worker'lardan) gelen cache invalidation'larını dinle
+get_invalidation_bus().start_thread()
+
+# Periyodik bakım işleri (cache ve throttle sweep'leri) daemon thread'de
+register_maintenance_jobs(get_scheduler())
+get_scheduler().start_thread()
+atexit.register(get_scheduler().stop_thread)
+
 def get_db():
     """Database service instance'ını döndürür"""
     from services.database import DatabaseService
@@ -28,8 +47,22 @@ def run_async(coro):
     """Async fonksiyonları çalıştırmak için yardımcı fonksiyon"""
     return asyncio.run(coro)
 
+def paginated_response(items, limit: int, column: str):
+    """
+    Liste endpoint'leri için yanıt oluşturur
+    İstekte `cursor` parametresi varsa {'items', 'next_cursor'} döner (keyset pagination),
+    yoksa eski liste formatı korunur ve sonraki sayfa X-Next-Cursor header'ında verilir
+    """
+    cursor_token = next_cursor(items, limit, column)
+    if 'cursor' in request.args:
+        return jsonify({'items': items, 'next_cursor': cursor_token})
+    response = jsonify(items)
+    if cursor_token:
+        response.headers['X-Next-Cursor'] = cursor_token
+    return response
+
 async def _invite_user_async(user_id: int):
-    """Kullanıcıya onay mesajı ve davet linki göndermek için async yardımcı."""
+    """Kullanıcıya onay mesajı ve davet linki göndermek için async yardımcı (outbox'a yazılamazsa)."""
     from aiogram import Bot
     from services.group_service import GroupService
     bot = Bot(token=Config.BOT_TOKEN)
@@ -40,7 +73,12 @@ async def _invite_user_async(user_id: int):
         await bot.session.close()
 
 def invite_user(user_id: int):
-    """Sync wrapper to invite a user to the group and notify them."""
+    """
+    Kullanıcıyı davet eder: komut bot_outbox'a yazılır, bot kendi gönderim zamanlayıcısıyla gönderir
+    (web ve bot aynı Telegram limit bütçesini paylaşır); kuyruğa yazılamazsa doğrudan gönderilir
+    """
+    if get_outbox().enqueue(INVITE_USER, {'user_id': user_id}):
+        return True
     return run_async(_invite_user_async(user_id))
 
 async def _remove_user_async(user_id: int):
@@ -228,9 +266,7 @@ def add_question():
         # Cache invalidation: Soru eklendi, questions cache'ini temizle
         if question:
             try:
-                from services.cache_service import get_cache
-                cache = get_cache()
-                cache.delete('questions')
+                get_invalidation_bus().publish(keys=['questions'])
             except Exception:
                 pass
         
@@ -258,9 +294,7 @@ def delete_question(question_id):
             if success:
                 # Cache invalidation: Soru silindi, questions cache'ini temizle
                 try:
-                    from services.cache_service import get_cache
-                    cache = get_cache()
-                    cache.delete('questions')
+                    get_invalidation_bus().publish(keys=['questions'])
                 except Exception:
                     pass
                 return jsonify({'message': 'Soru silindi'})
@@ -284,13 +318,17 @@ def get_payments():
         # Pagination parametreleri
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
+        # Keyset pagination: önceki yanıttaki next_cursor (offset'e göre tercih edilir)
+        cursor = request.args.get('cursor') or None
         
         # Limit maksimum kontrolü (max 500)
         limit = min(limit, 500)
         
         db = get_db()
-        payments = run_async(db.get_pending_payments(limit=limit, offset=offset))
-        return jsonify(payments)
+        payments = run_async(db.get_pending_payments(limit=limit, offset=offset, cursor=cursor))
+        return paginated_response(payments, limit, 'created_at')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -304,13 +342,17 @@ def get_receipts():
         # Pagination parametreleri
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
+        # Keyset pagination: önceki yanıttaki next_cursor (offset'e göre tercih edilir)
+        cursor = request.args.get('cursor') or None
         
         # Limit maksimum kontrolü (max 500)
         limit = min(limit, 500)
         
         db = get_db()
-        receipts = run_async(db.get_pending_receipts(limit=limit, offset=offset))
-        return jsonify(receipts)
+        receipts = run_async(db.get_pending_receipts(limit=limit, offset=offset, cursor=cursor))
+        return paginated_response(receipts, limit, 'created_at')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -347,20 +389,6 @@ def reject_payment(payment_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-async def _add_to_wishlist_async(user_id: int, receipt_id: int):
-    """Async helper for adding user to wishlist"""
-    from services.group_service import GroupService
-    from aiogram import Bot
-    bot = Bot(token=Config.BOT_TOKEN)
-    try:
-        group_service = GroupService(bot)
-        await group_service.add_user_to_wishlist(
-            user_id=user_id,
-            receipt_id=receipt_id
-        )
-    finally:
-        await bot.session.close()
-
 @app.route('/api/receipts/<int:receipt_id>/approve', methods=['POST'])
 def approve_receipt(receipt_id):
     """Dekontu onaylar ve kullanıcıyı gruba ekler (wishlist'ten gelen kullanıcılar için)"""
@@ -416,13 +444,17 @@ def get_members():
         # Pagination parametreleri
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
+        # Keyset pagination: önceki yanıttaki next_cursor (offset'e göre tercih edilir)
+        cursor = request.args.get('cursor') or None
         
         # Limit maksimum kontrolü (max 500)
         limit = min(limit, 500)
         
         db = get_db()
-        members = run_async(db.get_group_members(Config.GROUP_ID, limit=limit, offset=offset))
-        return jsonify(members)
+        members = run_async(db.get_group_members(Config.GROUP_ID, limit=limit, offset=offset, cursor=cursor))
+        return paginated_response(members, limit, 'joined_at')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -548,9 +580,7 @@ def bot_settings():
     # Cache invalidation: bot_settings güncellendi, cache'i temizle
     if ok:
         try:
-            from services.cache_service import get_cache
-            cache = get_cache()
-            cache.delete('bot_settings')
+            get_invalidation_bus().publish(keys=['bot_settings'])
         except Exception:
             pass
     
@@ -562,9 +592,8 @@ def bot_settings():
         if 'shopier_payment_url' in data and data['shopier_payment_url']:
             from config import Config as _C
             _C.SHOPIER_PAYMENT_URL = data['shopier_payment_url']
-            
-            # Eğer ödeme linki değiştiyse, ödeme mesajlarını güncelle
-            run_async(db.update_payment_messages_with_new_link(data['shopier_payment_url']))
+            # Ödeme mesajlarındaki {payment_link} gönderim anında bot_settings'ten
+            # bağlanır; yukarıdaki bot_settings invalidation'ı yeterli
     except Exception:
         pass
     return jsonify({'success': ok})
@@ -700,20 +729,8 @@ def add_message():
             is_active=data.get('is_active', True)
         ))
         
+        # Cache invalidation DatabaseService içinde (messages generation'ı artırılır)
         if success:
-            # Cache invalidation: Mesaj eklendi, ilgili cache'leri temizle
-            try:
-                from services.cache_service import get_cache
-                cache = get_cache()
-                msg_type = data.get('type', '')
-                if msg_type == 'welcome':
-                    cache.delete('welcome_messages')
-                elif msg_type == 'payment':
-                    cache.delete('payment_messages')
-                elif msg_type == 'sss':
-                    cache.delete('sss_messages')
-            except Exception:
-                pass
             return jsonify({'message': 'Mesaj başarıyla eklendi'})
         else:
             return jsonify({'error': 'Mesaj eklenemedi'}), 500
@@ -764,20 +781,8 @@ def update_message(message_id):
             is_active=data.get('is_active', True)
         ))
         
+        # Cache invalidation DatabaseService içinde (messages generation'ı artırılır)
         if success:
-            # Cache invalidation: Mesaj güncellendi, ilgili cache'leri temizle
-            try:
-                from services.cache_service import get_cache
-                cache = get_cache()
-                msg_type = data.get('type', '')
-                if msg_type == 'welcome':
-                    cache.delete('welcome_messages')
-                elif msg_type == 'payment':
-                    cache.delete('payment_messages')
-                elif msg_type == 'sss':
-                    cache.delete('sss_messages')
-            except Exception:
-                pass
             return jsonify({'message': 'Mesaj başarıyla güncellendi'})
         else:
             return jsonify({'error': 'Mesaj güncellenemedi'}), 500
@@ -793,25 +798,10 @@ def delete_message(message_id):
             return jsonify({'error': 'unauthorized'}), 401
         
         db = get_db()
-        # Önce mesaj tipini al (cache invalidation için)
-        message = run_async(db.get_message(message_id))
-        msg_type = message.get('type') if message else None
-        
         success = run_async(db.delete_message(message_id))
         
+        # Cache invalidation DatabaseService içinde (messages generation'ı artırılır)
         if success:
-            # Cache invalidation: Mesaj silindi, ilgili cache'leri temizle
-            try:
-                from services.cache_service import get_cache
-                cache = get_cache()
-                if msg_type == 'welcome':
-                    cache.delete('welcome_messages')
-                elif msg_type == 'payment':
-                    cache.delete('payment_messages')
-                elif msg_type == 'sss':
-                    cache.delete('sss_messages')
-            except Exception:
-                pass
             return jsonify({'message': 'Mesaj başarıyla silindi'})
         else:
             return jsonify({'error': 'Mesaj silinemedi'}), 500
@@ -870,14 +860,18 @@ def get_wishlist():
         # Pagination parametreleri
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
+        # Keyset pagination: önceki yanıttaki next_cursor (offset'e göre tercih edilir)
+        cursor = request.args.get('cursor') or None
         
         # Limit maksimum kontrolü (max 500)
         limit = min(limit, 500)
         
         db = get_db()
-        wishlist = run_async(db.get_wishlist(limit=limit, offset=offset))
+        wishlist = run_async(db.get_wishlist(limit=limit, offset=offset, cursor=cursor))
         
-        return jsonify(wishlist)
+        return paginated_response(wishlist, limit, 'created_at')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -942,7 +936,7 @@ def export_wishlist():
         return jsonify({'error': str(e)}), 500
 
 async def _invite_from_wishlist_async(user_id: int):
-    """Async helper for inviting user from wishlist - ödeme linki gönderir"""
+    """Async helper for inviting user from wishlist - ödeme linki gönderir (outbox'a yazılamazsa)"""
     from services.group_service import GroupService
     from aiogram import Bot
     bot = Bot(token=Config.BOT_TOKEN)
@@ -971,8 +965,9 @@ def invite_from_wishlist(wishlist_id):
         success = run_async(db.update_wishlist_status(wishlist_id, 'invited'))
         
         if success:
-            # Kullanıcıya ödeme linki gönder
-            run_async(_invite_from_wishlist_async(user_id))
+            # Kullanıcıya ödeme linki gönder (bot process'i toplu şeritte gönderir)
+            if not get_outbox().enqueue(INVITE_FROM_WISHLIST, {'user_id': user_id}):
+                run_async(_invite_from_wishlist_async(user_id))
             
             return jsonify({'message': 'Kullanıcı bekleme listesinden çıkarıldı ve ödeme linki gönderildi'})
         else:
@@ -981,37 +976,31 @@ def invite_from_wishlist(wishlist_id):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/internal/metrics')
+def internal_metrics():
+    """
+    Cache/throttle metrikleri (admin oturumu veya `Authorization: Bearer <METRICS_TOKEN>`)
+    'web' bu process'in sayaçlarıdır; 'bot' bot process'inin son snapshot'ıdır (aynı makinedeyse)
+    """
+    token = request.headers.get('Authorization', '')
+    token_ok = bool(Config.METRICS_TOKEN) and hmac.compare_digest(token, f'Bearer {Config.METRICS_TOKEN}')
+    if not (session.get('admin_authenticated') or token_ok):
+        return jsonify({'error': 'unauthorized'}), 401
+    return jsonify({'web': collect_metrics('web'), 'bot': read_metrics_snapshot()})
+
 @app.route('/api/stats')
 def get_stats():
-    """İstatistikleri getirir (COUNT query'leri ile optimize edilmiş)"""
+    """İstatistikleri getirir (tek sorguluk snapshot)"""
     try:
         if not session.get('admin_authenticated'):
             return jsonify({'error':'unauthorized'}), 401
         
         db = get_db()
         
-        # COUNT query'leri kullan (SELECT * yerine)
-        total_users = run_async(db.count_all_users())
-        pending_payments = run_async(db.count_pending_payments())
-        total_members = run_async(db.count_group_members(Config.GROUP_ID))
-        approved_receipts = run_async(db.count_approved_receipts())
-        pending_receipts = run_async(db.count_receipts_by_status('pending'))
-        rejected_receipts = run_async(db.count_receipts_by_status('rejected'))
-        wishlist_count = run_async(db.count_wishlist())
-        
-        # Toplam ödeme = Onaylanmış dekontlar (dekont onayı = ödeme onayı)
-        total_payments = approved_receipts
-        
-        return jsonify({
-            'total_users': total_users,
-            'total_payments': total_payments,
-            'pending_payments': pending_payments,
-            'total_members': total_members,
-            'approved_receipts': approved_receipts,
-            'pending_receipts': pending_receipts,
-            'rejected_receipts': rejected_receipts,
-            'wishlist_count': wishlist_count
-        })
+        # Tek sorguluk istatistik snapshot'ı (get_bot_stats RPC, kısa TTL cache'li)
+        stats = run_async(db.get_stats_snapshot(Config.GROUP_ID))
+        
+        return jsonify(stats)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
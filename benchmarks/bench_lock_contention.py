@@ -0,0 +1,89 @@
+"""
+Lock Contention Benchmark
+CacheService ve ThrottleService'in lock modlarında (services/locks.py) toplam işlem hızını ölçer:
+- none:    tek sahip, lock yok (sadece 1 thread ile; bot event loop'u)
+- global:  tek threading.Lock (önceki davranış)
+- striped: LOCK_STRIPES dilim, key hash'ine göre lock (gunicorn thread'leri)
+
+Her thread karışık iş yükü çalıştırır: cache.get (%80), cache.set (%10),
+throttle.should_throttle (%10). Sonuç: toplam işlem/s.
+
+Kullanım:
+    python benchmarks/bench_lock_contention.py [--threads 1,4,8] [--ops 200000] [--keys 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config import'u için sahte değerler (ağ kullanılmaz)
+os.environ.setdefault('SUPABASE_URL', 'https://benchmark.supabase.co')
+os.environ.setdefault('SUPABASE_KEY', 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.benchmark')
+os.environ.setdefault('CACHE_BACKEND', 'memory')
+
+from services.cache_service import CacheService
+from services.throttle_service import ThrottleService
+
+
+def _worker(cache: CacheService, throttle: ThrottleService, ops: list, barrier: threading.Barrier) -> None:
+    barrier.wait()
+    for kind, key, user_id in ops:
+        if kind == 0:
+            cache.get(key)
+        elif kind == 1:
+            cache.set(key, user_id, ttl=300)
+        else:
+            throttle.should_throttle(user_id, 'save_answer')
+
+
+def _operations(count: int, keys: int, seed: int) -> list:
+    rng = random.Random(seed)
+    ops = []
+    for _ in range(count):
+        roll = rng.random()
+        user_id = 1_000_000 + rng.randrange(keys)
+        kind = 0 if roll < 0.8 else (1 if roll < 0.9 else 2)
+        ops.append((kind, f'user:{user_id}', user_id))
+    return ops
+
+
+def run(mode: str, threads: int, ops: int, keys: int) -> float:
+    cache = CacheService(max_entries=keys * 2, lock_mode=mode)
+    throttle = ThrottleService(lock_mode=mode, max_keys=keys * 4)
+    for user_id in range(keys):
+        cache.set(f'user:{1_000_000 + user_id}', user_id, ttl=300)
+    per_thread = ops // threads
+    workloads = [_operations(per_thread, keys, seed) for seed in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+    workers = [threading.Thread(target=_worker, args=(cache, throttle, workload, barrier)) for workload in workloads]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', default='1,4,8')
+    parser.add_argument('--ops', type=int, default=200000)
+    parser.add_argument('--keys', type=int, default=5000)
+    args = parser.parse_args()
+
+    for threads in (int(value) for value in args.threads.split(',')):
+        for mode in ('none', 'global', 'striped'):
+            if mode == 'none' and threads > 1:
+                continue  # Tek sahipli mod thread'ler arasında paylaşılamaz
+            rate = run(mode, threads, args.ops, args.keys)
+            print(f"threads={threads:<3} mode={mode:<8} ops/s={rate:,.0f}")
+
+
+if __name__ == '__main__':
+    main()
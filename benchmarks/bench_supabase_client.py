@@ -0,0 +1,65 @@
+"""
+Supabase Client Benchmark
+Update başına servis kurulum maliyetini ölçer:
+- before: her update'te create_client() (DatabaseService + StorageService)
+- after:  paylaşılan client registry (get_supabase_client)
+
+Kullanım:
+    python benchmarks/bench_supabase_client.py [--updates 200] [--query]
+
+--query verilirse (gerçek SUPABASE_URL/SUPABASE_KEY gerekir) her update'te
+bir de `questions` sorgusu yapılır; böylece yeni client'ın TLS handshake
+maliyeti de ölçüme dahil olur.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Ağ olmadan da kurulum maliyeti ölçülebilsin diye sahte değerler
+os.environ.setdefault('SUPABASE_URL', 'https://benchmark.supabase.co')
+os.environ.setdefault('SUPABASE_KEY', 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.benchmark')
+
+from supabase import create_client
+from config import Config
+from services.supabase_client import get_supabase_client, reset_supabase_clients
+
+
+def _simulate_update(client_factory, query: bool) -> float:
+    """Tek bir update'in servis kurulumunu (ve opsiyonel sorgusunu) ölçer"""
+    start = time.perf_counter()
+    db_client = client_factory()        # DatabaseService()
+    storage_client = client_factory()   # StorageService()
+    if query:
+        db_client.table('questions').select('id').limit(1).execute()
+    _ = storage_client
+    return (time.perf_counter() - start) * 1000
+
+
+def _run(name: str, client_factory, updates: int, query: bool) -> None:
+    samples = [_simulate_update(client_factory, query) for _ in range(updates)]
+    samples.sort()
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<8} updates={updates} mean={statistics.mean(samples):.3f}ms p50={p50:.3f}ms p99={p99:.3f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--query', action='store_true')
+    args = parser.parse_args()
+
+    _run('before', lambda: create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY), args.updates, args.query)
+
+    reset_supabase_clients()
+    get_supabase_client()  # process başlangıcında bir kez oluşturulur
+    _run('after', get_supabase_client, args.updates, args.query)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Throttle Benchmark
+ThrottleService.should_throttle çağrı hızını ve takip edilen kullanıcı başına belleği ölçer:
+- before: kullanıcı başına datetime listesi + iç içe dict (önceki in-memory uygulama)
+- after:  GCRA tablosu (MemoryBackend; key başına array('d') içinde tek float)
+
+Kullanım:
+    python benchmarks/bench_throttle.py [--users 50000] [--calls 500000]
+
+Bellek tracemalloc ile, her kullanıcı bir kez 'save_answer' ile throttle kontrolünden
+geçtikten sonra ölçülür (kullanıcı başına bir window + bir işlem kaydı).
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config import'u için sahte değerler (ağ kullanılmaz)
+os.environ.setdefault('SUPABASE_URL', 'https://benchmark.supabase.co')
+os.environ.setdefault('SUPABASE_KEY', 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.benchmark')
+os.environ.setdefault('CACHE_BACKEND', 'memory')
+
+from services.cache_backends import MemoryBackend
+from services.throttle_service import ThrottleService
+
+
+class LegacyThrottle:
+    """Önceki uygulama (karşılaştırma için; sadece should_throttle, lock dahil)"""
+
+    WRITE_WINDOW_SECONDS = 5
+    MAX_WRITES_PER_WINDOW = 1
+    OPERATION_THROTTLE_SECONDS = {'create_user': 60, 'save_answer': 2, 'save_receipt': 10, 'create_payment': 30}
+
+    def __init__(self):
+        self._user_write_timestamps = defaultdict(list)
+        self._user_operation_timestamps = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def should_throttle(self, user_id, operation=None):
+        with self._lock:
+            now = datetime.now()
+            if operation and operation in self.OPERATION_THROTTLE_SECONDS:
+                last_timestamp = self._user_operation_timestamps[user_id].get(operation)
+                if last_timestamp and (now - last_timestamp).total_seconds() < self.OPERATION_THROTTLE_SECONDS[operation]:
+                    return True
+                self._user_operation_timestamps[user_id][operation] = now
+            timestamps = self._user_write_timestamps[user_id]
+            timestamps[:] = [ts for ts in timestamps if (now - ts).total_seconds() < self.WRITE_WINDOW_SECONDS]
+            if len(timestamps) >= self.MAX_WRITES_PER_WINDOW:
+                return True
+            timestamps.append(now)
+            return False
+
+
+def _memory_per_user(factory, users: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    throttle = factory()
+    for user_id in range(users):
+        throttle.should_throttle(1_000_000 + user_id, 'save_answer')
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del throttle
+    return (after - before) / users
+
+
+def _calls_per_second(factory, users: int, calls: int) -> float:
+    throttle = factory()
+    rng = random.Random(42)
+    user_ids = [1_000_000 + rng.randrange(users) for _ in range(calls)]
+    start = time.perf_counter()
+    for user_id in user_ids:
+        throttle.should_throttle(user_id, 'save_answer')
+    return calls / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--calls', type=int, default=500000)
+    args = parser.parse_args()
+
+    factories = {
+        'before': LegacyThrottle,
+        'after': lambda: ThrottleService(MemoryBackend(max_limit_keys=max(args.users * 2, 1)), lock_mode='global'),
+    }
+    for name, factory in factories.items():
+        rate = _calls_per_second(factory, args.users, args.calls)
+        per_user = _memory_per_user(factory, args.users)
+        print(f"{name:<8} users={args.users} calls={args.calls} "
+              f"calls/s={rate:,.0f} bytes/user={per_user:.0f}")
+
+
+if __name__ == '__main__':
+    main()
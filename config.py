@@ -20,6 +20,8 @@ class Config:
     # Supabase Ayarları
     SUPABASE_URL = os.getenv('SUPABASE_URL')
     SUPABASE_KEY = os.getenv('SUPABASE_KEY')
+    # Aynı anda Supabase'e gidebilecek maksimum sorgu sayısı (thread havuzu boyutu)
+    DB_MAX_CONCURRENCY = int(os.getenv('DB_MAX_CONCURRENCY', 8))
     
     # Flask Ayarları
     FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'default-secret-key')
@@ -73,6 +75,99 @@ Bu sorular sayesinde size daha iyi hizmet verebiliriz.
     "dangalak", "akılsız", "bağnaz", "soysuz", "manyak"
     ]
     
+    # İçerik aynası (questions/messages/bot_settings yerel SQLite kopyası)
+    CONTENT_MIRROR_PATH = os.getenv('CONTENT_MIRROR_PATH', 'data/content_mirror.sqlite3')
+    CONTENT_MIRROR_REFRESH_INTERVAL = float(os.getenv('CONTENT_MIRROR_REFRESH_INTERVAL', 30))
+    
+    # İçerik cache'leri (mesajlar, sorular, bot ayarları) süreleri (saniye)
+    # Admin değişiklikleri invalidation bus ile anında yayıldığı için uzun tutulabilir.
+    # Soft TTL sonrası eski değer hemen döner ve arka planda yenilenir; kullanıcı
+    # sadece hard TTL (CONTENT_CACHE_TTL) dolduysa DB'yi bekler
+    CONTENT_CACHE_TTL = int(os.getenv('CONTENT_CACHE_TTL', 24 * 3600))
+    CONTENT_CACHE_SOFT_TTL = int(os.getenv('CONTENT_CACHE_SOFT_TTL', 300))
+    # Cache invalidation bus: unix (aynı makine), supabase (ayrı servisler), redis (CACHE_BACKEND=redis ile), none
+    CACHE_BUS_TRANSPORT = os.getenv('CACHE_BUS_TRANSPORT', 'unix')
+    CACHE_BUS_DIR = os.getenv('CACHE_BUS_DIR', 'data/cache_bus')
+    CACHE_BUS_POLL_INTERVAL = float(os.getenv('CACHE_BUS_POLL_INTERVAL', 2.0))
+    # supabase transport: bir saatten eski cache_invalidations kayıtlarını silen işin aralığı (saniye)
+    CACHE_BUS_CLEANUP_INTERVAL = float(os.getenv('CACHE_BUS_CLEANUP_INTERVAL', 3600))
+    
+    # In-memory cache üst sınırı (LRU ile en eski kullanılan entry düşer)
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+    
+    # Cache/throttle lock modları (services/locks.py): none (tek sahip), global, striped
+    # Bot tek event loop thread'inde çalışır; web gunicorn thread'leriyle çalışabilir
+    BOT_LOCK_MODE = os.getenv('BOT_LOCK_MODE', 'none')
+    WEB_LOCK_MODE = os.getenv('WEB_LOCK_MODE', 'striped')
+    LOCK_STRIPES = int(os.getenv('LOCK_STRIPES', 16))
+    
+    # Cache backend: memory (process-local) veya redis (replikalar arasında paylaşılan
+    # cache, throttle ve rate limit; 'redis' paketi gerekir)
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    REDIS_KEY_PREFIX = os.getenv('REDIS_KEY_PREFIX', 'tgbot:')
+    # Redis modunda in-memory near cache entry ömrü (saniye)
+    CACHE_NEAR_TTL = float(os.getenv('CACHE_NEAR_TTL', 5.0))
+    # Redis çağrı timeout'u (saniye); bot'ta çağrılar event loop dışında (redis-io thread'i) yapılır
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 1.0))
+    # Devre kesici: art arda bu kadar hatada Redis REDIS_BREAKER_RESET saniye atlanır, yerel (memory) yola düşülür
+    REDIS_BREAKER_FAILURES = int(os.getenv('REDIS_BREAKER_FAILURES', 3))
+    REDIS_BREAKER_RESET = float(os.getenv('REDIS_BREAKER_RESET', 5.0))
+    # redis-io kuyruğunda bekleyebilecek en fazla çağrı (fazlası Redis'e gitmeden yerel yola düşer)
+    REDIS_MAX_PENDING = int(os.getenv('REDIS_MAX_PENDING', 256))
+    
+    # İstatistik snapshot cache süresi (saniye)
+    STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', 15))
+    # In-memory throttle/rate limit tablosu üst sınırı (key = kullanıcı+işlem; LRU ile düşer)
+    THROTTLE_MAX_KEYS = int(os.getenv('THROTTLE_MAX_KEYS', 100000))
+    
+    # Kullanıcı rate limit'leri (middlewares/rate_limit.py): kural=limit/pencere_saniye
+    # Komutlar kendi adıyla (start), diğerleri message / media (dekont) / callback kuralıyla sayılır
+    RATE_LIMITS = os.getenv('RATE_LIMITS', 'start=5/60,media=5/60,message=30/60,callback=60/60')
+    # Kural başına takip edilen en fazla kullanıcı (LRU ile düşer)
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', 20000))
+    
+    # Kullanıcı profili cache süreleri (saniye); negatif: DB'de bulunamayan kullanıcılar
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 3600))
+    USER_NEGATIVE_CACHE_TTL = int(os.getenv('USER_NEGATIVE_CACHE_TTL', 30))
+    # Onaylı dekont sayısı cache süresi (kontenjan kontrolü; dekont durumu değişince ayrıca silinir)
+    APPROVED_COUNT_CACHE_TTL = int(os.getenv('APPROVED_COUNT_CACHE_TTL', 60))
+    
+    # Giden mesaj limitleri (services/send_scheduler.py; Telegram: ~30/sn global,
+    # ~1/sn özel sohbet, ~20/dk grup)
+    SEND_GLOBAL_RATE = float(os.getenv('SEND_GLOBAL_RATE', 30))
+    SEND_CHAT_RATE = float(os.getenv('SEND_CHAT_RATE', 1))
+    SEND_GROUP_PER_MINUTE = float(os.getenv('SEND_GROUP_PER_MINUTE', 20))
+    SEND_MAX_RETRIES = int(os.getenv('SEND_MAX_RETRIES', 5))  # RetryAfter sonrası tekrar sayısı
+    # Öncelik şeritlerinin global token payları (interactive: kullanıcıya cevaplar,
+    # notification: admin bildirimleri, bulk: wishlist davetleri / grup uyarıları)
+    SEND_LANE_WEIGHTS = os.getenv('SEND_LANE_WEIGHTS', 'interactive=6,notification=3,bulk=1')
+    SEND_LATENCY_SAMPLES = int(os.getenv('SEND_LATENCY_SAMPLES', 1024))  # Şerit başına p50/p99 örneği
+    # Admin panelinden gelen gönderim komutları (services/outbox.py; bot_outbox tablosu):
+    # bot bu aralıkla okur, tur başına en fazla OUTBOX_BATCH_SIZE komut çalıştırır
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 2))
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 50))
+    OUTBOX_CLAIM_TIMEOUT = float(os.getenv('OUTBOX_CLAIM_TIMEOUT', 300))  # Sahibi çöken komut bu kadar sonra tekrar alınır
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 3))
+    
+    # Periyodik bakım işleri (services/scheduler.py); aralıklar saniye, jitter ± oran
+    SCHEDULER_JITTER = float(os.getenv('SCHEDULER_JITTER', 0.1))
+    CACHE_SWEEP_INTERVAL = float(os.getenv('CACHE_SWEEP_INTERVAL', 60))
+    THROTTLE_SWEEP_INTERVAL = float(os.getenv('THROTTLE_SWEEP_INTERVAL', 60))
+    RATE_LIMIT_SWEEP_INTERVAL = float(os.getenv('RATE_LIMIT_SWEEP_INTERVAL', 300))
+    SEND_SCHEDULER_SWEEP_INTERVAL = float(os.getenv('SEND_SCHEDULER_SWEEP_INTERVAL', 60))  # Boşta kalan sohbet kovaları
+    
+    # Cevap Yazma Kuyruğu (write-behind)
+    ANSWER_BATCH_SIZE = int(os.getenv('ANSWER_BATCH_SIZE', 50))  # Bu kadar cevap birikince flush
+    ANSWER_FLUSH_INTERVAL = float(os.getenv('ANSWER_FLUSH_INTERVAL', 2.0))  # Saniye
+    ANSWER_SPILL_PATH = os.getenv('ANSWER_SPILL_PATH', 'data/answers_spill.jsonl')  # Supabase kesintisinde
+    ANSWER_SPILL_MAX_BYTES = int(os.getenv('ANSWER_SPILL_MAX_BYTES', 5 * 1024 * 1024))  # 5MB
+    
+    # Metrikler
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # /api/internal/metrics için Bearer token (opsiyonel)
+    METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', 300))  # Bot metrik log aralığı (saniye)
+    METRICS_SNAPSHOT_PATH = os.getenv('METRICS_SNAPSHOT_PATH', 'data/metrics_bot.json')
+    
     # Dosya Yükleme Ayarları
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png'}
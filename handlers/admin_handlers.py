@@ -14,6 +14,7 @@ import json
 from config import Config
 from services.database import DatabaseService
 from services.group_service import GroupService
+from services.invalidation_bus import get_invalidation_bus
 
 # Router oluştur
 router = Router()
@@ -111,6 +112,7 @@ class AdminHandler:
         question = await self.db.add_question(question_text)
         
         if question:
+            get_invalidation_bus().publish(keys=['questions'])
             await message.answer(f"✅ Soru başarıyla eklendi: {question_text}")
         else:
             await message.answer("❌ Soru eklenirken hata oluştu.")
@@ -129,6 +131,7 @@ class AdminHandler:
         success = await self.db.delete_question(question_id)
         
         if success:
+            get_invalidation_bus().publish(keys=['questions'])
             await callback.answer("✅ Soru silindi.", show_alert=True)
         else:
             await callback.answer("❌ Soru silinirken hata oluştu.", show_alert=True)
@@ -369,24 +372,22 @@ class AdminHandler:
         await self.show_members(callback)
     
     async def show_stats(self, callback: types.CallbackQuery):
-        """İstatistikleri gösterir (COUNT query'leri ile optimize edilmiş)"""
+        """İstatistikleri gösterir (tek sorguluk snapshot ile)"""
         if not self.is_admin(callback.from_user.id):
             await callback.answer("❌ Yetkiniz yok.", show_alert=True)
             return
         
-        # İstatistikleri hesapla (COUNT query'leri kullan)
-        total_users = await self.db.count_all_users()
-        total_payments = await self.db.count_approved_receipts()  # Onaylanmış dekont sayısı
-        pending_payments = await self.db.count_pending_payments()
-        total_members = await self.db.count_group_members(Config.GROUP_ID)
+        # İstatistikleri tek sorguluk snapshot'tan al (kısa TTL cache'li)
+        stats = await self.db.get_stats_snapshot(Config.GROUP_ID)
         
         text = f"""
 📊 **Bot İstatistikleri**
 
-👥 **Toplam Kullanıcı:** {total_users}
-💰 **Toplam Ödeme:** {total_payments}
-⏳ **Bekleyen Ödeme:** {pending_payments}
-👤 **Grup Üyesi:** {total_members}
+👥 **Toplam Kullanıcı:** {stats['total_users']}
+💰 **Toplam Ödeme:** {stats['total_payments']}
+⏳ **Bekleyen Ödeme:** {stats['pending_payments']}
+👤 **Grup Üyesi:** {stats['total_members']}
+📋 **Bekleme Listesi:** {stats['wishlist_count']}
         """
         
         keyboard = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🔙 Geri", callback_data="admin_panel")]])
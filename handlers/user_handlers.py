@@ -12,7 +12,6 @@ from typing import Dict, List
 import json
 from datetime import datetime, timedelta
 import asyncio
-from collections import defaultdict
 
 from config import Config
 from services.database import DatabaseService
@@ -20,39 +19,13 @@ from services.storage_service import StorageService
 from services.group_service import GroupService
 from services.cache_service import get_cache
 from services.throttle_service import get_throttle
+from services.send_scheduler import send_lane, NOTIFICATION
+from services.answer_queue import get_answer_queue
+from services.message_templates import get_message_templates, get_settings_snapshot, user_bindings
 
 # Router oluştur
 router = Router()
 
-# Rate limiting için in-memory cache (Redis kullanmıyoruz)
-_user_rate_limit = defaultdict(list)  # user_id -> [timestamp1, timestamp2, ...]
-RATE_LIMIT_WINDOW = 60  # 60 saniye
-RATE_LIMIT_MAX_REQUESTS = 5  # 60 saniyede maksimum 5 istek
-
-def check_rate_limit(user_id: int) -> bool:
-    """
-    Kullanıcının rate limit kontrolünü yapar
-    
-    Returns:
-        True: İstek kabul edilebilir
-        False: Rate limit aşıldı
-    """
-    now = datetime.now()
-    
-    # Eski kayıtları temizle
-    _user_rate_limit[user_id] = [
-        ts for ts in _user_rate_limit[user_id]
-        if (now - ts).total_seconds() < RATE_LIMIT_WINDOW
-    ]
-    
-    # Rate limit kontrolü
-    if len(_user_rate_limit[user_id]) >= RATE_LIMIT_MAX_REQUESTS:
-        return False
-    
-    # Yeni isteği kaydet
-    _user_rate_limit[user_id].append(now)
-    return True
-
 # FSM States
 class UserStates(StatesGroup):
     """Kullanıcı durumları"""
@@ -73,58 +46,92 @@ class UserHandler:
         user_id = message.from_user.id
         username = message.from_user.username or message.from_user.first_name
         
-        # Rate limiting kontrolü
-        if not check_rate_limit(user_id):
-            await message.answer(
-                "⏳ Çok fazla istek gönderdiniz. Lütfen birkaç dakika bekleyip tekrar deneyin."
-            )
-            return
+        # Rate limiting: middlewares/rate_limit.py ('start' kuralı)
         
         # DB write throttling: Çok kısa sürede duplicate user create'i engelle
         throttle = get_throttle()
-        should_throttle = throttle.should_throttle(user_id, 'create_user')
+        should_throttle = await throttle.should_throttle_async(user_id, 'create_user')
         
-        # Kullanıcıyı veritabanına kaydet (throttle yoksa)
+        # Kullanıcıyı veritabanına kaydet (throttle yoksa) - tek round-trip upsert
         if not should_throttle:
-            user = await self.db.get_user(user_id)
-            if not user:
-                user = await self.db.create_user(
-                    user_id=user_id,
-                    username=username,
-                    first_name=message.from_user.first_name,
-                    last_name=message.from_user.last_name
-                )
-                # Write'ı kaydet
-                throttle.record_write(user_id, 'create_user')
+            await self.db.upsert_user(
+                user_id=user_id,
+                username=username,
+                first_name=message.from_user.first_name,
+                last_name=message.from_user.last_name
+            )
+            # Write'ı kaydet
+            throttle.record_write(user_id, 'create_user')
         
-        # Cache'den welcome messages'i al
-        cache = get_cache()
-        welcome_messages = cache.get('welcome_messages')
+        # Welcome mesajları (cache)
+        welcome_messages = await self.get_messages('welcome')
         
-        if not welcome_messages:
-            # Cache miss, DB'den yükle
-            welcome_messages = await self.db.get_welcome_messages()
-            
-            if not welcome_messages:
-                # Varsayılan mesajları ekle
-                await self._create_default_messages()
-                welcome_messages = await self.db.get_welcome_messages()
-            
-            # Cache'e kaydet (5 dakika TTL)
-            if welcome_messages:
-                cache.set('welcome_messages', welcome_messages, ttl=300)
+        settings = await get_settings_snapshot(self.db.get_bot_settings)
+        welcome_templates = get_message_templates().bind_sequence('welcome_messages', welcome_messages, settings)
+        bindings = user_bindings(message.from_user)
         
         # Mesajları sırayla göster
-        for i, msg in enumerate(welcome_messages):
-            await message.answer(msg['content'])
+        for i, (template, delay) in enumerate(welcome_templates):
+            await message.answer(template.render(**bindings))
             
             # Son mesaj değilse bekle
-            if i < len(welcome_messages) - 1:
-                await asyncio.sleep(msg.get('delay', 1.0))
+            if i < len(welcome_templates) - 1:
+                await asyncio.sleep(delay)
         
         # Sorulara geç
         await self.start_questions(message, state)
 
+    # Cache'li içerik okumaları (miss'te key başına tek loader çalışır; bkz. warm_up_cache)
+    async def get_messages(self, message_type: str) -> List[Dict]:
+        """
+        Mesaj listesini cache'ten döndürür
+        Key messages:{type}:v{gen}; messages tablosuna her yazma generation'ı artırdığı
+        için eski liste bir daha okunmaz
+        """
+        loaders = {
+            'welcome': self._load_welcome_messages,
+            'payment': self._load_payment_messages,
+            'sss': self._load_sss_messages,
+        }
+        cache = get_cache()
+        try:
+            return await cache.get_or_load(await cache.aversioned_key('messages', message_type), loaders[message_type],
+                                           ttl=Config.CONTENT_CACHE_TTL, soft_ttl=Config.CONTENT_CACHE_SOFT_TTL,
+                                           tags=['messages']) or []
+        except Exception as e:
+            # Loader hatası cache'lenmez; sonraki istek tekrar dener
+            print(f"Mesajları yükleme hatası ({message_type}): {e}")
+            return []
+    
+    async def get_questions(self) -> List[Dict]:
+        """Soruları cache'ten döndürür"""
+        try:
+            return await get_cache().get_or_load('questions', self._load_questions,
+                                                 ttl=Config.CONTENT_CACHE_TTL, soft_ttl=Config.CONTENT_CACHE_SOFT_TTL,
+                                                 tags=['questions']) or []
+        except Exception as e:
+            print(f"Soruları yükleme hatası: {e}")
+            return []
+    
+    async def get_approved_count(self) -> int:
+        """Onaylanmış dekont sayısını cache'ten döndürür (kontenjan kontrolü için; 0 da cache'lenir)"""
+        try:
+            return await get_cache().get_or_load('approved_receipts_count',
+                                                 lambda: self.db.count_approved_receipts(raise_errors=True),
+                                                 ttl=Config.APPROVED_COUNT_CACHE_TTL) or 0
+        except Exception as e:
+            print(f"Onaylanmış dekont sayısı yükleme hatası: {e}")
+            return 0
+    
+    async def _load_welcome_messages(self) -> List[Dict]:
+        """Welcome mesajlarını yükler (yoksa varsayılanları ekler)"""
+        # DB hatası exception olarak yükselir: varsayılanlar eklenmez, boş liste cache'lenmez
+        welcome_messages = await self.db.get_messages_by_type('welcome', raise_errors=True)
+        if not welcome_messages:
+            await self._create_default_messages()
+            welcome_messages = await self.db.get_messages_by_type('welcome', raise_errors=True)
+        return welcome_messages
+    
     async def _create_default_messages(self):
         """Varsayılan mesajları oluşturur"""
         default_messages = [
@@ -199,22 +206,8 @@ Ama en önemlisi:
     
     async def show_sss(self, callback: types.CallbackQuery, state: FSMContext):
         """SSS mesajını gösterir"""
-        # Cache'den SSS mesajlarını al
-        cache = get_cache()
-        sss_messages = cache.get('sss_messages')
-        
-        if not sss_messages:
-            # Cache miss, DB'den yükle
-            sss_messages = await self.db.get_messages_by_type('sss')
-            
-            if not sss_messages:
-                # Varsayılan SSS mesajını ekle
-                await self._create_default_sss_message()
-                sss_messages = await self.db.get_messages_by_type('sss')
-            
-            # Cache'e kaydet (5 dakika TTL)
-            if sss_messages:
-                cache.set('sss_messages', sss_messages, ttl=300)
+        # SSS mesajları (cache)
+        sss_messages = await self.get_messages('sss')
         
         if sss_messages:
             # İlk SSS mesajını göster (genellikle tek bir SSS mesajı olur)
@@ -225,6 +218,14 @@ Ama en önemlisi:
         
         await callback.answer()
     
+    async def _load_sss_messages(self) -> List[Dict]:
+        """SSS mesajlarını yükler (yoksa varsayılanı ekler)"""
+        sss_messages = await self.db.get_messages_by_type('sss', raise_errors=True)
+        if not sss_messages:
+            await self._create_default_sss_message()
+            sss_messages = await self.db.get_messages_by_type('sss', raise_errors=True)
+        return sss_messages
+    
     async def _create_default_sss_message(self):
         """Varsayılan SSS mesajını oluşturur"""
         default_sss_message = {
@@ -249,27 +250,19 @@ Ek sorularınız için admin ile iletişime geçebilirsiniz.""",
         
         await self.db.add_message(**default_sss_message)
     
+    async def _load_questions(self) -> List[Dict]:
+        """Soruları yükler (yoksa varsayılan soruları ekler)"""
+        questions = await self.db.get_questions(raise_errors=True)
+        if not questions:
+            for question in Config.DEFAULT_QUESTIONS:
+                await self.db.add_question(question)
+            questions = await self.db.get_questions(raise_errors=True)
+        return questions
+    
     async def start_questions_flow(self, callback: types.CallbackQuery, state: FSMContext):
         """Sorulara başlar"""
-        # Cache'den questions'i al
-        cache = get_cache()
-        questions = cache.get('questions')
-        
-        if not questions:
-            # Cache miss, DB'den yükle
-            questions = await self.db.get_questions()
-            
-            if not questions:
-                # Varsayılan soruları ekle
-                for question in Config.DEFAULT_QUESTIONS:
-                    await self.db.add_question(question)
-                questions = await self.db.get_questions()
-                # Cache'i temizle (yeni sorular eklendi)
-                cache.delete('questions')
-            
-            # Cache'e kaydet (10 dakika TTL - sorular daha az değişir)
-            if questions:
-                cache.set('questions', questions, ttl=600)
+        # Sorular (cache)
+        questions = await self.get_questions()
         
         # İlk soruyu sor
         if questions:
@@ -297,12 +290,12 @@ Ek sorularınız için admin ile iletişime geçebilirsiniz.""",
         
         # DB write throttling: Çok hızlı cevap kaydetmeyi engelle
         throttle = get_throttle()
-        should_throttle = throttle.should_throttle(user_id, 'save_answer')
+        should_throttle = await throttle.should_throttle_async(user_id, 'save_answer')
         
-        # Cevabı kaydet (throttle yoksa)
+        # Cevabı kaydet (throttle yoksa) - write-behind kuyruğu bulk INSERT ile yazar
         if not should_throttle:
             question = questions[current_index]
-            await self.db.save_answer(user_id, question['id'], message.text)
+            get_answer_queue().enqueue(user_id, question['id'], message.text)
             # Write'ı kaydet
             throttle.record_write(user_id, 'save_answer')
         
@@ -322,8 +315,8 @@ Ek sorularınız için admin ile iletişime geçebilirsiniz.""",
         """Ödeme kısmını gösterir (300 limit kontrolü ile)"""
         user_id = message.from_user.id
         
-        # 300 kişi limiti kontrolü
-        approved_count = await self.db.count_approved_receipts()
+        # 300 kişi limiti kontrolü (cache; dekont durumu değişince silinir)
+        approved_count = await self.get_approved_count()
         
         # Eğer 300'ü geçtiyse bekleme listesine al
         if approved_count >= 300:
@@ -341,32 +334,21 @@ Ek sorularınız için admin ile iletişime geçebilirsiniz.""",
             return
         
         # Normal akış: Ödeme mesajlarını göster
-        # Cache'den payment messages'i al
-        cache = get_cache()
-        payment_messages = cache.get('payment_messages')
+        # Ödeme mesajları (cache)
+        payment_messages = await self.get_messages('payment')
         
-        if not payment_messages:
-            # Cache miss, DB'den yükle
-            payment_messages = await self.db.get_payment_messages()
-            
-            if not payment_messages:
-                # Varsayılan ödeme mesajlarını ekle
-                await self._create_default_payment_messages()
-                payment_messages = await self.db.get_payment_messages()
-            
-            # Cache'e kaydet (5 dakika TTL)
-            if payment_messages:
-                cache.set('payment_messages', payment_messages, ttl=300)
+        # {payment_link} cache'teki ayarlardan bağlanır; bağlanmış dizi ayarlar değişene kadar yeniden kullanılır
+        settings = await get_settings_snapshot(self.db.get_bot_settings)
+        payment_templates = get_message_templates().bind_sequence('payment_messages', payment_messages, settings)
+        bindings = user_bindings(message.from_user)
         
         # Mesajları sırayla göster
-        for i, msg in enumerate(payment_messages):
-            # Mesaj içeriğindeki {payment_link} placeholder'ını gerçek link ile değiştir
-            formatted_content = await self._format_message_with_payment_link(msg['content'])
-            await message.answer(formatted_content)
+        for i, (template, delay) in enumerate(payment_templates):
+            await message.answer(template.render(**bindings))
             
             # Son mesaj değilse bekle
-            if i < len(payment_messages) - 1:
-                await asyncio.sleep(msg.get('delay', 1.0))
+            if i < len(payment_templates) - 1:
+                await asyncio.sleep(delay)
         
         # Ödeme mesajlarından sonra butonları göster
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -379,6 +361,14 @@ Ek sorularınız için admin ile iletişime geçebilirsiniz.""",
             reply_markup=keyboard
         )
 
+    async def _load_payment_messages(self) -> List[Dict]:
+        """Ödeme mesajlarını yükler (yoksa varsayılanları ekler)"""
+        payment_messages = await self.db.get_messages_by_type('payment', raise_errors=True)
+        if not payment_messages:
+            await self._create_default_payment_messages()
+            payment_messages = await self.db.get_messages_by_type('payment', raise_errors=True)
+        return payment_messages
+    
     async def _create_default_payment_messages(self):
         """Varsayılan ödeme mesajlarını oluşturur"""
         default_payment_messages = [
@@ -413,24 +403,6 @@ Aşağıdaki linkten Kompass Network'e katılabilirsin.
         """Ödeme linkini gösterir - artık kullanılmıyor, mesaj içeriğinde entegre edildi"""
         pass
 
-    async def _get_payment_link(self):
-        """Bot ayarlarından ödeme linkini alır"""
-        settings = await self.db.get_bot_settings()
-        return settings.get('shopier_payment_url') if settings else None
-
-    async def _format_message_with_payment_link(self, content: str) -> str:
-        """Mesaj içeriğindeki {payment_link} placeholder'ını gerçek link ile değiştirir"""
-        payment_url = await self._get_payment_link()
-        
-        if payment_url:
-            # Placeholder'ı gerçek link ile değiştir
-            formatted_content = content.replace('{payment_link}', payment_url)
-        else:
-            # Link yoksa placeholder'ı kaldır ve uyarı ekle
-            formatted_content = content.replace('{payment_link}', '💳 Ödeme linki henüz ayarlanmamış. Lütfen admin ile iletişime geçin.')
-        
-        return formatted_content
-    
     async def payment_done(self, callback: types.CallbackQuery, state: FSMContext, bot: Bot):
         """Ödeme yapıldı butonuna tıklandığında"""
         user_id = callback.from_user.id
@@ -460,16 +432,11 @@ Aşağıdaki linkten Kompass Network'e katılabilirsin.
         """Dekont dosyasını işler"""
         user_id = message.from_user.id
         
-        # Rate limiting kontrolü
-        if not check_rate_limit(user_id):
-            await message.answer(
-                "⏳ Çok fazla istek gönderdiniz. Lütfen birkaç dakika bekleyip tekrar deneyin."
-            )
-            return
+        # Rate limiting: middlewares/rate_limit.py ('media' kuralı)
         
         # DB write throttling: Çok hızlı dekont yüklemeyi engelle
         throttle = get_throttle()
-        should_throttle = throttle.should_throttle(user_id, 'save_receipt')
+        should_throttle = await throttle.should_throttle_async(user_id, 'save_receipt')
         
         if should_throttle:
             await message.answer(
@@ -517,7 +484,7 @@ Aşağıdaki linkten Kompass Network'e katılabilirsin.
                 # Eğer ödeme kaydı yoksa oluştur (dekont yüklendiğinde ödeme yapılmış sayılır)
                 if not user_payment:
                     # Payment create throttling kontrolü
-                    if not throttle.should_throttle(user_id, 'create_payment'):
+                    if not await throttle.should_throttle_async(user_id, 'create_payment'):
                         await self.db.create_payment(user_id, 99.99)
                         throttle.record_write(user_id, 'create_payment')
                 
@@ -558,8 +525,16 @@ Aşağıdaki linkten Kompass Network'e katılabilirsin.
 ✅ Admin panelinden onaylayabilirsiniz.
             """
             
-            for admin_id in Config.ADMIN_IDS:
-                await bot.send_message(chat_id=admin_id, text=notification)
+            # Gönderimler send scheduler'da bildirim şeridinde sıralanır (kullanıcı cevaplarının
+            # arkasında); bir admin'e gönderilemezse diğerleri etkilenmez
+            with send_lane(NOTIFICATION):
+                results = await asyncio.gather(
+                    *(bot.send_message(chat_id=admin_id, text=notification) for admin_id in Config.ADMIN_IDS),
+                    return_exceptions=True
+                )
+            for admin_id, result in zip(Config.ADMIN_IDS, results):
+                if isinstance(result, Exception):
+                    print(f"Admin ödeme bildirimi hatası ({admin_id}): {result}")
                 
         except Exception as e:
             print(f"Admin ödeme bildirimi hatası: {e}")
@@ -580,12 +555,39 @@ Aşağıdaki linkten Kompass Network'e katılabilirsin.
 ✅ Admin panelinden onaylayabilirsiniz.
             """
             
-            for admin_id in Config.ADMIN_IDS:
-                await bot.send_message(chat_id=admin_id, text=notification)
+            # Gönderimler send scheduler'da bildirim şeridinde sıralanır (kullanıcı cevaplarının
+            # arkasında); bir admin'e gönderilemezse diğerleri etkilenmez
+            with send_lane(NOTIFICATION):
+                results = await asyncio.gather(
+                    *(bot.send_message(chat_id=admin_id, text=notification) for admin_id in Config.ADMIN_IDS),
+                    return_exceptions=True
+                )
+            for admin_id, result in zip(Config.ADMIN_IDS, results):
+                if isinstance(result, Exception):
+                    print(f"Admin dekont bildirimi hatası ({admin_id}): {result}")
                 
         except Exception as e:
             print(f"Admin dekont bildirimi hatası: {e}")
 
+async def warm_up_cache(bot: Bot) -> Dict[str, object]:
+    """
+    Bot başlarken içerik cache'ini eşzamanlı doldurur (ilk kullanıcılar soğuk cache beklemesin)
+    
+    Returns:
+        {isim: sonuç veya exception}
+    """
+    handler = UserHandler(DatabaseService(), StorageService(), GroupService(bot))
+    loads = {
+        'questions': handler.get_questions(),
+        'welcome_messages': handler.get_messages('welcome'),
+        'payment_messages': handler.get_messages('payment'),
+        'sss_messages': handler.get_messages('sss'),
+        'bot_settings': get_settings_snapshot(handler.db.get_bot_settings),
+        'approved_receipts_count': handler.get_approved_count(),
+    }
+    results = await asyncio.gather(*loads.values(), return_exceptions=True)
+    return dict(zip(loads, results))
+
 # Handler fonksiyonları
 @router.message(F.text == "/start")
 async def start_command(message: types.Message, state: FSMContext, bot: Bot):
@@ -595,17 +597,8 @@ async def start_command(message: types.Message, state: FSMContext, bot: Bot):
 
 @router.message(F.text == "/help")
 async def help_command(message: types.Message):
-    # Cache'den bot_settings'i al
-    cache = get_cache()
-    settings = cache.get('bot_settings')
-    
-    if not settings:
-        # Cache miss, DB'den yükle
-        db = DatabaseService()
-        settings = await db.get_bot_settings()
-        # Cache'e kaydet (10 dakika TTL - settings daha az değişir)
-        if settings:
-            cache.set('bot_settings', settings, ttl=600)
+    # Bot ayarları (cache)
+    settings = await get_settings_snapshot(DatabaseService().get_bot_settings)
     
     text = settings.get('help_message') if settings else None
     if not text:
@@ -5,6 +5,7 @@ aiogram 3.x uyumlu
 """
 
 import asyncio
+import functools
 import logging
 import json
 from aiogram import Bot, Dispatcher
@@ -12,12 +13,21 @@ from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import BotCommand
 
 from config import Config
-from handlers.user_handlers import router as user_router
+from handlers.user_handlers import router as user_router, warm_up_cache
 from handlers.admin_handlers import router as admin_router
 from handlers.group_handlers import router as group_router
 from services.database import DatabaseService
 from services.storage_service import StorageService
 from services.group_service import GroupService
+from services.answer_queue import get_answer_queue
+from services.content_mirror import get_content_mirror
+from services.invalidation_bus import get_invalidation_bus
+from services.metrics import log_metrics
+from services.scheduler import get_scheduler, register_maintenance_jobs
+from services.locks import set_lock_mode
+from services.send_scheduler import get_send_scheduler
+from services.outbox import get_outbox
+from middlewares.rate_limit import get_rate_limiter
 
 # Logging ayarları
 logging.basicConfig(
@@ -72,27 +82,59 @@ async def on_startup(bot: Bot):
         logger.error(f"Konfigürasyon hatası: {e}")
         return False
     
-    # Komutları ayarla
-    await set_commands(bot)
+    # Admin panelinden gelen cache invalidation'larını dinle
+    get_invalidation_bus().start()
     
-    # Veritabanı bağlantısını test et
-    try:
-        db = DatabaseService()
-        # Test sorgusu
-        questions = await db.get_questions()
-        logger.info(f"Veritabanı bağlantısı başarılı. {len(questions)} soru bulundu.")
-    except Exception as e:
-        logger.error(f"Veritabanı bağlantı hatası: {e}")
+    # İçerik aynasını başlat (diskteki son kopya yüklenir, arka planda yenilenir)
+    mirror = get_content_mirror()
+    mirror.start()
+    await mirror.refresh(DatabaseService())
+    if not mirror.synced:
+        logger.warning("İçerik aynası boş ve Supabase'e ulaşılamadı; içerik okunamayabilir.")
+    
+    # Komutlar, cache ısıtma (sorular, mesajlar, bot ayarları, onaylı dekont sayısı) ve
+    # Storage kontrolü eşzamanlı çalışır; başlangıç süresi en yavaş adım kadar olur
+    storage = StorageService()
+    commands_result, warm_up, storage_result = await asyncio.gather(
+        set_commands(bot),
+        warm_up_cache(bot),
+        storage.ensure_bucket_exists(),
+        return_exceptions=True
+    )
+    
+    if isinstance(commands_result, Exception):
+        logger.warning(f"Komutlar ayarlanamadı: {commands_result}")
+    
+    # Veritabanı bağlantısı: soruların yüklenmesi test sorgusu yerine geçer
+    questions = warm_up if isinstance(warm_up, Exception) else warm_up['questions']
+    if isinstance(questions, Exception):
+        logger.error(f"Veritabanı bağlantı hatası: {questions}")
         return False
+    logger.info(f"Veritabanı bağlantısı başarılı. {len(questions)} soru bulundu.")
+    failed = [name for name, result in warm_up.items() if isinstance(result, Exception)]
+    if failed:
+        logger.warning("Cache ısıtılamadı: %s", ", ".join(failed))
+    else:
+        logger.info("Cache ısıtıldı: %s", ", ".join(warm_up))
     
-    # Storage servisini başlat ve bucket'ı kontrol et
-    try:
-        storage = StorageService()
-        await storage.ensure_bucket_exists()
-        logger.info("Supabase Storage bağlantısı başarılı.")
-    except Exception as e:
-        logger.error(f"Storage bağlantı hatası: {e}")
+    # Storage bucket kontrolü
+    if isinstance(storage_result, Exception):
+        logger.error(f"Storage bağlantı hatası: {storage_result}")
         return False
+    logger.info("Supabase Storage bağlantısı başarılı.")
+    
+    # Cevap yazma kuyruğunu başlat (önceki kesintiden kalan cevaplar da gönderilir)
+    get_answer_queue().start()
+    
+    # Periyodik işler: önce cache/throttle/rate limit sweep'leri, sonra metrik logu
+    # (main() içinde get_scheduler().start() ile başlar)
+    scheduler = get_scheduler()
+    register_maintenance_jobs(scheduler)
+    scheduler.register('rate_limit_sweep', get_rate_limiter().compact, Config.RATE_LIMIT_SWEEP_INTERVAL)
+    scheduler.register('send_scheduler_sweep', get_send_scheduler().sweep, Config.SEND_SCHEDULER_SWEEP_INTERVAL)
+    # Admin panelinden gelen davetler bu bot'un gönderim zamanlayıcısından geçer
+    scheduler.register('outbox_poll', functools.partial(get_outbox().process, bot), Config.OUTBOX_POLL_INTERVAL)
+    scheduler.register('metrics_log', functools.partial(log_metrics, 'bot'), Config.METRICS_LOG_INTERVAL)
     
     logger.info("Bot başarıyla başlatıldı!")
     return True
@@ -100,11 +142,27 @@ async def on_startup(bot: Bot):
 async def on_shutdown(bot: Bot):
     """Bot kapatıldığında çalışır"""
     logger.info("Bot kapatılıyor...")
+    
+    await get_scheduler().stop()
+    await get_content_mirror().stop()
+    await get_invalidation_bus().stop()
+    
+    # Bekleyen cevapları yaz (yazılamazsa diske aktarılır)
+    try:
+        await get_answer_queue().drain()
+    except Exception as e:
+        logger.error(f"Cevap kuyruğu boşaltma hatası: {e}")
 
 async def main():
     """Ana fonksiyon"""
+    # Cache ve throttle sadece bu event loop'tan kullanılır: lock gerekmez
+    # (global servisler ilk kullanımda bu modla oluşturulur)
+    set_lock_mode(Config.BOT_LOCK_MODE)
+    
     # Bot oluştur
     bot = Bot(token=Config.BOT_TOKEN)
+    # Tüm gönderimler Telegram limitlerine göre sıralanır (RetryAfter otomatik beklenir)
+    bot.session.middleware(get_send_scheduler())
     
     # Storage seçimi (Memory kullanıyoruz)
     storage = MemoryStorage()
@@ -113,6 +171,11 @@ async def main():
     # Dispatcher oluştur
     dp = Dispatcher(storage=storage)
     
+    # Rate limit: handler'lardan ve filtrelerden önce çalışır
+    rate_limiter = get_rate_limiter()
+    dp.message.outer_middleware(rate_limiter)
+    dp.callback_query.outer_middleware(rate_limiter)
+    
     # Router'ları ekle
     dp.include_router(user_router)
     dp.include_router(admin_router)
@@ -126,6 +189,9 @@ async def main():
             logger.error("Bot başlatılamadı!")
             return
         
+        # Periyodik işleri başlat
+        get_scheduler().start()
+        
         # Polling başlat
         await dp.start_polling(bot)
     except KeyboardInterrupt:
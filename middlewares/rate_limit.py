@@ -0,0 +1,279 @@
+"""
+Rate Limit Middleware
+Kullanıcı isteklerini handler'lara ulaşmadan önce sınırlar (aiogram outer middleware).
+Optimizasyonlar:
+- Sliding window counter: key başına (pencere başı, önceki sayaç, güncel sayaç);
+  tahmini istek sayısı = önceki * (pencerenin kalan oranı) + güncel
+- Durum array'lerde durur; dict sadece user_id -> slot index'i tutar. Slot sayısı
+  RATE_LIMIT_MAX_KEYS'i hiçbir zaman aşmaz, tablo dolunca en eski kullanılan
+  key'ler düşer (LRU)
+- Her pencere süresinde bir, iki pencere boyunca istek gelmeyen (sayacı sıfırlanmış)
+  key'ler sıkıştırılır; bellek çalışma süresinden bağımsız olarak sabittir
+- Limitler kural bazındadır (RATE_LIMITS; ör. start=5/60): komutlar kendi adıyla,
+  diğer mesajlar 'message' / 'media', callback'ler 'callback' kuralıyla sayılır
+- Limit aşılınca kullanıcı pencere başına bir kez uyarılır, sonraki istekler sessizce düşer
+- Sadece özel sohbetler sınırlanır (grup moderasyonu etkilenmez); adminler muaftır
+- CACHE_BACKEND=redis ise sayaçlar paylaşılan backend'dedir (window_hit, redis-io thread'inde
+  beklenir); limitler tüm bot replikalarında ortaktır. Redis'e ulaşılamazsa yerel sayaca düşülür
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from array import array
+from itertools import islice
+import logging
+import time
+
+from aiogram import BaseMiddleware
+from aiogram.enums import ChatType
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from config import Config
+from services.cache_backends import CacheBackend, get_shared_backend
+
+logger = logging.getLogger(__name__)
+
+# hit() sonuçları
+ALLOWED = 0
+LIMITED = 1      # Limit aşıldı, bu pencerede ilk red (kullanıcı uyarılır)
+SUPPRESSED = 2   # Limit aşıldı, uyarı zaten gönderildi
+
+RATE_LIMIT_MESSAGE = "⏳ Çok fazla istek gönderdiniz. Lütfen birkaç dakika bekleyip tekrar deneyin."
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[int, float]]:
+    """
+    'start=5/60,media=5/60' biçimindeki kuralları parse eder
+
+    Returns:
+        kural -> (limit, window saniye); hatalı girdiler loglanıp atlanır
+    """
+    rules: Dict[str, Tuple[int, float]] = {}
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            name, value = item.split('=', 1)
+            limit, window = value.split('/', 1)
+            limit, window = int(limit), float(window)
+            if limit < 1 or window <= 0:
+                raise ValueError(item)
+            rules[name.strip().lstrip('/')] = (limit, window)
+        except ValueError:
+            logger.warning("Geçersiz rate limit kuralı atlandı: %s", item)
+    return rules
+
+class SlidingWindowCounter:
+    """
+    Boyutu sınırlı sliding window counter tablosu
+    Key başına 8 (pencere başı) + 4 + 4 (sayaçlar) + 1 (uyarı) byte array'lerde,
+    artı dict'te index kaydı. Thread-safe değildir (bot event loop'unda kullanılır).
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int):
+        self.limit = limit
+        self.window = float(window)
+        self.max_keys = max(1, max_keys)
+        self._index: Dict[Any, int] = {}
+        # Array'ler max_keys'e kadar büyür; silinen key'lerin slot'ları yeniden kullanılır
+        self._start = array('d')
+        self._prev = array('I')
+        self._cur = array('I')
+        self._warned = array('B')
+        self._free: List[int] = []
+        self._next_compact = 0.0
+        self.evictions = 0
+        self.compacted = 0
+
+    def hit(self, key: Any, now: Optional[float] = None) -> int:
+        """İsteği sayar; ALLOWED, LIMITED veya SUPPRESSED döndürür"""
+        if now is None:
+            now = time.monotonic()
+        if now >= self._next_compact:
+            self.compact(now)
+
+        index = self._index
+        slot = index.pop(key, None)
+        if slot is None:
+            slot = self._allocate(now)
+        index[key] = slot
+
+        window = self.window
+        elapsed = now - self._start[slot]
+        if elapsed >= window:
+            # Pencereyi kaydır: bir pencere geçtiyse güncel sayaç öncekine döner, daha fazlaysa ikisi de sıfırlanır
+            periods = int(elapsed // window)
+            self._prev[slot] = self._cur[slot] if periods == 1 else 0
+            self._cur[slot] = 0
+            self._warned[slot] = 0
+            self._start[slot] += periods * window
+            elapsed -= periods * window
+
+        estimate = self._prev[slot] * (1.0 - elapsed / window) + self._cur[slot]
+        if estimate >= self.limit:
+            if self._warned[slot]:
+                return SUPPRESSED
+            self._warned[slot] = 1
+            return LIMITED
+        self._cur[slot] += 1
+        return ALLOWED
+
+    def _allocate(self, now: float) -> int:
+        """Yeni key için boş slot (tablo doluysa önce LRU key'leri düşer)"""
+        if len(self._index) >= self.max_keys:
+            self._evict()
+        if self._free:
+            slot = self._free.pop()
+            self._start[slot] = now
+            self._prev[slot] = 0
+            self._cur[slot] = 0
+            self._warned[slot] = 0
+            return slot
+        self._start.append(now)
+        self._prev.append(0)
+        self._cur.append(0)
+        self._warned.append(0)
+        return len(self._start) - 1
+
+    def _evict(self) -> None:
+        """Tablo dolu: en eski kullanılan key'lerin 1/8'ini düşürür"""
+        keys = list(islice(self._index, max(1, self.max_keys // 8)))
+        for key in keys:
+            self._free.append(self._index.pop(key))
+        self.evictions += len(keys)
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """İki pencere boyunca istek gelmemiş (tahmini sayacı 0 olan) key'leri siler"""
+        now = time.monotonic() if now is None else now
+        self._next_compact = now + self.window
+        horizon = now - 2 * self.window
+        starts = self._start
+        idle = [key for key, slot in self._index.items() if starts[slot] <= horizon]
+        for key in idle:
+            self._free.append(self._index.pop(key))
+        self.compacted += len(idle)
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'limit': self.limit,
+            'window': self.window,
+            'keys': len(self._index),
+            'max_keys': self.max_keys,
+            'evictions': self.evictions,
+            'compacted': self.compacted,
+        }
+
+class RateLimitMiddleware(BaseMiddleware):
+    """Message ve callback_query için outer middleware; limit aşılırsa handler çalışmaz"""
+
+    def __init__(self, rules: Optional[Dict[str, Tuple[int, float]]] = None,
+                 max_keys: Optional[int] = None, backend: Optional[CacheBackend] = None):
+        self.rules = rules if rules is not None else parse_rate_limits(Config.RATE_LIMITS)
+        self.max_keys = max_keys or Config.RATE_LIMIT_MAX_KEYS
+        # Paylaşılan backend (Redis); None = sadece process-local sayaçlar
+        self.backend = backend if backend is not None else get_shared_backend()
+        # Kural -> sayaç tablosu (ilk kullanımda oluşturulur)
+        self._counters: Dict[str, SlidingWindowCounter] = {}
+        self._exempt = frozenset(Config.ADMIN_IDS)
+        self.allowed = 0
+        self.limited = 0
+        # Redis'e ulaşılamadığı için yerel sayaçla verilen kararlar
+        self.fallbacks = 0
+
+    def rule_for(self, event: TelegramObject) -> Optional[str]:
+        """
+        Olayın tabi olduğu kural adı (özel sohbet dışındaysa None)
+        Kendi kuralı olmayan komutlar 'message' kuralıyla sayılır.
+        """
+        if isinstance(event, Message):
+            if event.chat.type != ChatType.PRIVATE:
+                return None
+            if event.text and event.text.startswith('/'):
+                parts = event.text[1:].split(maxsplit=1)
+                command = parts[0].split('@', 1)[0].lower() if parts else ''
+                return command if command in self.rules else 'message'
+            if event.document or event.photo:
+                return 'media'
+            return 'message'
+        if isinstance(event, CallbackQuery):
+            message = event.message
+            if message is not None and message.chat.type != ChatType.PRIVATE:
+                return None
+            return 'callback'
+        return None
+
+    def _counter(self, rule: str) -> Optional[SlidingWindowCounter]:
+        counter = self._counters.get(rule)
+        if counter is None:
+            spec = self.rules.get(rule)
+            if spec is None:
+                return None
+            counter = self._counters[rule] = SlidingWindowCounter(spec[0], spec[1], self.max_keys)
+        return counter
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        user = data.get('event_from_user')
+        rule = self.rule_for(event) if user is not None and user.id not in self._exempt else None
+        counter = self._counter(rule) if rule is not None else None
+        if counter is None:
+            return await handler(event, data)
+
+        result = await self._hit(rule, counter, user.id)
+        if result == ALLOWED:
+            self.allowed += 1
+            return await handler(event, data)
+
+        self.limited += 1
+        try:
+            if isinstance(event, CallbackQuery):
+                # Callback her durumda cevaplanmalı (aksi halde butonda yükleniyor göstergesi kalır)
+                await event.answer(RATE_LIMIT_MESSAGE if result == LIMITED else None)
+            elif result == LIMITED:
+                await event.answer(RATE_LIMIT_MESSAGE)
+        except Exception as e:
+            logger.warning("Rate limit bildirimi gönderilemedi: %s", e)
+        return None
+
+    async def _hit(self, rule: str, counter: SlidingWindowCounter, user_id: int) -> int:
+        """İsteği paylaşılan backend'de (varsa) veya yerel sayaçta sayar"""
+        backend = self.backend
+        if backend is None:
+            return counter.hit(user_id)
+        allowed = await backend.offload(backend.window_hit, (f'rate:{rule}', user_id), counter.window, counter.limit)
+        if allowed is None:
+            self.fallbacks += 1
+            return counter.hit(user_id)
+        if allowed:
+            return ALLOWED
+        # Uyarı pencere başına bir kez: ilk red uyarı key'ini alır
+        first = await backend.offload(backend.acquire_cooldown, (f'rate:warned:{rule}', user_id), counter.window)
+        return SUPPRESSED if first is False else LIMITED
+
+    def compact(self) -> int:
+        """Tüm tablolarda boşta kalan key'leri siler"""
+        now = time.monotonic()
+        return sum(counter.compact(now) for counter in self._counters.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'redis' if self.backend is not None else 'memory',
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'fallbacks': self.fallbacks,
+            'rules': {rule: counter.stats() for rule, counter in self._counters.items()},
+        }
+
+
+# Global middleware instance
+_rate_limit_middleware: Optional[RateLimitMiddleware] = None
+
+def get_rate_limiter() -> RateLimitMiddleware:
+    """Global rate limit middleware'ini döndürür (ilk çağrıda oluşturulur)"""
+    global _rate_limit_middleware
+    if _rate_limit_middleware is None:
+        _rate_limit_middleware = RateLimitMiddleware()
+    return _rate_limit_middleware
@@ -0,0 +1,249 @@
+"""
+Write-Behind Cevap Kuyruğu
+Kullanıcı cevaplarını bellekte toplar ve çok satırlı bulk INSERT ile yazar.
+Optimizasyonlar:
+- handle_answer DB round-trip'ini beklemez (enqueue anında döner)
+- Boyut (ANSWER_BATCH_SIZE) veya süre (ANSWER_FLUSH_INTERVAL) eşiğinde flush
+- Supabase erişilemezse cevaplar sınırlı bir disk dosyasına (JSONL) yazılır,
+  bağlantı geri geldiğinde tekrar gönderilir; dosya sadece atomik olarak değiştirilir
+  (geçici dosya + os.replace) veya tüm satırlar yazıldıktan sonra silinir
+- Veri hatasıyla (ör. silinmiş soruya FK) reddedilen batch ikiye bölünerek tekrar
+  yazılır; sadece hatalı satırlar loglanıp atlanır, arkasındaki cevaplar beklemez
+- Kapanışta (main.on_shutdown) kuyruk boşaltılır
+"""
+
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import json
+import logging
+import os
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class AnswerWriteQueue:
+    """answers tablosu için write-behind batch kuyruğu"""
+
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 spill_path: Optional[str] = None, spill_max_bytes: Optional[int] = None):
+        self.batch_size = batch_size or Config.ANSWER_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.ANSWER_FLUSH_INTERVAL
+        self.spill_path = spill_path or Config.ANSWER_SPILL_PATH
+        self.spill_max_bytes = spill_max_bytes or Config.ANSWER_SPILL_MAX_BYTES
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        # İstatistikler
+        self.enqueued = 0
+        self.flushed_rows = 0
+        self.flush_batches = 0
+        self.spilled_rows = 0
+        self.dropped_rows = 0
+        self.rejected_rows = 0
+
+    # Yaşam döngüsü
+    def start(self) -> None:
+        """Arka plan flush task'ını başlatır (idempotent)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def drain(self) -> None:
+        """Flush task'ını durdurur ve kalan tüm cevapları yazar (kapanışta çağrılır)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info("Cevap kuyruğu boşaltıldı (yazılan: %d, diske aktarılan: %d)", self.flushed_rows, self.spilled_rows)
+
+    # Kuyruk işlemleri
+    def enqueue(self, user_id: int, question_id: int, answer_text: str) -> None:
+        """Cevabı kuyruğa ekler (DB'yi beklemez)"""
+        self._buffer.append({
+            'user_id': user_id,
+            'question_id': question_id,
+            'answer_text': answer_text,
+            'created_at': datetime.now().isoformat()
+        })
+        self.enqueued += 1
+        if self._task is None or self._task.done():
+            self.start()
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        """Bellekte bekleyen cevap sayısı"""
+        return len(self._buffer)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Kuyruk sayaçları"""
+        return {
+            'pending': len(self._buffer),
+            'enqueued': self.enqueued,
+            'flushed_rows': self.flushed_rows,
+            'flush_batches': self.flush_batches,
+            'spilled_rows': self.spilled_rows,
+            'dropped_rows': self.dropped_rows,
+            'rejected_rows': self.rejected_rows,
+        }
+
+    async def _run(self) -> None:
+        """Boyut veya süre eşiğinde flush yapan döngü"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Cevap kuyruğu flush hatası: %s", e)
+
+    async def flush(self) -> None:
+        """Bekleyen cevapları (ve varsa diske aktarılmışları) bulk INSERT ile yazar"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            # Önce diskte bekleyenleri gönder (sıra korunur). Dosya ancak tüm satırlar
+            # yazıldıktan sonra silinir; kalanlar geçici dosyadan os.replace ile yerine
+            # konur, arada çökme/iptal olursa diskteki cevaplar kaybolmaz (en fazla tekrar gönderilir)
+            if os.path.exists(self.spill_path):
+                spilled = await asyncio.to_thread(self._read_spill)
+                remaining = await self._insert_batches(spilled)
+                if remaining:
+                    # Supabase hâlâ erişilemez: kalanları ve yeni cevapları diske geri yaz
+                    rows, self._buffer = remaining + self._buffer, []
+                    await asyncio.to_thread(self._spill, rows, True)
+                    return
+                await asyncio.to_thread(self._clear_spill)
+                if spilled:
+                    logger.info("Diskteki %d cevap Supabase'e yazıldı.", len(spilled))
+
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            remaining = await self._insert_batches(rows)
+            if remaining:
+                await asyncio.to_thread(self._spill, remaining)
+
+    async def _insert_batches(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Satırları batch_size'lık parçalar halinde yazar, yazılamayanları döndürür"""
+        from services.database import DatabaseService
+        try:
+            db = DatabaseService()
+        except Exception as e:
+            logger.error("Cevap kuyruğu DB bağlantı hatası: %s", e)
+            return rows
+        for i in range(0, len(rows), self.batch_size):
+            remaining = await self._insert_isolating(db, rows[i:i + self.batch_size])
+            if remaining:
+                return remaining + rows[i + self.batch_size:]
+        return []
+
+    async def _insert_isolating(self, db, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Batch'i yazar; veri hatasında ikiye bölerek hatalı satırları ayıklar
+
+        Returns:
+            Bağlantı hatası yüzünden yazılamayan (tekrar denenecek) satırlar
+        """
+        try:
+            if not await db.save_answers_bulk(rows):
+                return rows
+        except Exception as e:
+            if len(rows) == 1:
+                row = rows[0]
+                self.rejected_rows += 1
+                logger.error("Cevap kalıcı olarak reddedildi, atlanıyor (user_id=%s, question_id=%s): %s",
+                             row.get('user_id'), row.get('question_id'), e)
+                return []
+            middle = len(rows) // 2
+            remaining = await self._insert_isolating(db, rows[:middle])
+            if remaining:
+                return remaining + rows[middle:]
+            return await self._insert_isolating(db, rows[middle:])
+        self.flushed_rows += len(rows)
+        self.flush_batches += 1
+        return []
+
+    # Disk spill (sınırlı JSONL dosyası)
+    def _spill(self, rows: List[Dict[str, Any]], replace: bool = False) -> None:
+        """
+        Yazılamayan cevapları diske ekler (spill_max_bytes sınırına kadar)
+        replace: dosyanın içeriği rows ile atomik olarak değiştirilir (geçici dosya + os.replace)
+        """
+        try:
+            if replace:
+                size = 0
+            else:
+                size = os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            written = 0
+            path = f'{self.spill_path}.tmp' if replace else self.spill_path
+            with open(path, 'w' if replace else 'a', encoding='utf-8') as f:
+                for row in rows:
+                    line = json.dumps(row, ensure_ascii=False) + '\n'
+                    line_size = len(line.encode('utf-8'))
+                    if size + line_size > self.spill_max_bytes:
+                        break
+                    f.write(line)
+                    size += line_size
+                    written += 1
+            if replace:
+                os.replace(path, self.spill_path)
+            self.spilled_rows += written
+            if written < len(rows):
+                self.dropped_rows += len(rows) - written
+                logger.error("Cevap spill dosyası dolu, %d cevap kaydedilemedi.", len(rows) - written)
+            else:
+                logger.warning("Supabase'e yazılamayan %d cevap diske aktarıldı.", written)
+        except Exception as e:
+            self.dropped_rows += len(rows)
+            logger.error("Cevap spill yazma hatası: %s", e)
+
+    def _read_spill(self) -> List[Dict[str, Any]]:
+        """Diskteki cevapları okur"""
+        rows = []
+        try:
+            with open(self.spill_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            rows.append(json.loads(line))
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            pass
+        return rows
+
+    def _clear_spill(self) -> None:
+        """Spill dosyasını siler"""
+        try:
+            os.remove(self.spill_path)
+        except FileNotFoundError:
+            pass
+
+
+# Global cevap kuyruğu instance
+_answer_queue = AnswerWriteQueue()
+
+def get_answer_queue() -> AnswerWriteQueue:
+    """Global cevap kuyruğu instance'ını döndürür"""
+    return _answer_queue
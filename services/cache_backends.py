@@ -0,0 +1,837 @@
+"""
+Cache Backend'leri
+CacheService ve ThrottleService'in veriyi tuttuğu katman.
+- MemoryBackend (varsayılan): process-local LRU + süre dolumu heap'i + tag index'i,
+  throttle/rate limit için GCRA tablosu (key başına tek float, LRU ile sınırlı)
+- RedisBackend (CACHE_BACKEND=redis): Redis protokolü üzerinden tüm bot replikaları
+  ve gunicorn worker'ları arasında paylaşılan cache ve limitler. Çok adımlı
+  işlemler (set + tag'ler, throttle kontrolü) tek pipeline round-trip'inde gider.
+  CacheService Redis modunda önüne küçük bir MemoryBackend'i near cache (L1) olarak koyar.
+  Bot'ta Redis çağrıları event loop'ta değil redis-io thread'inde yapılır (offload/submit);
+  devre kesici (CircuitBreaker) açıkken cache ve limitler process-local memory'ye düşer.
+
+redis paketi opsiyoneldir (sadece CACHE_BACKEND=redis ise gerekir); testlerde
+fakeredis istemcisi RedisBackend(client=...) ile verilebilir.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import abc
+import asyncio
+import heapq
+import json
+import logging
+import threading
+import time
+import uuid
+
+from config import Config
+
+try:
+    import redis
+except ImportError:  # opsiyonel bağımlılık
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Limit key'i: (scope, ident), ör. ('throttle:op:save_answer', user_id)
+LimitKey = Tuple[str, Any]
+
+class CacheEntry:
+    """Cache entry sınıfı"""
+    __slots__ = ('data', 'ttl', 'expires_at', 'soft_expires_at', 'delta', 'tags')
+
+    def __init__(self, data: Any, ttl: float = 300, now: Optional[float] = None, delta: float = 0.0,
+                 tags: Tuple[str, ...] = (), soft_ttl: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self.data = data
+        self.ttl = ttl
+        # Hard deadline: bu noktadan sonra entry yok sayılır
+        self.expires_at = now + ttl
+        # Soft deadline: bu noktadan sonra değer hâlâ döner ama arka planda yenilenir
+        self.soft_expires_at = now + soft_ttl if soft_ttl is not None and soft_ttl < ttl else self.expires_at
+        # Değeri yüklemenin süresi (saniye); erken yenileme olasılığını belirler
+        self.delta = delta
+        self.tags = tags
+
+    def is_soft_expired(self, now: Optional[float] = None) -> bool:
+        """Soft TTL dolmuş mu (değer stale ama kullanılabilir)?"""
+        return (time.monotonic() if now is None else now) >= self.soft_expires_at
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Cache entry'nin süresi dolmuş mu?"""
+        return (time.monotonic() if now is None else now) >= self.expires_at
+
+    def is_valid(self, now: Optional[float] = None) -> bool:
+        """Cache entry geçerli mi?"""
+        return not self.is_expired(now)
+
+
+class CacheBackend(abc.ABC):
+    """
+    Backend arayüzü
+
+    Cache: get_entry / set_entry / delete / invalidate_tag / clear
+    Generation'lar: get_generation / incr_generation
+    Limitler: acquire_cooldown / set_cooldown / window_hit / window_add /
+              throttle_check / cleanup_limits; limit key'leri (scope, ident) çiftidir,
+              ör. ('throttle:w', user_id)
+    cleanup_limits / limit_stats opsiyoneldir; diğerleri her backend'de zorunludur
+    """
+
+    # Veri process'ler arasında paylaşılıyor mu?
+    shared = False
+
+    @abc.abstractmethod
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_entry(self, key: str, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def invalidate_tag(self, tag: str) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_generation(self, name: str) -> Optional[int]:
+        """Generation sayacını döndürür (okunamazsa None)"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def incr_generation(self, name: str) -> Optional[int]:
+        """Generation sayacını artırır, yeni değeri döndürür (yazılamazsa None)"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def acquire_cooldown(self, key: LimitKey, seconds: float) -> bool:
+        """Key için cooldown yoksa başlatır ve True döner; cooldown sürüyorsa False"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_cooldown(self, key: LimitKey, seconds: float) -> None:
+        """Cooldown'u koşulsuz (yeniden) başlatır"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def window_hit(self, key: LimitKey, window: float, limit: int) -> Optional[bool]:
+        """
+        window saniyede limit isteğe kadar izin verir; izin verilen istek sayılır ve True döner
+        (paylaşılan backend'e ulaşılamazsa None)
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def window_add(self, key: LimitKey, window: float, limit: int = 1) -> None:
+        """İsteği limit kontrolü yapmadan sayar"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def throttle_check(self, cooldown_key: Optional[LimitKey], cooldown_seconds: float,
+                       window_key: LimitKey, window: float, limit: int) -> Optional[bool]:
+        """
+        ThrottleService.should_throttle'ın tek çağrılık karşılığı
+
+        Returns:
+            True: izin verildi (cooldown başlatıldı ve window'a kayıt eklendi);
+            None: paylaşılan backend'e ulaşılamadı
+        """
+        raise NotImplementedError
+
+    def cleanup_limits(self) -> None:
+        """Süresi dolmuş limit kayıtlarını temizler"""
+
+    def limit_stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class GCRATable:
+    """
+    GCRA (Generic Cell Rate Algorithm) durum tablosu
+    Key başına tek float: TAT (theoretical arrival time, monotonic). "window saniyede
+    limit istek" kuralı için emission interval T = window / limit ve burst toleransı
+    (limit - 1) * T'dir; istek TAT - now <= tolerans ise kabul edilir ve TAT T kadar ilerler.
+    limit = 1 iken bu, window süresince tek isteğe izin veren cooldown'un aynısıdır.
+
+    TAT <= now olan key boş key ile aynı davranır; bu yüzden süresi geçmiş key'ler
+    her an silinebilir. TAT'ler array('d') içinde (8 byte) durur, dict sadece
+    key -> slot index'i tutar. Sıra LRU sırasıdır; tablo dolunca en eski kullanılan
+    key'ler toplu olarak düşürülür, bellek max_keys ile sınırlıdır.
+    Key'ler scope içindeki ident'lerdir (ör. user_id). Thread-safe değildir.
+    """
+    __slots__ = ('max_keys', '_index', '_tat', '_free', 'evictions')
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max(1, max_keys)
+        self._index: Dict[Any, int] = {}
+        self._tat = array('d')
+        self._free: List[int] = []
+        self.evictions = 0
+
+    def _slot(self, key: Any, now: float) -> int:
+        """Key'in slot'unu döndürür, LRU sırasında sona taşır (yoksa oluşturur, TAT=0)"""
+        index = self._index
+        slot = index.pop(key, None)
+        if slot is None:
+            if len(index) >= self.max_keys:
+                self._evict(now)
+            if self._free:
+                slot = self._free.pop()
+                self._tat[slot] = 0.0
+            else:
+                slot = len(self._tat)
+                self._tat.append(0.0)
+        index[key] = slot
+        return slot
+
+    def hit(self, key: Any, interval: float, limit: int = 1, now: Optional[float] = None) -> bool:
+        """GCRA kontrolü: kabul edilirse TAT'i ilerletir ve True döner"""
+        if now is None:
+            now = time.monotonic()
+        # Sıcak yol: var olan key'i LRU sonuna taşı (_slot çağrısı olmadan)
+        index = self._index
+        slot = index.pop(key, None)
+        if slot is None:
+            slot = self._slot(key, now)
+        else:
+            index[key] = slot
+        tats = self._tat
+        tat = tats[slot]
+        if tat < now:
+            tat = now
+        elif tat - now > interval * (limit - 1):
+            return False
+        tats[slot] = tat + interval
+        return True
+
+    def add(self, key: Any, interval: float, now: Optional[float] = None) -> None:
+        """
+        İsteği kontrol etmeden kaydeder: TAT en az now + interval olur
+        (hit ile kabul edilmiş isteğin aynı anda tekrar kaydı ikinci kez sayılmaz)
+        """
+        now = time.monotonic() if now is None else now
+        slot = self._slot(key, now)
+        self._tat[slot] = max(self._tat[slot], now + interval)
+
+    def reset(self, key: Any, interval: float, now: Optional[float] = None) -> None:
+        """TAT'i now + interval yapar (cooldown'u yeniden başlatır)"""
+        now = time.monotonic() if now is None else now
+        self._tat[self._slot(key, now)] = now + interval
+
+    def _drop(self, key: Any) -> None:
+        self._free.append(self._index.pop(key))
+
+    def _evict(self, now: float) -> None:
+        """Tablo dolu: en eski kullanılan key'lerin 1/8'ini düşürür (süresi geçmişlerin kaybı etkisizdir)"""
+        batch = max(1, self.max_keys // 8)
+        for key in list(islice(self._index, batch)):
+            if self._tat[self._index[key]] > now:
+                self.evictions += 1
+            self._drop(key)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """TAT'i geçmiş (boş key'den farksız) tüm key'leri siler, silinen sayısını döndürür"""
+        now = time.monotonic() if now is None else now
+        tats = self._tat
+        expired = [key for key, slot in self._index.items() if tats[slot] <= now]
+        for key in expired:
+            self._drop(key)
+        # Tablo çok boşaldıysa array'i sıkıştır
+        if len(tats) > 1024 and len(self._index) < len(tats) // 4:
+            self._compact()
+        return len(expired)
+
+    def _compact(self) -> None:
+        tats = array('d', (self._tat[slot] for slot in self._index.values()))
+        self._index = {key: i for i, key in enumerate(self._index)}
+        self._tat = tats
+        self._free = []
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'keys': len(self._index),
+            'max_keys': self.max_keys,
+            'slots': len(self._tat),
+            'evictions': self.evictions,
+        }
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Process-local backend
+    Thread-safe değildir; sahibi (CacheService/ThrottleService) kendi lock'u altında çağırır.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None,
+                 on_evict: Optional[Callable[[str], None]] = None,
+                 on_expire: Optional[Callable[[str], None]] = None,
+                 max_limit_keys: Optional[int] = None):
+        self.max_entries = max(1, max_entries or Config.CACHE_MAX_ENTRIES)
+        self.on_evict = on_evict
+        self.on_expire = on_expire
+        # key -> CacheEntry; sıra = LRU sırası (en eski kullanılan başta)
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # (expires_at, key) min-heap; üzerine yazılan/silinen key'lerin eski kayıtları
+        # pop sırasında atlanır, heap çok şişerse yeniden kurulur
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # tag -> key'ler (entry silindiğinde/düştüğünde temizlenir)
+        self._tags: Dict[str, Set[str]] = {}
+        # Generation sayaçları (bkz. CacheService.versioned_key)
+        self._generations: Dict[str, int] = {}
+        # Limitler: scope başına bir GCRA tablosu, ident (ör. user_id) ile indekslenir
+        self._max_limit_keys = max_limit_keys
+        self._limits: Dict[str, GCRATable] = {}
+
+    # Cache
+    def get_entry(self, key: str, now: Optional[float] = None) -> Optional[CacheEntry]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry.is_expired(now):
+            # Süresi dolmuş, sil (heap kaydı pop sırasında atlanır)
+            self._remove(key)
+            if self.on_expire:
+                self.on_expire(key)
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def set_entry(self, key: str, entry: CacheEntry, now: Optional[float] = None) -> None:
+        self._remove(key)
+        self._cache[key] = entry
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        heapq.heappush(self._expiry_heap, (entry.expires_at, key))
+
+        self.expire(time.monotonic() if now is None else now)
+        while len(self._cache) > self.max_entries:
+            evicted = next(iter(self._cache))
+            self._remove(evicted)
+            if self.on_evict:
+                self.on_evict(evicted)
+        if len(self._expiry_heap) > 2 * len(self._cache) + 64:
+            self._rebuild_heap()
+
+    def delete(self, key: str) -> bool:
+        return self._remove(key) is not None
+
+    def invalidate_tag(self, tag: str) -> int:
+        keys = list(self._tags.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._expiry_heap.clear()
+        self._tags.clear()
+
+    def expire(self, now: float) -> int:
+        """Heap'in başındaki süresi dolmuş entry'leri siler"""
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._cache.get(key)
+            # Key üzerine yazıldıysa heap kaydı eskidir; güncel entry'ye dokunma
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                if self.on_expire:
+                    self.on_expire(key)
+                removed += 1
+        return removed
+
+    def keys(self) -> Iterator[str]:
+        return iter(self._cache)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        """Entry'yi ve tag kayıtlarını siler"""
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            for tag in entry.tags:
+                keys = self._tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+        return entry
+
+    def _rebuild_heap(self) -> None:
+        """Heap'i sadece canlı entry'lerden yeniden kurar (bellek sınırı için)"""
+        self._expiry_heap = [(entry.expires_at, key) for key, entry in self._cache.items()]
+        heapq.heapify(self._expiry_heap)
+
+    # Generation'lar
+    def get_generation(self, name: str) -> Optional[int]:
+        return self._generations.get(name, 0)
+
+    def incr_generation(self, name: str) -> Optional[int]:
+        self._generations[name] = self._generations.get(name, 0) + 1
+        return self._generations[name]
+
+    # Limitler (GCRA)
+    def _table(self, scope: str) -> GCRATable:
+        table = self._limits.get(scope)
+        if table is None:
+            table = self._limits[scope] = GCRATable(self._max_limit_keys or Config.THROTTLE_MAX_KEYS)
+        return table
+
+    def acquire_cooldown(self, key: LimitKey, seconds: float) -> bool:
+        return self._table(key[0]).hit(key[1], seconds)
+
+    def set_cooldown(self, key: LimitKey, seconds: float) -> None:
+        self._table(key[0]).reset(key[1], seconds)
+
+    def window_hit(self, key: LimitKey, window: float, limit: int) -> bool:
+        return self._table(key[0]).hit(key[1], window / limit, limit)
+
+    def window_add(self, key: LimitKey, window: float, limit: int = 1) -> None:
+        self._table(key[0]).add(key[1], window / limit)
+
+    def throttle_check(self, cooldown_key: Optional[LimitKey], cooldown_seconds: float,
+                       window_key: LimitKey, window: float, limit: int) -> bool:
+        now = time.monotonic()
+        if cooldown_key is not None and not self._table(cooldown_key[0]).hit(cooldown_key[1], cooldown_seconds, 1, now):
+            return False
+        return self._table(window_key[0]).hit(window_key[1], window / limit, limit, now)
+
+    def cleanup_limits(self) -> None:
+        now = time.monotonic()
+        for table in self._limits.values():
+            table.sweep(now)
+
+    def limit_stats(self) -> Dict[str, Any]:
+        tables = {scope: table.stats() for scope, table in self._limits.items()}
+        return {'keys': sum(t['keys'] for t in tables.values()), 'tables': tables}
+
+
+class CircuitBreaker:
+    """
+    Redis devre kesicisi
+    - closed: çağrılar Redis'e gider; art arda failure_threshold hata devreyi açar
+    - open: reset_timeout boyunca Redis'e gidilmez, çağıranlar yerel (memory) yola düşer
+    - half_open: süre dolunca tek bir deneme çağrısına izin verilir; başarılıysa
+      devre kapanır, değilse reset_timeout kadar tekrar açılır
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.failure_threshold = max(1, failure_threshold or Config.REDIS_BREAKER_FAILURES)
+        self.reset_timeout = Config.REDIS_BREAKER_RESET if reset_timeout is None else reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Çağrı denenebilir mi (deneme hakkını tüketmez; yönlendirme kararları için)"""
+        if self.state == self.CLOSED:
+            return True
+        return self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def allow(self) -> bool:
+        """Çağrı yapılabilir mi; open süresi dolduysa bu çağrı half_open denemesi olur"""
+        if self.state == self.CLOSED:
+            return True
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def success(self) -> None:
+        if self.state != self.CLOSED or self.failures:
+            with self._lock:
+                self.state = self.CLOSED
+                self.failures = 0
+
+    def failure(self) -> bool:
+        """Hatayı sayar; devre bu hatayla açıldıysa True döner"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trips += 1
+                return True
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {'state': self.state, 'failures': self.failures, 'trips': self.trips}
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis protokolü üzerinden paylaşılan backend
+    Redis hatalarında işlemler atlanır (cache miss) ve devre kesici açılınca kısa bir
+    süre Redis'e gidilmez; limit kontrolleri None döndürür, çağıran yerel (memory)
+    limitlere düşer. Bot Redis kesintisinde de çalışmaya devam eder.
+
+    Metotlar senkrondur (web thread'leri doğrudan çağırır). Event loop'tan offload()
+    (sonuç beklenen) ve submit() (yazma, sonuç beklenmez) ile tek worker'lı redis-io
+    thread'inde çalıştırılır: loop bloklanmaz ve bir process'in Redis çağrıları
+    gönderildiği sırayla uygulanır (ör. delete'ten sonraki okuma eski değeri görmez).
+    """
+
+    shared = True
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: Optional[str] = None,
+                 breaker: Optional[CircuitBreaker] = None, max_pending: Optional[int] = None):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("CACHE_BACKEND=redis için 'redis' paketi gerekli (pip install redis)")
+            client = redis.Redis.from_url(url or Config.REDIS_URL, socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                                          socket_connect_timeout=Config.REDIS_SOCKET_TIMEOUT)
+        self.client = client
+        self.prefix = prefix if prefix is not None else Config.REDIS_KEY_PREFIX
+        self.breaker = breaker or CircuitBreaker()
+        self.max_pending = max_pending or Config.REDIS_MAX_PENDING
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.errors = 0
+        self.skipped = 0
+
+    def _k(self, key: str) -> str:
+        return f'{self.prefix}{key}'
+
+    def _lk(self, key: LimitKey) -> str:
+        return f'{self.prefix}{key[0]}:{key[1]}'
+
+    @property
+    def available(self) -> bool:
+        """Devre kapalı (veya deneme zamanı gelmiş) mi"""
+        return self.breaker.available
+
+    def _available(self) -> bool:
+        return self.breaker.allow()
+
+    def _succeeded(self) -> None:
+        self.breaker.success()
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        if self.breaker.failure():
+            logger.warning("Redis %s hatası, devre açıldı; %ss boyunca yerel moda geçiliyor: %s",
+                           operation, self.breaker.reset_timeout, error)
+
+    # Event loop'tan çağrı (redis-io thread'i)
+    def _io(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._pending_lock:
+                if self._executor is None:
+                    # Tek worker: çağrılar FIFO sırayla uygulanır
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='redis-io')
+        return self._executor
+
+    def _reserve(self) -> bool:
+        """Kuyrukta yer ayırır; devre açıksa veya kuyruk doluysa False"""
+        if not self.breaker.available:
+            return False
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                self.skipped += 1
+                return False
+            self._pending += 1
+            return True
+
+    def _release(self, _future: Any = None) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+
+    async def offload(self, func: Callable[..., Any], *args: Any, fallback: Any = None) -> Any:
+        """
+        Senkron backend metodunu redis-io thread'inde çalıştırır ve sonucunu bekler
+
+        Devre açıksa veya kuyruk doluysa Redis'e gidilmeden fallback döner.
+        """
+        if not self._reserve():
+            return fallback
+        future = self._io().submit(func, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> bool:
+        """Sonucu beklenmeyen çağrıyı (yazma) kuyruğa ekler; atlandıysa False"""
+        if not self._reserve():
+            return False
+        self._io().submit(func, *args).add_done_callback(self._release)
+        return True
+
+    # Cache (değerler JSON; deadline'lar process'ler arası geçerli olsun diye wall-clock)
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        if not self._available():
+            return None
+        try:
+            raw = self.client.get(self._k(key))
+        except Exception as e:
+            self._failed('get', e)
+            return None
+        self._succeeded()
+        if raw is None:
+            return None
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            return None
+        wall, now = time.time(), time.monotonic()
+        remaining = record['e'] - wall
+        if remaining <= 0:
+            return None
+        entry = CacheEntry(record['v'], remaining, now, record.get('d', 0.0), tuple(record.get('t') or ()))
+        entry.ttl = record.get('ttl', remaining)
+        entry.soft_expires_at = now + (record['s'] - wall)
+        return entry
+
+    def set_entry(self, key: str, entry: CacheEntry) -> None:
+        if not self._available():
+            return
+        wall, now = time.time(), time.monotonic()
+        remaining = entry.expires_at - now
+        if remaining <= 0:
+            return
+        try:
+            payload = json.dumps({
+                'v': entry.data,
+                'e': wall + remaining,
+                's': wall + (entry.soft_expires_at - now),
+                'd': entry.delta,
+                't': list(entry.tags),
+                'ttl': entry.ttl,
+            }, ensure_ascii=False, default=str)
+        except (TypeError, ValueError) as e:
+            logger.warning("Cache değeri Redis'e yazılamadı (JSON değil): %s: %s", key, e)
+            return
+        ttl_ms = max(1, int(remaining * 1000))
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.set(self._k(key), payload, px=ttl_ms)
+            for tag in entry.tags:
+                tag_key = self._k(f'_tag:{tag}')
+                pipe.sadd(tag_key, key)
+                # Tag seti, içindeki en uzun ömürlü entry kadar yaşar
+                pipe.pexpire(tag_key, ttl_ms, nx=True)
+                pipe.pexpire(tag_key, ttl_ms, gt=True)
+            pipe.execute()
+            self._succeeded()
+        except Exception as e:
+            self._failed('set', e)
+
+    def delete(self, key: str) -> bool:
+        if not self._available():
+            return False
+        try:
+            deleted = bool(self.client.delete(self._k(key)))
+            self._succeeded()
+            return deleted
+        except Exception as e:
+            self._failed('delete', e)
+            return False
+
+    def invalidate_tag(self, tag: str) -> int:
+        if not self._available():
+            return 0
+        tag_key = self._k(f'_tag:{tag}')
+        try:
+            keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.smembers(tag_key)]
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.delete(self._k(key))
+            pipe.delete(tag_key)
+            pipe.execute()
+            self._succeeded()
+            return len(keys)
+        except Exception as e:
+            self._failed('invalidate_tag', e)
+            return 0
+
+    def clear(self) -> None:
+        """Sadece bu prefix'e ait key'leri siler"""
+        if not self._available():
+            return
+        try:
+            batch = []
+            for key in self.client.scan_iter(match=f'{self.prefix}*', count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    self.client.delete(*batch)
+                    batch = []
+            if batch:
+                self.client.delete(*batch)
+            self._succeeded()
+        except Exception as e:
+            self._failed('clear', e)
+
+    def publish(self, channel: str, payload: bytes) -> None:
+        """Pub/sub yayını (invalidation bus redis transport'u)"""
+        if not self._available():
+            raise ConnectionError("Redis devresi açık")
+        try:
+            self.client.publish(channel, payload)
+            self._succeeded()
+        except Exception as e:
+            self._failed('publish', e)
+            raise
+
+    # Generation'lar (INCR; tüm process'ler aynı sayacı görür)
+    def get_generation(self, name: str) -> Optional[int]:
+        if not self._available():
+            return None
+        try:
+            value = self.client.get(self._k(f'_gen:{name}'))
+            self._succeeded()
+            return int(value) if value is not None else 0
+        except Exception as e:
+            self._failed('generation', e)
+            return None
+
+    def incr_generation(self, name: str) -> Optional[int]:
+        if not self._available():
+            return None
+        try:
+            generation = int(self.client.incr(self._k(f'_gen:{name}')))
+            self._succeeded()
+            return generation
+        except Exception as e:
+            self._failed('generation', e)
+            return None
+
+    # Limitler (wall-clock; tüm replikalar aynı sayaçları görür). Redis'e ulaşılamazsa
+    # kontrol metotları None döndürür; çağıran yerel (memory) limitlere düşer
+    def acquire_cooldown(self, key: LimitKey, seconds: float) -> Optional[bool]:
+        if not self._available():
+            return None
+        try:
+            acquired = bool(self.client.set(self._lk(key), 1, nx=True, px=max(1, int(seconds * 1000))))
+            self._succeeded()
+            return acquired
+        except Exception as e:
+            self._failed('cooldown', e)
+            return None
+
+    def set_cooldown(self, key: LimitKey, seconds: float) -> None:
+        if not self._available():
+            return
+        try:
+            self.client.set(self._lk(key), 1, px=max(1, int(seconds * 1000)))
+            self._succeeded()
+        except Exception as e:
+            self._failed('cooldown', e)
+
+    def _queue_window_hit(self, pipe, key: LimitKey, window: float, member: str, now: float) -> None:
+        """Sliding window komutlarını pipeline'a ekler (ZSET: skor = zaman)"""
+        window_key = self._lk(key)
+        pipe.zremrangebyscore(window_key, 0, now - window)
+        pipe.zadd(window_key, {member: now})
+        pipe.zcard(window_key)
+        pipe.pexpire(window_key, max(1, int(window * 1000)))
+
+    def window_hit(self, key: LimitKey, window: float, limit: int) -> Optional[bool]:
+        if not self._available():
+            return None
+        now, member = time.time(), uuid.uuid4().hex
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            self._queue_window_hit(pipe, key, window, member, now)
+            count = pipe.execute()[2]
+            if count > limit:
+                # Limit aşıldı: eklenen kaydı geri al (reddedilen istekler sayılmaz)
+                self.client.zrem(self._lk(key), member)
+                self._succeeded()
+                return False
+            self._succeeded()
+            return True
+        except Exception as e:
+            self._failed('window', e)
+            return None
+
+    def window_add(self, key: LimitKey, window: float, limit: int = 1) -> None:
+        if not self._available():
+            return
+        now = time.time()
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.zadd(self._lk(key), {uuid.uuid4().hex: now})
+            pipe.pexpire(self._lk(key), max(1, int(window * 1000)))
+            pipe.execute()
+            self._succeeded()
+        except Exception as e:
+            self._failed('window', e)
+
+    def throttle_check(self, cooldown_key: Optional[LimitKey], cooldown_seconds: float,
+                       window_key: LimitKey, window: float, limit: int) -> Optional[bool]:
+        """Cooldown ve window kontrolü tek pipeline round-trip'inde (Redis yoksa None)"""
+        if not self._available():
+            return None
+        now, member = time.time(), uuid.uuid4().hex
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            if cooldown_key is not None:
+                pipe.set(self._lk(cooldown_key), 1, nx=True, px=max(1, int(cooldown_seconds * 1000)))
+            self._queue_window_hit(pipe, window_key, window, member, now)
+            results = pipe.execute()
+            cooldown_ok = bool(results[0]) if cooldown_key is not None else True
+            count = results[-2]
+            if not cooldown_ok or count > limit:
+                # Reddedilen istek window'da sayılmaz; cooldown'u reddedilen istek başlatmadıysa dokunma
+                self.client.zrem(self._lk(window_key), member)
+                self._succeeded()
+                return False
+            self._succeeded()
+            return True
+        except Exception as e:
+            self._failed('throttle', e)
+            return None
+
+    def limit_stats(self) -> Dict[str, Any]:
+        return {
+            'redis_errors': self.errors,
+            'redis_available': self.available,
+            'breaker': self.breaker.stats(),
+            'pending': self._pending,
+            'skipped': self.skipped,
+        }
+
+
+# Paylaşılan backend (CACHE_BACKEND=redis ise RedisBackend, değilse None)
+_shared_backend: Optional[RedisBackend] = None
+_shared_backend_checked = False
+_shared_backend_lock = threading.Lock()
+
+def get_shared_backend() -> Optional[RedisBackend]:
+    """Config.CACHE_BACKEND=redis ise paylaşılan RedisBackend'i döndürür; aksi halde None"""
+    global _shared_backend, _shared_backend_checked
+    if _shared_backend_checked:
+        return _shared_backend
+    with _shared_backend_lock:
+        if not _shared_backend_checked:
+            if (Config.CACHE_BACKEND or 'memory').lower() == 'redis':
+                try:
+                    _shared_backend = RedisBackend()
+                    logger.info("Paylaşılan cache backend: Redis (%s)", Config.REDIS_URL)
+                except Exception as e:
+                    logger.error("Redis backend oluşturulamadı, in-memory backend kullanılacak: %s", e)
+            _shared_backend_checked = True
+    return _shared_backend
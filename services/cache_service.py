@@ -1,82 +1,560 @@
 """
-In-Memory Cache Service
-Redis olmadan basit in-memory cache mekanizması
+Cache Service
+Varsayılan olarak in-memory; CACHE_BACKEND=redis ile Redis paylaşılan katman olarak kullanılır
+Optimizasyonlar:
+- Depolama services/cache_backends.py'de: in-memory (MemoryBackend) veya
+  Redis (RedisBackend); Redis modunda tüm bot replikaları ve web worker'ları aynı
+  cache'i görür, önünde kısa TTL'li (CACHE_NEAR_TTL) in-memory near cache (L1) durur
+- Sınırlı boyut (max_entries) ve LRU eviction: farklı key sayısı ne olursa olsun bellek sabit kalır
+- time.monotonic() deadline'ları (sistem saati değişikliklerinden etkilenmez)
+- __slots__'lu CacheEntry (entry başına dict yok)
+- Süre dolumu heap'i: süresi dolan entry'ler okunmayı beklemeden,
+  her set'te amortize O(log n) ile temizlenir
+- Tag'ler: ilişkili key'ler tek çağrıyla silinir (invalidation bus ile
+  process'ler arası yayılır, bkz. services/invalidation_bus.py)
+- get_or_load: key başına tek loader (single-flight) ve olasılıksal erken
+  yenileme (XFetch); TTL dolduğunda eşzamanlı kullanıcılar Supabase'e yığılmaz
+- Stale-while-revalidate: soft TTL sonrası eski değer hemen döner ve arka planda
+  yenilenir; sadece hard TTL (ttl) dolduğunda çağıran bekler
+- Generation'lı key'ler (versioned_key): 'messages:welcome:v3' gibi; generation
+  artırılınca (O(1)) eski key'ler bir daha okunmaz, LRU/TTL ile düşer
+- Negatif cache: get_or_load(negative_ttl=...) ile loader'ın None sonucu (ör. bilinmeyen
+  kullanıcı) kısa süre tutulur, aynı yokluk için DB'ye tekrar gidilmez
+- Key prefix'i (ilk ':' öncesi) bazında hit/miss/eviction/yükleme süresi sayaçları
+- Lock modları (services/locks.py): bot event loop'unda lock alınmaz (none), thread'li
+  web worker'larında cache key hash'ine göre dilimlere bölünür (striped); her dilimin
+  kendi LRU'su, lock'u, sayaçları ve invalidation epoch'u vardır
+- Redis modunda event loop bloklanmaz: okumalar aget / get_or_load / ageneration ile
+  redis-io thread'inde beklenir, yazmalar (set/delete/invalidate) kuyruğa bırakılır.
+  Redis devresi açıkken near cache entry'leri tam TTL ile tutulur (memory'ye düşüş)
 """
 
-from typing import Any, Optional, Dict
-from datetime import datetime, timedelta
-from collections import defaultdict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Dict, List, Set, Tuple
+import asyncio
+import logging
+import math
+import random
 import threading
+import time
 
-class CacheEntry:
-    """Cache entry sınıfı"""
-    def __init__(self, data: Any, ttl: int = 300):
-        self.data = data
-        self.created_at = datetime.now()
-        self.ttl = ttl
-    
-    def is_expired(self) -> bool:
-        """Cache entry'nin süresi dolmuş mu?"""
-        return (datetime.now() - self.created_at).total_seconds() > self.ttl
-    
-    def is_valid(self) -> bool:
-        """Cache entry geçerli mi?"""
-        return not self.is_expired()
+from config import Config
+from services.singleflight import get_singleflight
+from services.cache_backends import CacheBackend, CacheEntry, MemoryBackend, get_shared_backend
+from services.locks import get_lock_mode, make_lock, make_locks
 
+logger = logging.getLogger(__name__)
+
+# Negatif entry değeri (loader None döndürdü); Redis'e de yazılabilsin diye JSON uyumlu
+NEGATIVE = '__negative__'
+
+def in_event_loop() -> bool:
+    """Çağrı bir event loop'un içinden mi yapılıyor (bloklayan Redis çağrısı yapılmamalı)"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+class CacheStats:
+    """Bir key prefix'i için sayaçlar"""
+    __slots__ = ('hits', 'misses', 'stale_hits', 'evictions', 'expirations',
+                 'loads', 'load_errors', 'load_time_total', 'load_time_max', 'background_refreshes',
+                 'shared_hits', 'negative_hits')
 
-class CacheService:
-    """In-memory cache servisi (Redis alternatifi)"""
-    
     def __init__(self):
-        self._cache: Dict[str, CacheEntry] = {}
-        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.load_time_total = 0.0
+        self.load_time_max = 0.0
+        self.background_refreshes = 0
+        self.shared_hits = 0
+        self.negative_hits = 0
+
+    def add(self, other: 'CacheStats') -> None:
+        """Başka bir sayaç setini bu sete ekler (toplamlar için)"""
+        for name in self.__slots__:
+            if name == 'load_time_max':
+                self.load_time_max = max(self.load_time_max, other.load_time_max)
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / (self.hits + self.misses), 4) if self.hits + self.misses else None,
+            'stale_hits': self.stale_hits,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'loads': self.loads,
+            'load_errors': self.load_errors,
+            'load_time_avg_ms': round(self.load_time_total / self.loads * 1000, 2) if self.loads else None,
+            'load_time_max_ms': round(self.load_time_max * 1000, 2),
+            'background_refreshes': self.background_refreshes,
+            'shared_hits': self.shared_hits,
+            'negative_hits': self.negative_hits,
+        }
+
+
+def key_prefix(key: str) -> str:
+    """Metrik grubu: key'in ilk ':' öncesi kısmı (ör. 'stats_snapshot:-100' -> 'stats_snapshot')"""
+    return key.split(':', 1)[0]
+
+
+class _CacheShard:
+    """Cache'in bir dilimi: yerel backend, lock, prefix sayaçları ve invalidation epoch'u"""
+    __slots__ = ('local', 'lock', 'stats', 'epoch', 'max_prefixes')
+
+    def __init__(self, max_entries: int, lock: Any, max_prefixes: int):
+        self.local = MemoryBackend(max_entries, on_evict=self._on_evict, on_expire=self._on_expire)
+        self.lock = lock
+        # İstatistikler: prefix -> CacheStats
+        self.stats: Dict[str, CacheStats] = {}
+        # Her delete/invalidate_tag'de artar; yükleme sırasında invalidation olduysa
+        # loader'ın (artık eski olabilecek) sonucu cache'e yazılmaz
+        self.epoch = 0
+        self.max_prefixes = max_prefixes
+
+    def stats_for(self, key: str) -> CacheStats:
+        """Key'in prefix sayaçlarını döndürür (lock altında çağrılır)"""
+        prefix = key_prefix(key)
+        stats = self.stats.get(prefix)
+        if stats is None:
+            if len(self.stats) >= self.max_prefixes:
+                prefix = '_other'
+                stats = self.stats.get(prefix)
+            if stats is None:
+                stats = self.stats[prefix] = CacheStats()
+        return stats
+
+    def _on_evict(self, key: str) -> None:
+        self.stats_for(key).evictions += 1
+
+    def _on_expire(self, key: str) -> None:
+        self.stats_for(key).expirations += 1
+
+
+class CacheService:
+    """Cache servisi (in-memory veya Redis + near cache)"""
+
+    # Metrik tutulan farklı prefix sayısı üst sınırı (fazlası '_other' altında toplanır)
+    MAX_METRIC_PREFIXES = 256
+
+    def __init__(self, max_entries: Optional[int] = None, shared: Optional[CacheBackend] = None,
+                 lock_mode: Optional[str] = None, stripes: Optional[int] = None):
+        # Lock modu (bkz. services/locks.py): none = tek sahip, global = tek lock,
+        # striped = key hash'ine göre dilimler (her dilimin kendi LRU'su ve lock'u)
+        self.lock_mode = lock_mode or get_lock_mode()
+        self.max_entries = max(1, max_entries or Config.CACHE_MAX_ENTRIES)
+        locks = make_locks(self.lock_mode, stripes)
+        per_shard = max(1, self.max_entries // len(locks))
+        # Yerel katman: memory modunda cache'in kendisi, Redis modunda near cache (L1)
+        self._shards = [_CacheShard(per_shard, lock, self.MAX_METRIC_PREFIXES) for lock in locks]
+        self._mask = len(self._shards) - 1
+        # Paylaşılan katman (L2); None = sadece in-memory
+        self._shared = shared
+        # Near cache entry'lerinin ömrü (Redis modunda; diğer process'lerin yazdıkları en geç bu sürede görülür)
+        self.near_ttl = Config.CACHE_NEAR_TTL
+        # Redis modunda generation'ların yerel kopyası: name -> (generation, geçerlilik sonu)
+        self._generations: Dict[str, Tuple[int, float]] = {}
+        self._generations_lock = make_lock(self.lock_mode)
+        # Arka plan yenileme task'ları (GC'ye karşı referans tutulur)
+        self._refresh_tasks: Set[asyncio.Task] = set()
         # Default TTL: 5 dakika (300 saniye)
         self.default_ttl = 300
-    
+
+    def _shard(self, key: str) -> _CacheShard:
+        """Key'in dilimi (tek dilimde hash hesaplanmaz)"""
+        if self._mask:
+            return self._shards[hash(key) & self._mask]
+        return self._shards[0]
+
+    def _near_entry(self, entry: CacheEntry, now: float) -> CacheEntry:
+        """Paylaşılan entry'nin near cache kopyası (ömrü near_ttl ile sınırlı; Redis devresi açıkken tam entry)"""
+        if not self._shared.available:
+            return entry
+        near = CacheEntry(entry.data, entry.ttl, now, entry.delta, entry.tags)
+        near.expires_at = min(entry.expires_at, now + self.near_ttl)
+        near.soft_expires_at = min(entry.soft_expires_at, near.expires_at)
+        return near
+
+    def _write_shared(self, func: Callable[..., Any], *args: Any) -> None:
+        """L2 yazması: event loop'ta beklenmeden redis-io kuyruğuna bırakılır, thread'lerde doğrudan yapılır"""
+        if in_event_loop():
+            self._shared.submit(func, *args)
+        else:
+            func(*args)
+
+    def _read_shared(self, key: str, epoch: int) -> Optional[CacheEntry]:
+        """L2'den okur ve near cache'e koyar (lock dışında çağrılır; ağ çağrısı yapar)"""
+        return self._store_shared(key, epoch, self._shared.get_entry(key))
+
+    async def _aread_shared(self, key: str, epoch: int) -> Optional[CacheEntry]:
+        """_read_shared'in event loop karşılığı (okuma redis-io thread'inde beklenir)"""
+        return self._store_shared(key, epoch, await self._shared.offload(self._shared.get_entry, key))
+
+    def _store_shared(self, key: str, epoch: int, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        if entry is None:
+            return None
+        now = time.monotonic()
+        shard = self._shard(key)
+        with shard.lock:
+            shard.stats_for(key).shared_hits += 1
+            # Okuma sırasında invalidation geldiyse near cache'e koyma
+            if epoch == shard.epoch:
+                shard.local.set_entry(key, self._near_entry(entry, now), now)
+        return entry
+
     def get(self, key: str) -> Optional[Any]:
-        """Cache'den değer alır"""
-        with self._lock:
-            entry = self._cache.get(key)
-            if entry and entry.is_valid():
-                return entry.data
-            elif entry:
-                # Süresi dolmuş, sil
-                del self._cache[key]
+        """
+        Cache'den değer alır
+        Redis modunda event loop içinden çağrılırsa sadece near cache'e bakılır
+        (loop bloklanmaz); coroutine'ler aget kullanmalıdır.
+        """
+        shard = self._shard(key)
+        with shard.lock:
+            epoch = shard.epoch
+            entry = shard.local.get_entry(key)
+            stats = shard.stats_for(key)
+            if entry is not None:
+                return self._hit(stats, entry.data)
+            if self._shared is None or in_event_loop():
+                stats.misses += 1
+                return None
+        return self._count_shared(shard, key, self._read_shared(key, epoch))
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get'in event loop karşılığı: near cache ıskalanırsa Redis'e loop'u bloklamadan bakar"""
+        shard = self._shard(key)
+        with shard.lock:
+            epoch = shard.epoch
+            entry = shard.local.get_entry(key)
+            stats = shard.stats_for(key)
+            if entry is not None:
+                return self._hit(stats, entry.data)
+            if self._shared is None:
+                stats.misses += 1
+                return None
+        return self._count_shared(shard, key, await self._aread_shared(key, epoch))
+
+    def _count_shared(self, shard: _CacheShard, key: str, entry: Optional[CacheEntry]) -> Optional[Any]:
+        """L2 okumasının sonucunu sayar ve değeri döndürür"""
+        with shard.lock:
+            stats = shard.stats_for(key)
+            if entry is None:
+                stats.misses += 1
+                return None
+            return self._hit(stats, entry.data)
+
+    @staticmethod
+    def _hit(stats: CacheStats, data: Any) -> Any:
+        """Hit sayar; negatif entry ise None döndürür (lock altında çağrılır)"""
+        stats.hits += 1
+        if isinstance(data, str) and data == NEGATIVE:
+            stats.negative_hits += 1
             return None
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Cache'e değer kaydeder"""
-        with self._lock:
-            if ttl is None:
-                ttl = self.default_ttl
-            self._cache[key] = CacheEntry(value, ttl)
-    
+        return data
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, delta: float = 0.0,
+            tags: Optional[Iterable[str]] = None, soft_ttl: Optional[float] = None) -> None:
+        """
+        Cache'e değer kaydeder
+
+        Args:
+            ttl: Hard TTL (saniye)
+            tags: invalidate_tag ile birlikte silinecek gruplar
+            soft_ttl: Bu süreden sonra get_or_load değeri arka planda yeniler
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        now = time.monotonic()
+        entry = CacheEntry(value, ttl, now, delta, tuple(tags) if tags else (), soft_ttl)
+        shard = self._shard(key)
+        with shard.lock:
+            shard.local.set_entry(key, entry if self._shared is None else self._near_entry(entry, now), now)
+        if self._shared is not None:
+            self._write_shared(self._shared.set_entry, key, entry)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int] = None, beta: float = 1.0,
+                          tags: Optional[Iterable[str]] = None, soft_ttl: Optional[float] = None,
+                          negative_ttl: Optional[float] = None) -> Any:
+        """
+        Cache'deki değeri döndürür; yoksa loader ile yükleyip cache'e yazar
+
+        Aynı key için aynı anda sadece bir loader çalışır, diğer çağıranlar onun
+        sonucunu bekler. Süre dolmadan önce, yükleme süresi (delta) ile orantılı
+        bir olasılıkla tek bir çağıran erken yeniler (XFetch); böylece TTL
+        trafik anında toplu olarak dolmaz. Falsy sonuçlar (0, [], {}, '') de TTL boyunca
+        cache'lenir; loader hatası (exception) cache'lenmez. None sadece negative_ttl
+        verilmişse negatif entry olarak tutulur.
+
+        soft_ttl verilirse stale-while-revalidate çalışır: soft TTL ile hard TTL
+        arasında eski değer beklemeden döner ve key arka planda (tek task) yenilenir.
+        Yenileme başarısızsa eski değer hard TTL'e kadar kullanılmaya devam eder.
+
+        Redis modunda near cache ıskalanırsa önce Redis'e bakılır; XFetch kararı
+        gerçek (Redis'teki) deadline'a göre verilir.
+
+        Args:
+            key: Cache anahtarı
+            loader: Değeri üreten coroutine fonksiyonu
+            ttl: Hard TTL, saniye (varsayılan: default_ttl)
+            beta: Erken yenileme agresifliği (0 = kapalı)
+            tags: Entry'nin tag'leri (bkz. invalidate_tag)
+            soft_ttl: Soft TTL, saniye (None = stale-while-revalidate kapalı)
+            negative_ttl: loader None döndürürse bu kadar saniye negatif entry tutulur
+                (None = kapalı); negatif entry'de get_or_load None döndürür
+        """
+        shard = self._shard(key)
+        with shard.lock:
+            epoch = shard.epoch
+            entry = shard.local.get_entry(key)
+        # Near cache entry'lerinin deadline'ı kırpılmıştır, XFetch sadece gerçek entry'de
+        check_early = self._shared is None
+        if entry is None and self._shared is not None:
+            entry = await self._aread_shared(key, epoch)
+            check_early = True
+
+        with shard.lock:
+            now = time.monotonic()
+            stats = shard.stats_for(key)
+            if entry is not None and not entry.is_expired(now):
+                data = self._hit(stats, entry.data)
+                if entry.is_soft_expired(now):
+                    # Stale: hemen dön, arka planda yenile; başarısız yenileme her
+                    # istekte tekrarlanmasın diye soft deadline kısa süre ertelenir
+                    stats.stale_hits += 1
+                    entry.soft_expires_at = now + min(30.0, soft_ttl or 30.0)
+                    if self._schedule_refresh(key, loader, ttl, tags, soft_ttl, epoch):
+                        stats.background_refreshes += 1
+                    return data
+                # XFetch: now - delta * beta * ln(rand) >= expires_at ise erken yenile
+                if not (check_early and entry.delta and beta > 0
+                        and now - entry.delta * beta * math.log(1.0 - random.random()) >= entry.expires_at):
+                    return data
+            else:
+                stats.misses += 1
+
+        return await get_singleflight().do(('cache', key), lambda: self._load(key, loader, ttl, tags, soft_ttl, epoch, negative_ttl),
+                                           name=f'cache:{key}')
+
+    def _schedule_refresh(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int],
+                          tags: Optional[Iterable[str]], soft_ttl: Optional[float], epoch: int) -> bool:
+        """Key'i arka planda yeniler (aynı key için çalışan yükleme varsa ona katılır)"""
+        async def _refresh():
+            try:
+                await get_singleflight().do(('cache', key), lambda: self._load(key, loader, ttl, tags, soft_ttl, epoch), name=f'cache:{key}')
+            except Exception as e:
+                logger.warning("Cache arka plan yenileme hatası (%s): %s", key, e)
+
+        try:
+            task = asyncio.get_running_loop().create_task(_refresh())
+        except RuntimeError:
+            return False
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+        return True
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int],
+                    tags: Optional[Iterable[str]] = None, soft_ttl: Optional[float] = None,
+                    epoch: Optional[int] = None, negative_ttl: Optional[float] = None) -> Any:
+        """loader'ı çalıştırır, süresini ölçer ve sonucu cache'e yazar (epoch: çağrı anındaki dilim invalidation sayacı)"""
+        shard = self._shard(key)
+        if epoch is None:
+            epoch = shard.epoch
+        started = time.monotonic()
+        try:
+            value = await loader()
+        except Exception:
+            with shard.lock:
+                shard.stats_for(key).load_errors += 1
+            raise
+        elapsed = time.monotonic() - started
+        with shard.lock:
+            stats = shard.stats_for(key)
+            stats.loads += 1
+            stats.load_time_total += elapsed
+            stats.load_time_max = max(stats.load_time_max, elapsed)
+        # Yükleme sürerken invalidation geldiyse sonuç eski olabilir, cache'e yazma.
+        # 0, [] ve {} de geçerli sonuçtur; sadece loader hatası (exception) cache'lenmez
+        if value is not None and epoch == shard.epoch:
+            self.set(key, value, ttl, delta=elapsed, tags=tags, soft_ttl=soft_ttl)
+        elif value is None and negative_ttl and epoch == shard.epoch:
+            self.set(key, NEGATIVE, negative_ttl, tags=tags)
+        return value
+
     def delete(self, key: str) -> None:
         """Cache'den değer siler"""
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-    
+        shard = self._shard(key)
+        with shard.lock:
+            shard.epoch += 1
+            shard.local.delete(key)
+        if self._shared is not None:
+            self._write_shared(self._shared.delete, key)
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Tag'e bağlı tüm entry'leri siler, silinen sayısını döndürür"""
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                shard.epoch += 1
+                removed += shard.local.invalidate_tag(tag)
+        if self._shared is not None:
+            if in_event_loop():
+                self._shared.submit(self._shared.invalidate_tag, tag)
+            else:
+                removed = max(removed, self._shared.invalidate_tag(tag))
+        return removed
+
     def clear(self) -> None:
         """Tüm cache'i temizler"""
-        with self._lock:
-            self._cache.clear()
-    
-    def cleanup_expired(self) -> None:
-        """Süresi dolmuş cache entry'lerini temizler"""
-        with self._lock:
-            expired_keys = [
-                key for key, entry in self._cache.items()
-                if entry.is_expired()
-            ]
-            for key in expired_keys:
-                del self._cache[key]
-
-
-# Global cache instance
-_cache_service = CacheService()
+        for shard in self._shards:
+            with shard.lock:
+                shard.epoch += 1
+                shard.local.clear()
+        if self._shared is not None:
+            self._write_shared(self._shared.clear)
+
+    def generation(self, name: str) -> int:
+        """Generation sayacını döndürür (Redis modunda near_ttl boyunca yerel kopyadan)"""
+        if self._shared is None:
+            shard = self._shard(name)
+            with shard.lock:
+                return shard.local.get_generation(name)
+        now = time.monotonic()
+        with self._generations_lock:
+            cached = self._generations.get(name)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        return self._store_generation(name, self._shared.get_generation(name), cached, now)
+
+    async def ageneration(self, name: str) -> int:
+        """generation'ın event loop karşılığı (Redis okuması redis-io thread'inde beklenir)"""
+        if self._shared is None:
+            return self.generation(name)
+        now = time.monotonic()
+        with self._generations_lock:
+            cached = self._generations.get(name)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        generation = await self._shared.offload(self._shared.get_generation, name)
+        return self._store_generation(name, generation, cached, now)
+
+    def _store_generation(self, name: str, generation: Optional[int], cached: Optional[Tuple[int, float]], now: float) -> int:
+        """Redis'ten okunan generation'ı yerel kopyaya yazar (okunamadıysa eski kopya kullanılır)"""
+        with self._generations_lock:
+            if generation is None:
+                generation = cached[0] if cached is not None else 0
+            self._generations[name] = (generation, now + self.near_ttl)
+        return generation
+
+    def bump_generation(self, name: str) -> int:
+        """Generation'ı artırır: versioned_key ile üretilmiş tüm key'ler tek adımda geçersiz olur"""
+        if self._shared is None:
+            shard = self._shard(name)
+            with shard.lock:
+                return shard.local.incr_generation(name)
+        if in_event_loop():
+            # INCR kuyruğa bırakılır; yerel kopya hemen eskir, sonraki ageneration
+            # okuması kuyrukta INCR'den sonra çalışır ve yeni değeri görür
+            self._shared.submit(self._shared.incr_generation, name)
+            with self._generations_lock:
+                generation = self._generations.get(name, (0, 0.0))[0] + 1
+                self._generations[name] = (generation, 0.0)
+            return generation
+        generation = self._shared.incr_generation(name)
+        with self._generations_lock:
+            if generation is None:
+                # Redis'e ulaşılamadı: en azından bu process'in near cache'i eski key'i okumasın
+                generation = self._generations.get(name, (0, 0.0))[0] + 1
+            self._generations[name] = (generation, time.monotonic() + self.near_ttl)
+        return generation
+
+    def forget_generation(self, name: str) -> None:
+        """Başka bir process generation'ı artırdı (invalidation bus'tan çağrılır)"""
+        if self._shared is None:
+            # Process-local key'ler: yerel sayacı artırmak yeterli
+            self.bump_generation(name)
+        else:
+            with self._generations_lock:
+                self._generations.pop(name, None)
+
+    def versioned_key(self, name: str, key: str) -> str:
+        """Generation'a bağlı cache key'i: f'{name}:{key}:v{generation}'"""
+        return f'{name}:{key}:v{self.generation(name)}'
+
+    async def aversioned_key(self, name: str, key: str) -> str:
+        """versioned_key'in event loop karşılığı"""
+        return f'{name}:{key}:v{await self.ageneration(name)}'
+
+    def cleanup_expired(self) -> int:
+        """Süresi dolmuş (yerel) cache entry'lerini temizler, silinen sayısını döndürür"""
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed += shard.local.expire(time.monotonic())
+        return removed
+
+    def __len__(self) -> int:
+        return sum(len(shard.local) for shard in self._shards)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Cache boyutu ve sayaçlar
+
+        Returns:
+            {'backend', 'entries', 'max_entries', 'totals': {...}, 'prefixes': {prefix: {..., 'entries'}}}
+            Redis modunda 'entries' near cache'teki entry sayısıdır.
+        """
+        sizes: Dict[str, int] = {}
+        merged: Dict[str, CacheStats] = {}
+        entries = 0
+        for shard in self._shards:
+            with shard.lock:
+                for key in shard.local.keys():
+                    prefix = key_prefix(key)
+                    if prefix not in shard.stats and len(shard.stats) >= self.MAX_METRIC_PREFIXES:
+                        prefix = '_other'
+                    sizes[prefix] = sizes.get(prefix, 0) + 1
+                for prefix, stats in shard.stats.items():
+                    merged.setdefault(prefix, CacheStats()).add(stats)
+                entries += len(shard.local)
+        totals = CacheStats()
+        prefixes: Dict[str, Dict[str, Any]] = {}
+        for prefix, stats in merged.items():
+            totals.add(stats)
+            prefixes[prefix] = dict(stats.to_dict(), entries=sizes.get(prefix, 0))
+        for prefix, size in sizes.items():
+            if prefix not in prefixes:
+                prefixes[prefix] = dict(CacheStats().to_dict(), entries=size)
+        result = {
+            'backend': 'redis' if self._shared is not None else 'memory',
+            'lock_mode': self.lock_mode,
+            'shards': len(self._shards),
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'totals': totals.to_dict(),
+            'prefixes': prefixes,
+        }
+        if self._shared is not None:
+            result['near_ttl'] = self.near_ttl
+            result['shared'] = self._shared.limit_stats()
+        return result
+
+# Global cache instance (ilk kullanımda, process lock modu ile oluşturulur)
+_cache_service: Optional[CacheService] = None
+_cache_service_lock = threading.Lock()
 
 def get_cache() -> CacheService:
     """Global cache instance'ını döndürür"""
+    global _cache_service
+    if _cache_service is None:
+        with _cache_service_lock:
+            if _cache_service is None:
+                _cache_service = CacheService(shared=get_shared_backend())
     return _cache_service
-
@@ -0,0 +1,350 @@
+"""
+Yerel İçerik Aynası (SQLite)
+questions, messages ve bot_settings tablolarının yerel bir kopyasını tutar.
+Bu tablolar günde birkaç kez değişir ama her kullanıcı akışında okunur.
+Optimizasyonlar:
+- Okumalar bellekteki snapshot'tan yapılır (ağ round-trip'i yok)
+- Artımlı yenileme: her tablo için (id, updated_at) manifest'i çekilir,
+  sadece değişen satırların tamamı indirilir, silinen id'ler yerelden düşülür
+- Snapshot SQLite dosyasına yazılır; Supabase erişilemezken (bot yeniden
+  başlasa bile) welcome → sorular → ödeme akışı son bilinen içerikle çalışır
+- Bot'ta arka plan task'ı periyodik yeniler; web paneli gibi task'sız
+  process'lerde okuma anında, süre dolmuşsa yenilenir
+"""
+
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import Config
+from services.singleflight import get_singleflight
+from services.invalidation_bus import get_invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+# Aynalanan tablolar: tam satır kolonları ve değişiklik tespiti için versiyon kolonu
+# (questions yerinde güncellenmez, sadece eklenir/silinir; created_at yeterli)
+MIRRORED_TABLES: Dict[str, Dict[str, str]] = {
+    'questions': {
+        'columns': 'id, question_text, order_index, created_at',
+        'version': 'created_at',
+    },
+    'messages': {
+        'columns': 'id, type, title, content, order_index, delay, is_active, created_at, updated_at',
+        'version': 'updated_at',
+    },
+    'bot_settings': {
+        'columns': 'id, start_message, help_message, intro_message, promotion_message, payment_message, commands, group_id, shopier_payment_url, updated_at',
+        'version': 'updated_at',
+    },
+}
+
+class ContentMirror:
+    """İçerik tablolarının SQLite destekli yerel aynası"""
+
+    def __init__(self, path: Optional[str] = None, refresh_interval: Optional[float] = None):
+        self.path = path or Config.CONTENT_MIRROR_PATH
+        self.refresh_interval = refresh_interval or Config.CONTENT_MIRROR_REFRESH_INTERVAL
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._loaded = False
+        # tablo -> {id: satır}; okumalar bu snapshot'tan yapılır (referans değişimi atomik)
+        self._rows: Dict[str, Dict[int, Dict[str, Any]]] = {name: {} for name in MIRRORED_TABLES}
+        self._messages_by_type: Dict[str, List[Dict[str, Any]]] = {}
+        self._questions: List[Dict[str, Any]] = []
+
+        self._synced = False
+        # Yerel yazma sayacı: senkronlanan nesil gerideyse ayna stale'dir
+        self._write_gen = 0
+        self._synced_gen = 0
+        self._last_refresh = 0.0
+        # Son başarısız denemenin zamanı; sonraki deneme refresh_interval kadar ertelenir
+        self._last_failure: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # İstatistikler
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.rows_fetched = 0
+
+    # SQLite kalıcılığı
+    def _connect(self) -> sqlite3.Connection:
+        """SQLite bağlantısını açar ve şemayı oluşturur"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS mirror_rows ('
+                'tbl TEXT NOT NULL, id INTEGER NOT NULL, version TEXT, data TEXT NOT NULL, '
+                'PRIMARY KEY (tbl, id))'
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS mirror_meta (key TEXT PRIMARY KEY, value TEXT)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load(self) -> None:
+        """Diskteki son snapshot'ı belleğe yükler (process başına bir kez)"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                conn = self._connect()
+                rows: Dict[str, Dict[int, Dict[str, Any]]] = {name: {} for name in MIRRORED_TABLES}
+                for tbl, row_id, data in conn.execute('SELECT tbl, id, data FROM mirror_rows'):
+                    if tbl in rows:
+                        rows[tbl][row_id] = json.loads(data)
+                synced = conn.execute("SELECT value FROM mirror_meta WHERE key = 'synced_at'").fetchone()
+                if synced:
+                    self._publish(rows)
+                    self._synced = True
+                    logger.info("İçerik aynası diskten yüklendi (son senkron: %s)", synced[0])
+            except Exception as e:
+                logger.error("İçerik aynası yükleme hatası: %s", e)
+
+    def _persist(self, changed: Dict[str, List[Dict[str, Any]]], deleted: Dict[str, List[int]]) -> None:
+        """Değişen/silinen satırları tek transaction'da SQLite'a yazar"""
+        try:
+            conn = self._connect()
+            with conn:
+                for tbl, ids in deleted.items():
+                    conn.executemany('DELETE FROM mirror_rows WHERE tbl = ? AND id = ?', [(tbl, i) for i in ids])
+                for tbl, rows in changed.items():
+                    version_column = MIRRORED_TABLES[tbl]['version']
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO mirror_rows (tbl, id, version, data) VALUES (?, ?, ?, ?)',
+                        [(tbl, row['id'], _version(row.get(version_column)), json.dumps(row, ensure_ascii=False)) for row in rows]
+                    )
+                conn.execute(
+                    "INSERT OR REPLACE INTO mirror_meta (key, value) VALUES ('synced_at', ?)",
+                    (time.strftime('%Y-%m-%dT%H:%M:%S'),)
+                )
+        except Exception as e:
+            logger.error("İçerik aynası disk yazma hatası: %s", e)
+
+    def _publish(self, rows: Dict[str, Dict[int, Dict[str, Any]]]) -> None:
+        """Okuma için hazır görünümleri (sıralı sorular, türe göre mesajlar) oluşturur"""
+        questions = sorted(rows['questions'].values(), key=lambda r: (r.get('order_index') or 0, r['id']))
+        messages_by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for row in sorted(rows['messages'].values(), key=lambda r: (r.get('order_index') or 0, r['id'])):
+            if row.get('is_active', True):
+                messages_by_type.setdefault(row.get('type'), []).append(row)
+        self._rows = rows
+        self._questions = questions
+        self._messages_by_type = messages_by_type
+
+    # Yenileme
+    async def refresh(self, db) -> bool:
+        """
+        Supabase'den artımlı senkron yapar (aynı loop'ta eşzamanlı çağrılar birleşir)
+
+        Args:
+            db: DatabaseService instance'ı (sorgular onun executor'ı üzerinden çalışır)
+
+        Returns:
+            Senkron başarılıysa True
+        """
+        return await get_singleflight().do(('content_mirror', 'refresh'), lambda: self._refresh(db), name='content_mirror_refresh')
+
+    async def _refresh(self, db) -> bool:
+        self._load()
+        write_gen = self._write_gen
+        try:
+            manifests = await asyncio.gather(*[
+                db._execute(db.supabase.table(tbl).select(f"id, {spec['version']}"))
+                for tbl, spec in MIRRORED_TABLES.items()
+            ])
+
+            current = self._rows
+            changed_ids: Dict[str, List[int]] = {}
+            deleted: Dict[str, List[int]] = {}
+            for (tbl, spec), manifest in zip(MIRRORED_TABLES.items(), manifests):
+                remote = {row['id']: _version(row.get(spec['version'])) for row in (manifest.data or [])}
+                local = current[tbl]
+                changed_ids[tbl] = [
+                    row_id for row_id, version in remote.items()
+                    if row_id not in local or _version(local[row_id].get(spec['version'])) != version
+                ]
+                deleted[tbl] = [row_id for row_id in local if row_id not in remote]
+
+            changed: Dict[str, List[Dict[str, Any]]] = {}
+            for tbl, ids in changed_ids.items():
+                rows: List[Dict[str, Any]] = []
+                for i in range(0, len(ids), 200):
+                    result = await db._execute(
+                        db.supabase.table(tbl).select(MIRRORED_TABLES[tbl]['columns']).in_('id', ids[i:i + 200])
+                    )
+                    rows.extend(result.data or [])
+                changed[tbl] = rows
+        except Exception as e:
+            self.refresh_failures += 1
+            self._last_failure = time.monotonic()
+            logger.warning("İçerik aynası yenilenemedi, yerel kopya kullanılıyor: %s", e)
+            return False
+
+        fetched = sum(len(rows) for rows in changed.values())
+        removed = sum(len(ids) for ids in deleted.values())
+        if fetched or removed or not self._synced:
+            rows = {tbl: dict(table_rows) for tbl, table_rows in current.items()}
+            for tbl, ids in deleted.items():
+                for row_id in ids:
+                    rows[tbl].pop(row_id, None)
+            for tbl, table_rows in changed.items():
+                for row in table_rows:
+                    rows[tbl][row['id']] = row
+            with self._lock:
+                self._publish(rows)
+            await asyncio.to_thread(self._locked_persist, changed, deleted)
+            if fetched or removed:
+                logger.info("İçerik aynası güncellendi (%d satır indirildi, %d satır silindi)", fetched, removed)
+
+        self._synced = True
+        self._last_failure = None
+        # Yenileme sırasında yeni bir yazma olduysa ayna stale kalır
+        self._synced_gen = write_gen
+        self._last_refresh = time.monotonic()
+        self.refreshes += 1
+        self.rows_fetched += fetched
+        return True
+
+    def _locked_persist(self, changed: Dict[str, List[Dict[str, Any]]], deleted: Dict[str, List[int]]) -> None:
+        with self._lock:
+            self._persist(changed, deleted)
+
+    async def ensure_fresh(self, db) -> bool:
+        """
+        Okuma öncesi çağrılır; ayna kullanılabilir durumdaysa True döner
+
+        Arka plan task'ı çalışıyorsa okuma ağ beklemez. Bir içerik yazmasından sonra
+        (bu process'te veya invalidation bus ile gelen) ya da task yokken süre
+        dolduğunda senkron yenilenir. Başarısız bir denemeden sonra (ayna stale olsa
+        bile) refresh_interval boyunca tekrar denenmez; Supabase erişilemezken okumalar
+        yerel kopyadan beklemeden döner.
+        """
+        self._load()
+        if self._task is not None and not self._task.done() and self._synced and not self.stale:
+            return True
+
+        now = time.monotonic()
+        if self._last_failure is not None and now - self._last_failure < self.refresh_interval:
+            return self._synced
+        if not self._synced or self.stale or now - self._last_refresh >= self.refresh_interval:
+            await self.refresh(db)
+        return self._synced
+
+    def mark_stale(self) -> None:
+        """Yerel bir içerik yazmasından sonra çağrılır; bir sonraki okumada yenilenir"""
+        self._write_gen += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # Arka plan yenileme
+    def start(self) -> None:
+        """Periyodik yenileme task'ını başlatır (idempotent)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._load()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Yenileme task'ını durdurur"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """refresh_interval aralıklarla (veya stale olunca hemen) yeniler"""
+        from services.database import DatabaseService
+        while True:
+            try:
+                await self.refresh(DatabaseService())
+            except Exception as e:
+                logger.error("İçerik aynası yenileme hatası: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    # Okumalar (kopya döner; çağıran tarafın değişiklikleri aynayı bozmaz)
+    def get_questions(self) -> List[Dict[str, Any]]:
+        """Soruları order_index sırasıyla döndürür"""
+        return [dict(row) for row in self._questions]
+
+    def get_messages_by_type(self, message_type: str) -> List[Dict[str, Any]]:
+        """Aktif mesajları türe göre order_index sırasıyla döndürür"""
+        return [dict(row) for row in self._messages_by_type.get(message_type, [])]
+
+    def get_bot_settings(self) -> Optional[Dict[str, Any]]:
+        """bot_settings satırını döndürür (birden fazlaysa en küçük id)"""
+        settings = self._rows['bot_settings']
+        if not settings:
+            return None
+        return dict(settings[min(settings)])
+
+    @property
+    def stale(self) -> bool:
+        """Son senkrondan sonra yerel bir içerik yazması olduysa True"""
+        return self._synced_gen != self._write_gen
+
+    @property
+    def synced(self) -> bool:
+        """Ayna en az bir kez senkron olduysa (bu process'te veya diskte) True"""
+        return self._synced
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ayna durumu ve sayaçları"""
+        return {
+            'synced': self._synced,
+            'stale': self.stale,
+            'age_seconds': round(time.monotonic() - self._last_refresh, 1) if self._last_refresh else None,
+            'rows': {tbl: len(rows) for tbl, rows in self._rows.items()},
+            'refreshes': self.refreshes,
+            'refresh_failures': self.refresh_failures,
+            'rows_fetched': self.rows_fetched,
+        }
+
+
+def _version(value: Any) -> Optional[str]:
+    """Versiyon kolonunu karşılaştırılabilir metne çevirir"""
+    return None if value is None else str(value)
+
+
+def is_content_invalidation(keys: List[str], tags: List[str], generations: List[str]) -> bool:
+    """Invalidation aynalanan tablolardan birine mi ait (ör. 'questions', 'messages:welcome:v3')"""
+    for name in (*keys, *tags, *generations):
+        if name.split(':', 1)[0] in MIRRORED_TABLES:
+            return True
+    return False
+
+
+# Global içerik aynası instance
+_content_mirror = ContentMirror()
+
+def _on_invalidation(keys: List[str], tags: List[str], generations: List[str]) -> None:
+    # Başka bir process içerik yazdığında (admin paneli) ayna bir sonraki okumada yenilenir;
+    # kullanıcı, dekont sayısı gibi içerik dışı invalidation'lar manifest kontrolünü tetiklemez
+    if is_content_invalidation(keys, tags, generations):
+        _content_mirror.mark_stale()
+
+get_invalidation_bus().add_listener(_on_invalidation)
+
+def get_content_mirror() -> ContentMirror:
+    """Global içerik aynası instance'ını döndürür"""
+    return _content_mirror
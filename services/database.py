@@ -5,17 +5,109 @@ Optimizasyonlar:
 - Graceful degradation (timeout/connection hatalarında sessizce devam)
 - SELECT * yerine sadece gerekli kolonlar
 - COUNT query'leri ile verimli sayım
-- Connection management
+- Connection management (process-wide paylaşılan client, keep-alive havuzu)
+- Single-flight: eşzamanlı özdeş içerik okumaları tek sorguda birleşir
+- İçerik aynası: sorular, mesajlar ve bot ayarları yerel SQLite kopyasından
+  okunur; Supabase erişilemezken de son bilinen içerik döner
+- Keyset (cursor) pagination: derin sayfalar ilk sayfa kadar ucuz
+- Non-blocking sorgular (senkron supabase-py çağrıları sınırlı bir thread
+  havuzunda çalışır, event loop bloklanmaz)
 """
 
-from supabase import create_client, Client
+from supabase import Client
+from postgrest.types import ReturnMethod
 from typing import List, Dict, Optional, Any
 import json
 from datetime import datetime
 from config import Config
+from services.supabase_client import get_supabase_client
+from services.singleflight import coalesce
+from services.cache_service import get_cache
+from services.content_mirror import get_content_mirror
+from services.invalidation_bus import get_invalidation_bus
 from typing import Tuple
 from passlib.hash import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import base64
 import functools
+import threading
+
+# Senkron Supabase sorguları için process-wide sınırlı executor
+# (eşzamanlı sorgu sayısı Config.DB_MAX_CONCURRENCY ile sınırlanır)
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_executor_lock = threading.Lock()
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """DB sorguları için paylaşılan executor'ı döndürür (lazy oluşturulur)"""
+    global _db_executor
+    if _db_executor is None:
+        with _db_executor_lock:
+            if _db_executor is None:
+                _db_executor = ThreadPoolExecutor(
+                    max_workers=max(1, Config.DB_MAX_CONCURRENCY),
+                    thread_name_prefix='supabase-db'
+                )
+    return _db_executor
+
+async def run_query(query) -> Any:
+    """
+    Supabase sorgusunu executor'da çalıştırır
+    Event loop HTTP round-trip boyunca bloklanmaz, diğer update'ler işlenmeye devam eder
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), query.execute)
+
+# Keyset (cursor) pagination yardımcıları
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    """(sıralama değeri, id) çiftini opak bir cursor token'ına çevirir"""
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Cursor token'ını çözer; geçersizse ValueError fırlatır"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        row_id = int(row_id)
+    except Exception:
+        raise ValueError("Geçersiz cursor")
+    # Değer PostgREST filtresine gömülür: tırnak/ters bölü içeren değerler reddedilir
+    if not isinstance(sort_value, (str, int, float)) or any(ch in str(sort_value) for ch in '"\\'):
+        raise ValueError("Geçersiz cursor")
+    return sort_value, row_id
+
+def next_cursor(rows: List[Dict], limit: int, column: str) -> Optional[str]:
+    """Sayfa doluysa son satırdan bir sonraki sayfanın cursor'ını üretir"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.get(column), last.get('id'))
+
+def user_cache_key(user_id: int) -> str:
+    """Kullanıcı profili cache key'i"""
+    return f'user:{user_id}'
+
+# Satırın kendisinden kaynaklanan (tekrar denemekle düzelmeyen) PostgreSQL hata sınıfları:
+# 22 veri hatası, 23 bütünlük (FK / unique / not null), 42 geçersiz kolon vb.
+# 42501 (yetki / RLS) yapılandırma hatasıdır, satırlar düşürülmez
+_DATA_ERROR_CLASSES = ('22', '23', '42')
+_DATA_ERROR_HTTP = ('400', '409', '422')
+
+def is_data_error(error: BaseException) -> bool:
+    """
+    Hata gönderilen verinin kendisinden mi kaynaklanıyor (tekrar denemek anlamsız)
+    Bağlantı, timeout, 5xx ve yetki hataları False döner (tekrar denenebilir)
+    """
+    from postgrest.exceptions import APIError
+    if not isinstance(error, APIError):
+        return False
+    code = str(error.code or '')
+    if code == '42501':
+        return False
+    if len(code) == 5 and code[:2] in _DATA_ERROR_CLASSES:
+        return True
+    return code.startswith('PGRST1') or code in _DATA_ERROR_HTTP
 
 def db_safe_execute(default_return=None):
     """
@@ -43,18 +135,36 @@ class DatabaseService:
     """Supabase veritabanı servisi"""
     
     def __init__(self):
-        """Supabase istemcisini başlatır"""
+        """Paylaşılan Supabase istemcisini bağlar (create_client her seferinde çağrılmaz)"""
+        self.supabase: Client = get_supabase_client()
+    
+    async def _execute(self, query) -> Any:
+        """Sorguyu event loop'u bloklamadan çalıştırır (bkz. run_query)"""
+        return await run_query(query)
+    
+    def _messages_changed(self) -> None:
+        """
+        messages tablosuna yazıldı: içerik aynasını eskimiş işaretler ve 'messages'
+        generation'ını artırır; messages:{type}:v{gen} key'leri tüm process'lerde geçersiz olur
+        """
+        get_content_mirror().mark_stale()
         try:
-            self.supabase: Client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+            get_invalidation_bus().publish(generations=['messages'])
         except Exception as e:
-            print(f"Supabase client initialization error: {e}")
-            # Try alternative initialization method
-            try:
-                from supabase import Client as SupabaseClient
-                self.supabase = SupabaseClient(Config.SUPABASE_URL, Config.SUPABASE_KEY)
-            except Exception as e2:
-                print(f"Alternative Supabase client initialization failed: {e2}")
-                raise e
+            print(f"Mesaj cache invalidation hatası: {e}")
+    
+    def _keyset(self, query, column: str, cursor: Optional[str], desc: bool = True):
+        """
+        Sorguya (column, id) üzerinden keyset pagination uygular
+        OFFSET yerine son görülen satırdan devam edilir; derin sayfalar ilk sayfa kadar ucuzdur
+        ve onaylar sırasında sayfalar kaymaz
+        """
+        if cursor:
+            sort_value, row_id = decode_cursor(cursor)
+            op = 'lt' if desc else 'gt'
+            # Değerler (timestamp içinde ':' ve '+' var) PostgREST için çift tırnaklanır
+            query = query.or_(f'{column}.{op}."{sort_value}",and({column}.eq."{sort_value}",id.{op}.{row_id})')
+        return query.order(column, desc=desc).order('id', desc=desc)
     
     async def create_tables(self):
         """Gerekli tabloları oluşturur (Supabase'de SQL ile oluşturulmalı)"""
@@ -63,58 +173,75 @@ class DatabaseService:
     
     # Kullanıcı işlemleri
     @db_safe_execute(default_return=None)
-    async def create_user(self, user_id: int, username: str, first_name: str = None, last_name: str = None) -> Optional[Dict]:
+    async def upsert_user(self, user_id: int, username: str, first_name: str = None, last_name: str = None) -> Optional[Dict]:
         """
-        Yeni kullanıcı oluşturur (duplicate kontrolü ile)
-        ON CONFLICT kullanarak duplicate INSERT'i engeller
+        Kullanıcıyı tek round-trip'te oluşturur veya profilini günceller
+        INSERT ... ON CONFLICT (user_id) DO UPDATE, kaydı aynı istekte döndürür
+        status ve created_at gönderilmez: yeni kayıtta DB default'ları kullanılır,
+        mevcut kayıtta eski değerler korunur
         """
         try:
-            # Önce kullanıcının var olup olmadığını kontrol et (sadece user_id çek)
-            existing = self.supabase.table('users').select('user_id').eq('user_id', user_id).limit(1).execute()
-            if existing.data:
-                # Kullanıcı zaten var, mevcut kaydı döndür (güncelleme yapma)
-                return existing.data[0]
-            
             user_data = {
                 'user_id': user_id,
                 'username': username,
                 'first_name': first_name,
-                'last_name': last_name,
-                'created_at': datetime.now().isoformat(),
-                'status': 'active'
+                'last_name': last_name
             }
             
-            result = self.supabase.table('users').insert(user_data).execute()
-            return result.data[0] if result.data else None
+            result = await self._execute(self.supabase.table('users').upsert(user_data, on_conflict='user_id'))
+            user = result.data[0] if result.data else None
+            # Write-through: sonraki get_user (bildirimler vb.) DB'ye gitmez, negatif entry'nin yerini alır
+            if user:
+                get_cache().set(user_cache_key(user_id), user, ttl=Config.USER_CACHE_TTL)
+            else:
+                get_cache().delete(user_cache_key(user_id))
+            return user
         except Exception as e:
-            # Duplicate key hatası (user_id unique constraint)
-            if 'duplicate' in str(e).lower() or 'unique' in str(e).lower():
-                # Kullanıcı zaten var, mevcut kaydı döndür
-                existing = self.supabase.table('users').select('user_id, username, first_name, last_name, status').eq('user_id', user_id).limit(1).execute()
-                return existing.data[0] if existing.data else None
-            print(f"Kullanıcı oluşturma hatası: {e}")
+            print(f"Kullanıcı upsert hatası: {e}")
             return None
     
+    async def create_user(self, user_id: int, username: str, first_name: str = None, last_name: str = None) -> Optional[Dict]:
+        """
+        Yeni kullanıcı oluşturur (geriye uyumluluk için, upsert_user kullanır)
+        ON CONFLICT kullanarak duplicate INSERT'i engeller
+        """
+        return await self.upsert_user(user_id=user_id, username=username, first_name=first_name, last_name=last_name)
+    
     @db_safe_execute(default_return=None)
     async def get_user(self, user_id: int) -> Optional[Dict]:
-        """Kullanıcı bilgilerini getirir (sadece gerekli kolonlar)"""
+        """
+        Kullanıcı bilgilerini getirir (cache: user:{id})
+        Profil upsert_user ile write-through güncellenir; DB'de olmayan kullanıcılar
+        USER_NEGATIVE_CACHE_TTL boyunca negatif cache'lenir. Hatalar cache'lenmez.
+        """
         try:
-            # SELECT * yerine sadece gerekli kolonları çek
-            result = self.supabase.table('users').select('user_id, username, first_name, last_name, status, created_at').eq('user_id', user_id).limit(1).execute()
-            return result.data[0] if result.data else None
+            user = await get_cache().get_or_load(user_cache_key(user_id), lambda: self._fetch_user(user_id),
+                                                 ttl=Config.USER_CACHE_TTL, negative_ttl=Config.USER_NEGATIVE_CACHE_TTL)
+            return dict(user) if user else None
         except Exception as e:
             print(f"Kullanıcı getirme hatası: {e}")
             return None
     
+    async def _fetch_user(self, user_id: int) -> Optional[Dict]:
+        """Kullanıcıyı doğrudan Supabase'den getirir (sadece gerekli kolonlar; hata yukarı iletilir)"""
+        # SELECT * yerine sadece gerekli kolonları çek
+        result = await self._execute(self.supabase.table('users').select('user_id, username, first_name, last_name, status, created_at').eq('user_id', user_id).limit(1))
+        return result.data[0] if result.data else None
+    
     @db_safe_execute(default_return=[])
-    async def get_all_users(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+    async def get_all_users(self, limit: int = 100, offset: int = 0, cursor: Optional[str] = None) -> List[Dict]:
         """
         Tüm kullanıcıları getirir (pagination ile)
-        Admin panel için limit/offset eklenmiş
+        cursor verilirse (veya ilk sayfada) (created_at, id) keyset pagination kullanılır,
+        offset sadece geriye uyumluluk için
         """
+        query = self.supabase.table('users').select('id, user_id, username, first_name, last_name, status, created_at')
+        if cursor or not offset:
+            query = self._keyset(query, 'created_at', cursor).limit(limit)
+        else:
+            query = query.order('created_at', desc=True).order('id', desc=True).range(offset, offset + limit - 1)
         try:
-            # SELECT * yerine sadece gerekli kolonları çek, limit/offset ekle
-            result = self.supabase.table('users').select('user_id, username, first_name, last_name, status, created_at').limit(limit).range(offset, offset + limit - 1).execute()
+            result = await self._execute(query)
             return result.data if result.data else []
         except Exception as e:
             print(f"Tüm kullanıcıları getirme hatası: {e}")
@@ -124,7 +251,7 @@ class DatabaseService:
     async def count_all_users(self) -> int:
         """Tüm kullanıcı sayısını getirir (COUNT query)"""
         try:
-            result = self.supabase.table('users').select('user_id', count='exact').execute()
+            result = await self._execute(self.supabase.table('users').select('user_id', count='exact'))
             return result.count if hasattr(result, 'count') and result.count is not None else (len(result.data) if result.data else 0)
         except Exception as e:
             print(f"Kullanıcı sayısı getirme hatası: {e}")
@@ -133,30 +260,44 @@ class DatabaseService:
     @db_safe_execute(default_return=False)
     async def update_user_status(self, user_id: int, status: str) -> bool:
         """
-        Kullanıcı durumunu günceller (sadece değişim varsa)
+        Kullanıcı durumunu günceller (tek istek, sadece değişim varsa)
+        Filtre zaten aynı durumda olan satırı eşleştirmez, gereksiz UPDATE yapılmaz
         """
         try:
-            # Önce mevcut durumu kontrol et (gereksiz UPDATE'leri engelle)
-            current = self.supabase.table('users').select('status').eq('user_id', user_id).limit(1).execute()
-            if current.data and current.data[0].get('status') == status:
-                return True  # Zaten aynı durum, UPDATE yapma
-            
-            self.supabase.table('users').update({'status': status}).eq('user_id', user_id).execute()
+            await self._execute(
+                self.supabase.table('users').update({'status': status})
+                .eq('user_id', user_id)
+                .or_(f'status.is.null,status.neq.{status}')
+            )
+            # Profil cache'i (tüm process'lerde) bir sonraki okumada yenilenir
+            get_invalidation_bus().publish(keys=[user_cache_key(user_id)])
             return True
         except Exception as e:
             print(f"Kullanıcı durumu güncelleme hatası: {e}")
             return False
     
     # Soru işlemleri
-    @db_safe_execute(default_return=[])
-    async def get_questions(self) -> List[Dict]:
-        """Tüm soruları getirir (sadece gerekli kolonlar)"""
+    @coalesce()
+    async def get_questions(self, raise_errors: bool = False) -> List[Dict]:
+        """
+        Tüm soruları getirir (içerik aynasından; ayna hiç senkron olmadıysa DB'den)
+        raise_errors: DB hatasında [] yerine exception (cache loader'ları hatayı cache'lemesin)
+        """
+        mirror = get_content_mirror()
+        if await mirror.ensure_fresh(self):
+            return mirror.get_questions()
+        return await self._fetch_questions(raise_errors)
+    
+    async def _fetch_questions(self, raise_errors: bool = False) -> List[Dict]:
+        """Soruları doğrudan Supabase'den getirir (sadece gerekli kolonlar)"""
         try:
             # SELECT * yerine sadece gerekli kolonları çek
-            result = self.supabase.table('questions').select('id, question_text, order_index, created_at').order('order_index').execute()
+            result = await self._execute(self.supabase.table('questions').select('id, question_text, order_index, created_at').order('order_index'))
             return result.data if result.data else []
         except Exception as e:
             print(f"Soruları getirme hatası: {e}")
+            if raise_errors:
+                raise
             return []
     
     async def add_question(self, question_text: str, order_index: int = None) -> Optional[Dict]:
@@ -173,7 +314,8 @@ class DatabaseService:
                 'created_at': datetime.now().isoformat()
             }
             
-            result = self.supabase.table('questions').insert(question_data).execute()
+            result = await self._execute(self.supabase.table('questions').insert(question_data))
+            get_content_mirror().mark_stale()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Soru ekleme hatası: {e}")
@@ -188,21 +330,22 @@ class DatabaseService:
                 return False
             
             # Soru var mı kontrol et
-            question_check = self.supabase.table('questions').select('id').eq('id', question_id).execute()
+            question_check = await self._execute(self.supabase.table('questions').select('id').eq('id', question_id))
             if not question_check.data:
                 print(f"Soru bulunamadı: {question_id}")
                 return False
             
             # Önce bu soruya ait tüm cevapları sil
             try:
-                answers_result = self.supabase.table('answers').delete().eq('question_id', question_id).execute()
+                answers_result = await self._execute(self.supabase.table('answers').delete().eq('question_id', question_id))
                 print(f"Silinen cevap sayısı: {len(answers_result.data) if answers_result.data else 0}")
             except Exception as answer_delete_error:
                 print(f"Cevap silme hatası: {answer_delete_error}")
                 # Cevap silme hatası olsa bile devam et
             
             # Şimdi soruyu sil
-            result = self.supabase.table('questions').delete().eq('id', question_id).execute()
+            result = await self._execute(self.supabase.table('questions').delete().eq('id', question_id))
+            get_content_mirror().mark_stale()
             print(f"Soru silme sonucu: {result}")
             return True
             
@@ -223,16 +366,39 @@ class DatabaseService:
                 'created_at': datetime.now().isoformat()
             }
             
-            result = self.supabase.table('answers').insert(answer_data).execute()
+            result = await self._execute(self.supabase.table('answers').insert(answer_data))
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Cevap kaydetme hatası: {e}")
             return None
     
+    async def save_answers_bulk(self, answers: List[Dict]) -> bool:
+        """
+        Birden fazla cevabı tek bir çok satırlı INSERT ile kaydeder
+        (write-behind kuyruğu tarafından kullanılır, satırlar geri döndürülmez)
+
+        Returns:
+            True: yazıldı; False: bağlantı/timeout hatası, tekrar denenebilir
+
+        Raises:
+            Veri hatası (FK, constraint vb.; bkz. is_data_error): batch'teki en az bir satır
+            hiçbir zaman yazılamaz, INSERT tek transaction olduğu için hiçbiri yazılmadı
+        """
+        if not answers:
+            return True
+        try:
+            await self._execute(self.supabase.table('answers').insert(answers, returning=ReturnMethod.minimal))
+            return True
+        except Exception as e:
+            if is_data_error(e):
+                raise
+            print(f"Toplu cevap kaydetme hatası: {e}")
+            return False
+    
     async def get_user_answers(self, user_id: int) -> List[Dict]:
         """Kullanıcının tüm cevaplarını getirir"""
         try:
-            result = self.supabase.table('answers').select('*, questions(*)').eq('user_id', user_id).execute()
+            result = await self._execute(self.supabase.table('answers').select('*, questions(*)').eq('user_id', user_id))
             return result.data if result.data else []
         except Exception as e:
             print(f"Kullanıcı cevaplarını getirme hatası: {e}")
@@ -247,7 +413,7 @@ class DatabaseService:
         """
         try:
             # Önce kullanıcının pending ödemesi var mı kontrol et
-            existing = self.supabase.table('payments').select('id, status').eq('user_id', user_id).eq('status', 'pending').limit(1).execute()
+            existing = await self._execute(self.supabase.table('payments').select('id, status').eq('user_id', user_id).eq('status', 'pending').limit(1))
             if existing.data:
                 # Zaten pending ödeme var, mevcut kaydı döndür
                 return existing.data[0]
@@ -259,7 +425,7 @@ class DatabaseService:
                 'created_at': datetime.now().isoformat()
             }
             
-            result = self.supabase.table('payments').insert(payment_data).execute()
+            result = await self._execute(self.supabase.table('payments').insert(payment_data))
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Ödeme oluşturma hatası: {e}")
@@ -268,7 +434,7 @@ class DatabaseService:
     async def get_payment(self, payment_id: int) -> Optional[Dict]:
         """Ödeme bilgilerini getirir"""
         try:
-            result = self.supabase.table('payments').select('*').eq('id', payment_id).execute()
+            result = await self._execute(self.supabase.table('payments').select('*').eq('id', payment_id))
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Ödeme getirme hatası: {e}")
@@ -279,7 +445,7 @@ class DatabaseService:
         """Tüm ödemeleri getirir (pagination ile)"""
         try:
             # SELECT * yerine sadece gerekli kolonları çek, limit/offset ekle
-            result = self.supabase.table('payments').select('id, user_id, amount, status, created_at').limit(limit).range(offset, offset + limit - 1).order('created_at', desc=True).execute()
+            result = await self._execute(self.supabase.table('payments').select('id, user_id, amount, status, created_at').limit(limit).range(offset, offset + limit - 1).order('created_at', desc=True))
             return result.data if result.data else []
         except Exception as e:
             print(f"Tüm ödemeleri getirme hatası: {e}")
@@ -288,7 +454,7 @@ class DatabaseService:
     async def get_payment_by_user_id(self, user_id: int) -> Optional[Dict]:
         """Kullanıcının ödeme kaydını getirir"""
         try:
-            result = self.supabase.table('payments').select('*').eq('user_id', user_id).limit(1).execute()
+            result = await self._execute(self.supabase.table('payments').select('*').eq('user_id', user_id).limit(1))
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Kullanıcı ödeme getirme hatası: {e}")
@@ -297,21 +463,27 @@ class DatabaseService:
     async def update_payment_status(self, payment_id: int, status: str) -> bool:
         """Ödeme durumunu günceller"""
         try:
-            self.supabase.table('payments').update({'status': status}).eq('id', payment_id).execute()
+            await self._execute(self.supabase.table('payments').update({'status': status}).eq('id', payment_id))
             return True
         except Exception as e:
             print(f"Ödeme durumu güncelleme hatası: {e}")
             return False
     
     @db_safe_execute(default_return=[])
-    async def get_pending_payments(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+    async def get_pending_payments(self, limit: int = 100, offset: int = 0, cursor: Optional[str] = None) -> List[Dict]:
         """
         Bekleyen ödemeleri getirir (pagination ile)
-        Admin panel için limit/offset eklenmiş
+        cursor verilirse (veya ilk sayfada) (created_at, id) keyset pagination kullanılır,
+        offset sadece geriye uyumluluk için
         """
+        # SELECT * yerine sadece gerekli kolonları çek
+        query = self.supabase.table('payments').select('id, user_id, amount, status, created_at, users(user_id, username, first_name, last_name)').eq('status', 'pending')
+        if cursor or not offset:
+            query = self._keyset(query, 'created_at', cursor).limit(limit)
+        else:
+            query = query.order('created_at', desc=True).order('id', desc=True).range(offset, offset + limit - 1)
         try:
-            # SELECT * yerine sadece gerekli kolonları çek, limit/offset ekle
-            result = self.supabase.table('payments').select('id, user_id, amount, status, created_at, users(user_id, username, first_name, last_name)').eq('status', 'pending').limit(limit).range(offset, offset + limit - 1).order('created_at', desc=True).execute()
+            result = await self._execute(query)
             return result.data if result.data else []
         except Exception as e:
             print(f"Bekleyen ödemeleri getirme hatası: {e}")
@@ -321,7 +493,7 @@ class DatabaseService:
     async def count_pending_payments(self) -> int:
         """Bekleyen ödeme sayısını getirir (COUNT query)"""
         try:
-            result = self.supabase.table('payments').select('id', count='exact').eq('status', 'pending').execute()
+            result = await self._execute(self.supabase.table('payments').select('id', count='exact').eq('status', 'pending'))
             return result.count if hasattr(result, 'count') and result.count is not None else (len(result.data) if result.data else 0)
         except Exception as e:
             print(f"Bekleyen ödeme sayısı getirme hatası: {e}")
@@ -339,7 +511,7 @@ class DatabaseService:
                 'created_at': datetime.now().isoformat()
             }
             
-            result = self.supabase.table('receipts').insert(receipt_data).execute()
+            result = await self._execute(self.supabase.table('receipts').insert(receipt_data))
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Dekont kaydetme hatası: {e}")
@@ -348,21 +520,27 @@ class DatabaseService:
     async def get_receipt(self, receipt_id: int) -> Optional[Dict]:
         """Dekont bilgilerini getirir"""
         try:
-            result = self.supabase.table('receipts').select('*').eq('id', receipt_id).execute()
+            result = await self._execute(self.supabase.table('receipts').select('*').eq('id', receipt_id))
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Dekont getirme hatası: {e}")
             return None
     
     @db_safe_execute(default_return=[])
-    async def get_pending_receipts(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+    async def get_pending_receipts(self, limit: int = 100, offset: int = 0, cursor: Optional[str] = None) -> List[Dict]:
         """
         Bekleyen dekontları getirir (pagination ile)
-        Admin panel için limit/offset eklenmiş
+        cursor verilirse (veya ilk sayfada) (created_at, id) keyset pagination kullanılır,
+        offset sadece geriye uyumluluk için
         """
+        # SELECT * yerine sadece gerekli kolonları çek
+        query = self.supabase.table('receipts').select('id, user_id, file_url, file_name, status, created_at, users(user_id, username, first_name, last_name)').eq('status', 'pending')
+        if cursor or not offset:
+            query = self._keyset(query, 'created_at', cursor).limit(limit)
+        else:
+            query = query.order('created_at', desc=True).order('id', desc=True).range(offset, offset + limit - 1)
         try:
-            # SELECT * yerine sadece gerekli kolonları çek, limit/offset ekle
-            result = self.supabase.table('receipts').select('id, user_id, file_url, file_name, status, created_at, users(user_id, username, first_name, last_name)').eq('status', 'pending').limit(limit).range(offset, offset + limit - 1).order('created_at', desc=True).execute()
+            result = await self._execute(query)
             return result.data if result.data else []
         except Exception as e:
             print(f"Bekleyen dekontları getirme hatası: {e}")
@@ -371,7 +549,9 @@ class DatabaseService:
     async def update_receipt_status(self, receipt_id: int, status: str) -> bool:
         """Dekont durumunu günceller"""
         try:
-            self.supabase.table('receipts').update({'status': status}).eq('id', receipt_id).execute()
+            await self._execute(self.supabase.table('receipts').update({'status': status}).eq('id', receipt_id))
+            # Kontenjan kontrolündeki onaylı dekont sayısı (bkz. UserHandler.get_approved_count)
+            get_invalidation_bus().publish(keys=['approved_receipts_count'])
             return True
         except Exception as e:
             print(f"Dekont durumu güncelleme hatası: {e}")
@@ -379,69 +559,117 @@ class DatabaseService:
     
     # Grup üyeliği işlemleri
     async def add_group_member(self, user_id: int, group_id: int, status: str = 'active') -> Optional[Dict]:
-        """Kullanıcıya grup kaydı ekler (status: invited|active)"""
+        """
+        Kullanıcıya grup kaydı ekler (status: invited|active)
+        Tek istekte upsert: ON CONFLICT (user_id, group_id) DO UPDATE
+        (group_members_user_group_key unique index'i gerekir, yoksa eski iki adımlı yola düşer)
+        """
+        member_data = {
+            'user_id': user_id,
+            'group_id': group_id,
+            'joined_at': datetime.now().isoformat(),
+            'status': status
+        }
+        try:
+            result = await self._execute(self.supabase.table('group_members').upsert(member_data, on_conflict='user_id,group_id'))
+            return result.data[0] if result.data else None
+        except Exception as e:
+            # 42P10: ON CONFLICT'e uyan unique constraint yok (migration uygulanmamış)
+            if '42P10' not in str(e):
+                print(f"Grup üyesi ekleme hatası: {e}")
+                return None
+        
         try:
             # Önce kullanıcının zaten grupta olup olmadığını kontrol et
-            existing_member = self.supabase.table('group_members').select('*').eq('user_id', user_id).eq('group_id', group_id).execute()
+            existing_member = await self._execute(self.supabase.table('group_members').select('id').eq('user_id', user_id).eq('group_id', group_id).limit(1))
             
             if existing_member.data:
                 # Kullanıcı zaten grupta, sadece durumu güncelle
-                member_data = {
+                update_data = {
                     'status': status,
-                    'joined_at': datetime.now().isoformat()
+                    'joined_at': member_data['joined_at']
                 }
-                result = self.supabase.table('group_members').update(member_data).eq('user_id', user_id).eq('group_id', group_id).execute()
+                result = await self._execute(self.supabase.table('group_members').update(update_data).eq('user_id', user_id).eq('group_id', group_id))
                 return result.data[0] if result.data else None
             else:
                 # Yeni üye ekle
-                member_data = {
-                    'user_id': user_id,
-                    'group_id': group_id,
-                    'joined_at': datetime.now().isoformat(),
-                    'status': status
-                }
-                result = self.supabase.table('group_members').insert(member_data).execute()
+                result = await self._execute(self.supabase.table('group_members').insert(member_data))
                 return result.data[0] if result.data else None
         except Exception as e:
             print(f"Grup üyesi ekleme hatası: {e}")
             return None
     
     @db_safe_execute(default_return=[])
-    async def get_group_members(self, group_id: int, limit: int = 100, offset: int = 0) -> List[Dict]:
+    async def get_group_members(self, group_id: int, limit: int = 100, offset: int = 0, cursor: Optional[str] = None) -> List[Dict]:
         """
         Grup üyelerini getirir (her kullanıcı sadece bir kez, pagination ile)
-        Admin panel için limit/offset eklenmiş
+        cursor verilirse (veya ilk sayfada) (joined_at, id) keyset pagination kullanılır,
+        offset sadece geriye uyumluluk için
+        Kullanıcının sadece en son kaydı listelenir (DISTINCT ON user_id gibi); eski
+        (duplicate) kayıtlar hiçbir sayfada görünmez ve sayfalar `limit` üyeye kadar doldurulur
         """
+        # SELECT * yerine sadece gerekli kolonları çek
+        columns = 'id, user_id, group_id, status, joined_at, users(user_id, username, first_name, last_name)'
+        batch = limit * 2
         try:
-            # SELECT * yerine sadece gerekli kolonları çek
-            # Her kullanıcı için sadece en son kaydı al (duplicate'ları önle)
-            result = self.supabase.table('group_members').select('id, user_id, group_id, status, joined_at, users(user_id, username, first_name, last_name)').eq('group_id', group_id).order('joined_at', desc=True).limit(limit * 2).range(offset, offset + (limit * 2) - 1).execute()
-            
-            if not result.data:
-                return []
-            
-            # Her kullanıcı için sadece bir kayıt tut (en son olanı)
-            unique_members = {}
-            for member in result.data:
-                user_id = member.get('user_id')
-                if user_id and user_id not in unique_members:
-                    unique_members[user_id] = member
-                    # Limit'e ulaştıysak dur
-                    if len(unique_members) >= limit:
-                        break
+            if offset and not cursor:
+                result = await self._execute(
+                    self.supabase.table('group_members').select(columns).eq('group_id', group_id)
+                    .order('joined_at', desc=True).order('id', desc=True).range(offset, offset + batch - 1))
+                return await self._latest_members(group_id, result.data or [], limit, set())
             
-            return list(unique_members.values())
+            members: List[Dict] = []
+            seen: set = set()
+            after = cursor
+            # Duplicate'lar atlandıkça sayfa dolana veya kayıtlar bitene kadar devam edilir
+            # (sayfa `limit`ten kısaysa next_cursor doğru şekilde None olur)
+            while len(members) < limit:
+                query = self.supabase.table('group_members').select(columns).eq('group_id', group_id)
+                result = await self._execute(self._keyset(query, 'joined_at', after).limit(batch))
+                rows = result.data or []
+                members.extend(await self._latest_members(group_id, rows, limit - len(members), seen))
+                if len(rows) < batch:
+                    break
+                after = encode_cursor(rows[-1].get('joined_at'), rows[-1].get('id'))
+            return members
         except Exception as e:
             print(f"Grup üyelerini getirme hatası: {e}")
             return []
     
+    async def _latest_members(self, group_id: int, rows: List[Dict], limit: int, seen: set) -> List[Dict]:
+        """
+        rows içinden kullanıcısının en son kaydı olan satırları sırayla seçer (en fazla limit; seen güncellenir)
+        Daha yeni kaydı başka bir sayfada olan kullanıcının eski satırı atlanır; böylece
+        duplicate'lar sayfalar arasında da tekrar etmez
+        """
+        user_ids = list({row.get('user_id') for row in rows if row.get('user_id') and row.get('user_id') not in seen})
+        if not user_ids:
+            return []
+        # Bu kullanıcıların tüm kayıtları (yeniden eskiye); kullanıcı başına ilki en sonuncusu
+        result = await self._execute(
+            self.supabase.table('group_members').select('id, user_id').eq('group_id', group_id)
+            .in_('user_id', user_ids).order('joined_at', desc=True).order('id', desc=True))
+        latest: Dict[Any, Any] = {}
+        for row in result.data or []:
+            latest.setdefault(row.get('user_id'), row.get('id'))
+        
+        members = []
+        for row in rows:
+            user_id = row.get('user_id')
+            if len(members) >= limit:
+                break
+            if user_id and user_id not in seen and latest.get(user_id) == row.get('id'):
+                seen.add(user_id)
+                members.append(row)
+        return members
+    
     @db_safe_execute(default_return=0)
     async def count_group_members(self, group_id: int) -> int:
         """Grup üyesi sayısını getirir (COUNT query, unique user_id bazlı)"""
         try:
             # Her kullanıcı için sadece bir kayıt say (en son olanı)
             # Bu basitleştirilmiş bir sayım, tam doğruluk için get_group_members kullanılabilir
-            result = self.supabase.table('group_members').select('user_id', count='exact').eq('group_id', group_id).execute()
+            result = await self._execute(self.supabase.table('group_members').select('user_id', count='exact').eq('group_id', group_id))
             # COUNT exact kullanılamazsa unique user_id sayısı için DISTINCT kullan
             # Ancak Supabase client'ta DISTINCT direkt desteklenmiyor, bu yüzden tüm kayıtları çekip unique sayısını hesaplıyoruz
             # Daha verimli için SQL view kullanılabilir, şimdilik bu şekilde
@@ -453,30 +681,48 @@ class DatabaseService:
     async def remove_group_member(self, user_id: int, group_id: int) -> bool:
         """Kullanıcıyı gruptan çıkarır"""
         try:
-            self.supabase.table('group_members').delete().eq('user_id', user_id).eq('group_id', group_id).execute()
+            await self._execute(self.supabase.table('group_members').delete().eq('user_id', user_id).eq('group_id', group_id))
             return True
         except Exception as e:
             print(f"Grup üyesi çıkarma hatası: {e}")
             return False
     
     async def cleanup_duplicate_members(self, group_id: int) -> bool:
-        """Grup üyelerindeki duplicate kayıtları temizler"""
+        """
+        Grup üyelerindeki duplicate kayıtları temizler
+        Tek server-side DELETE (cleanup_duplicate_group_members RPC); fonksiyon yoksa
+        sadece id/user_id çekilip duplicate'lar tek bir in_ DELETE ile silinir
+        """
+        try:
+            result = await self._execute(self.supabase.rpc('cleanup_duplicate_group_members', {'p_group_id': group_id}))
+            print(f"Silinen duplicate üye sayısı: {result.data}")
+            return True
+        except Exception as e:
+            # PGRST202: RPC fonksiyonu bulunamadı (migration uygulanmamış)
+            if 'PGRST202' not in str(e):
+                print(f"Duplicate üye temizleme hatası: {e}")
+                return False
+        
         try:
-            # Önce tüm üyeleri al
-            result = self.supabase.table('group_members').select('*').eq('group_id', group_id).order('joined_at', desc=True).execute()
+            # Sadece gerekli kolonları al (en yeni kayıt önce)
+            result = await self._execute(self.supabase.table('group_members').select('id, user_id').eq('group_id', group_id).order('joined_at', desc=True).order('id', desc=True))
             
             if not result.data:
                 return True
             
-            # Her kullanıcı için sadece en son kaydı tut, diğerlerini sil
+            # Her kullanıcı için sadece en son kaydı tut, diğerlerini topla
             unique_user_ids = set()
+            duplicate_ids = []
             for member in result.data:
                 user_id = member.get('user_id')
                 if user_id and user_id not in unique_user_ids:
                     unique_user_ids.add(user_id)
                 else:
-                    # Duplicate kaydı sil
-                    self.supabase.table('group_members').delete().eq('id', member['id']).execute()
+                    duplicate_ids.append(member['id'])
+            
+            # Duplicate kayıtları toplu sil (URL uzunluğu için 500'lük parçalar)
+            for i in range(0, len(duplicate_ids), 500):
+                await self._execute(self.supabase.table('group_members').delete().in_('id', duplicate_ids[i:i + 500]))
             
             return True
         except Exception as e:
@@ -484,6 +730,7 @@ class DatabaseService:
             return False
 
     # Bot ayarları (komut mesajları)
+    @coalesce()
     @db_safe_execute(default_return={
         'start_message': 'Hoş geldiniz! /start ile başlayın.',
         'help_message': 'Yardım: /start, /admin, /help',
@@ -495,10 +742,29 @@ class DatabaseService:
         'shopier_payment_url': None
     })
     async def get_bot_settings(self) -> Dict:
-        """Bot ayarlarını getirir (tek satır beklenir, sadece gerekli kolonlar)."""
+        """Bot ayarlarını getirir (içerik aynasından; satır yoksa DB'de varsayılan oluşturulur)."""
+        mirror = get_content_mirror()
+        if await mirror.ensure_fresh(self):
+            settings = mirror.get_bot_settings()
+            if settings is not None:
+                return settings
+        return await self._fetch_bot_settings()
+
+    @db_safe_execute(default_return={
+        'start_message': 'Hoş geldiniz! /start ile başlayın.',
+        'help_message': 'Yardım: /start, /admin, /help',
+        'intro_message': None,
+        'promotion_message': None,
+        'payment_message': None,
+        'commands': None,
+        'group_id': None,
+        'shopier_payment_url': None
+    })
+    async def _fetch_bot_settings(self) -> Dict:
+        """Bot ayarlarını doğrudan Supabase'den getirir (tek satır beklenir, sadece gerekli kolonlar)."""
         try:
             # SELECT * yerine sadece gerekli kolonları çek
-            res = self.supabase.table('bot_settings').select('id, start_message, help_message, intro_message, promotion_message, payment_message, commands, group_id, shopier_payment_url').limit(1).execute()
+            res = await self._execute(self.supabase.table('bot_settings').select('id, start_message, help_message, intro_message, promotion_message, payment_message, commands, group_id, shopier_payment_url').limit(1))
             if res.data:
                 return res.data[0]
             # yoksa varsayılan üret
@@ -512,7 +778,8 @@ class DatabaseService:
                 'group_id': None,
                 'shopier_payment_url': None
             }
-            self.supabase.table('bot_settings').insert(defaults).execute()
+            await self._execute(self.supabase.table('bot_settings').insert(defaults))
+            get_content_mirror().mark_stale()
             return defaults
         except Exception as e:
             print(f"Bot ayarlarını getirme hatası: {e}")
@@ -530,7 +797,7 @@ class DatabaseService:
     async def update_bot_settings(self, start_message: Optional[str] = None, help_message: Optional[str] = None, intro_message: Optional[str] = None, promotion_message: Optional[str] = None, payment_message: Optional[str] = None, commands: Optional[str] = None, group_id: Optional[str] = None, shopier_payment_url: Optional[str] = None) -> bool:
         """Bot ayarlarını günceller veya oluşturur."""
         try:
-            res = self.supabase.table('bot_settings').select('id').limit(1).execute()
+            res = await self._execute(self.supabase.table('bot_settings').select('id').limit(1))
             payload: Dict[str, Any] = {}
             if start_message is not None:
                 payload['start_message'] = start_message
@@ -550,11 +817,14 @@ class DatabaseService:
                 payload['shopier_payment_url'] = shopier_payment_url
             if not payload:
                 return True
+            # İçerik aynası değişikliği updated_at üzerinden tespit eder
+            payload['updated_at'] = datetime.now().isoformat()
             if res.data:
                 bot_id = res.data[0]['id']
-                self.supabase.table('bot_settings').update(payload).eq('id', bot_id).execute()
+                await self._execute(self.supabase.table('bot_settings').update(payload).eq('id', bot_id))
             else:
-                self.supabase.table('bot_settings').insert(payload).execute()
+                await self._execute(self.supabase.table('bot_settings').insert(payload))
+            get_content_mirror().mark_stale()
             return True
         except Exception as e:
             print(f"Bot ayarları güncelleme hatası: {e}")
@@ -563,7 +833,7 @@ class DatabaseService:
     # Admin kullanıcıları
     async def get_admin_by_email(self, email: str) -> Optional[Dict]:
         try:
-            res = self.supabase.table('admins').select('*').eq('email', email).limit(1).execute()
+            res = await self._execute(self.supabase.table('admins').select('*').eq('email', email).limit(1))
             return res.data[0] if res.data else None
         except Exception as e:
             print(f"Admin getirme hatası: {e}")
@@ -577,7 +847,7 @@ class DatabaseService:
                 'password_hash': password_hash,
                 'created_at': datetime.now().isoformat()
             }
-            res = self.supabase.table('admins').insert(payload).execute()
+            res = await self._execute(self.supabase.table('admins').insert(payload))
             return res.data[0] if res.data else None
         except Exception as e:
             print(f"Admin oluşturma hatası: {e}")
@@ -585,7 +855,7 @@ class DatabaseService:
 
     async def count_admins(self) -> int:
         try:
-            res = self.supabase.table('admins').select('id').execute()
+            res = await self._execute(self.supabase.table('admins').select('id'))
             return len(res.data) if res.data else 0
         except Exception as e:
             print(f"Admin sayısı hatası: {e}")
@@ -593,7 +863,7 @@ class DatabaseService:
 
     async def list_admins(self) -> List[Dict]:
         try:
-            res = self.supabase.table('admins').select('id, username, email, created_at').execute()
+            res = await self._execute(self.supabase.table('admins').select('id, username, email, created_at'))
             return res.data if res.data else []
         except Exception as e:
             print(f"Admin listeleme hatası: {e}")
@@ -617,7 +887,7 @@ class DatabaseService:
         """
         try:
             # SELECT * yerine sadece gerekli kolonları çek, limit/offset ekle
-            result = self.supabase.table('messages').select('id, type, title, content, order_index, delay, is_active, created_at, updated_at').order('order_index').limit(limit).range(offset, offset + limit - 1).execute()
+            result = await self._execute(self.supabase.table('messages').select('id, type, title, content, order_index, delay, is_active, created_at, updated_at').order('order_index').limit(limit).range(offset, offset + limit - 1))
             return result.data if result.data else []
         except Exception as e:
             print(f"Mesajları getirme hatası: {e}")
@@ -626,7 +896,7 @@ class DatabaseService:
     async def get_message(self, message_id: int) -> Optional[Dict]:
         """Belirli bir mesajı getirir"""
         try:
-            result = self.supabase.table('messages').select('*').eq('id', message_id).execute()
+            result = await self._execute(self.supabase.table('messages').select('*').eq('id', message_id))
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Mesaj getirme hatası: {e}")
@@ -645,7 +915,8 @@ class DatabaseService:
                 'created_at': datetime.now().isoformat()
             }
             
-            result = self.supabase.table('messages').insert(message_data).execute()
+            result = await self._execute(self.supabase.table('messages').insert(message_data))
+            self._messages_changed()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Mesaj ekleme hatası: {e}")
@@ -664,7 +935,8 @@ class DatabaseService:
                 'updated_at': datetime.now().isoformat()
             }
             
-            self.supabase.table('messages').update(update_data).eq('id', message_id).execute()
+            await self._execute(self.supabase.table('messages').update(update_data).eq('id', message_id))
+            self._messages_changed()
             return True
         except Exception as e:
             print(f"Mesaj güncelleme hatası: {e}")
@@ -673,7 +945,8 @@ class DatabaseService:
     async def delete_message(self, message_id: int) -> bool:
         """Mesajı siler"""
         try:
-            self.supabase.table('messages').delete().eq('id', message_id).execute()
+            await self._execute(self.supabase.table('messages').delete().eq('id', message_id))
+            self._messages_changed()
             return True
         except Exception as e:
             print(f"Mesaj silme hatası: {e}")
@@ -689,10 +962,11 @@ class DatabaseService:
             
             new_status = not message.get('is_active', True)
             
-            self.supabase.table('messages').update({
+            await self._execute(self.supabase.table('messages').update({
                 'is_active': new_status,
                 'updated_at': datetime.now().isoformat()
-            }).eq('id', message_id).execute()
+            }).eq('id', message_id))
+            self._messages_changed()
             
             return True
         except Exception as e:
@@ -700,27 +974,59 @@ class DatabaseService:
             return False
 
     async def reorder_messages(self, updates: List[Dict]) -> bool:
-        """Mesajların sırasını günceller"""
-        try:
-            for update in updates:
-                if 'id' in update and 'order_index' in update:
-                    self.supabase.table('messages').update({
-                        'order_index': update['order_index'],
-                        'updated_at': datetime.now().isoformat()
-                    }).eq('id', update['id']).execute()
+        """
+        Mesajların sırasını günceller
+        Tüm (id, order_index) çiftleri tek istekte gönderilir (reorder_messages RPC);
+        fonksiyon yoksa mesaj başına UPDATE'e düşer
+        """
+        pairs = [
+            {'id': update['id'], 'order_index': update['order_index']}
+            for update in updates
+            if 'id' in update and 'order_index' in update
+        ]
+        if not pairs:
+            return True
+        
+        try:
+            await self._execute(self.supabase.rpc('reorder_messages', {'p_updates': pairs}))
+            self._messages_changed()
+            return True
+        except Exception as e:
+            # PGRST202: RPC fonksiyonu bulunamadı (migration uygulanmamış)
+            if 'PGRST202' not in str(e):
+                print(f"Mesaj sırası güncelleme hatası: {e}")
+                return False
+        
+        try:
+            for pair in pairs:
+                await self._execute(self.supabase.table('messages').update({
+                    'order_index': pair['order_index'],
+                    'updated_at': datetime.now().isoformat()
+                }).eq('id', pair['id']))
+            self._messages_changed()
             
             return True
         except Exception as e:
             print(f"Mesaj sırası güncelleme hatası: {e}")
             return False
 
-    async def get_messages_by_type(self, message_type: str) -> List[Dict]:
-        """Belirli türdeki mesajları sırayla getirir"""
+    @coalesce()
+    async def get_messages_by_type(self, message_type: str, raise_errors: bool = False) -> List[Dict]:
+        """Belirli türdeki aktif mesajları sırayla getirir (içerik aynasından; raise_errors: bkz. get_questions)"""
+        mirror = get_content_mirror()
+        if await mirror.ensure_fresh(self):
+            return mirror.get_messages_by_type(message_type)
+        return await self._fetch_messages_by_type(message_type, raise_errors)
+
+    async def _fetch_messages_by_type(self, message_type: str, raise_errors: bool = False) -> List[Dict]:
+        """Belirli türdeki aktif mesajları doğrudan Supabase'den getirir"""
         try:
-            result = self.supabase.table('messages').select('*').eq('type', message_type).eq('is_active', True).order('order_index').execute()
+            result = await self._execute(self.supabase.table('messages').select('*').eq('type', message_type).eq('is_active', True).order('order_index'))
             return result.data if result.data else []
         except Exception as e:
             print(f"Tür bazlı mesaj getirme hatası: {e}")
+            if raise_errors:
+                raise
             return []
 
     async def get_welcome_messages(self) -> List[Dict]:
@@ -739,52 +1045,83 @@ class DatabaseService:
         """SSS mesajlarını getirir"""
         return await self.get_messages_by_type('sss')
 
-    async def update_payment_messages_with_new_link(self, new_payment_url: str) -> bool:
-        """Ödeme linki değiştiğinde, ödeme mesajlarındaki {payment_link} placeholder'ını günceller"""
-        try:
-            # Tüm ödeme mesajlarını al
-            payment_messages = await self.get_payment_messages()
-            
-            for message in payment_messages:
-                if '{payment_link}' in message['content']:
-                    # Placeholder'ı yeni link ile değiştir
-                    updated_content = message['content'].replace('{payment_link}', new_payment_url)
-                    
-                    # Mesajı güncelle
-                    await self.update_message(
-                        message_id=message['id'],
-                        type=message['type'],
-                        title=message['title'],
-                        content=updated_content,
-                        order_index=message['order_index'],
-                        delay=message.get('delay', 1.0),
-                        is_active=message.get('is_active', True)
-                    )
-            
-            return True
-        except Exception as e:
-            print(f"Ödeme mesajları güncelleme hatası: {e}")
-            return False
-    
     # Wishlist işlemleri
-    async def count_approved_receipts(self) -> int:
-        """Onaylanmış dekont sayısını getirir (300 kişi limiti için)"""
+    async def count_approved_receipts(self, raise_errors: bool = False) -> int:
+        """Onaylanmış dekont sayısını getirir (300 kişi limiti için; raise_errors: bkz. get_questions)"""
         try:
-            result = self.supabase.table('receipts').select('id', count='exact').eq('status', 'approved').execute()
+            result = await self._execute(self.supabase.table('receipts').select('id', count='exact').eq('status', 'approved'))
             return result.count if hasattr(result, 'count') else len(result.data) if result.data else 0
         except Exception as e:
             print(f"Onaylanmış dekont sayısı getirme hatası: {e}")
+            if raise_errors:
+                raise
             return 0
     
     async def count_receipts_by_status(self, status: str) -> int:
         """Belirli status'ta dekont sayısını getirir"""
         try:
-            result = self.supabase.table('receipts').select('id', count='exact').eq('status', status).execute()
+            result = await self._execute(self.supabase.table('receipts').select('id', count='exact').eq('status', status))
             return result.count if hasattr(result, 'count') else len(result.data) if result.data else 0
         except Exception as e:
             print(f"Dekont sayısı getirme hatası ({status}): {e}")
             return 0
     
+    # İstatistikler
+    async def get_stats_snapshot(self, group_id: int) -> Dict[str, int]:
+        """
+        Tüm sayaçları tek satırda döndürür (kısa TTL cache'li)
+        /api/stats ve bot'un istatistik ekranı bunu kullanır
+        """
+        cache = get_cache()
+        cache_key = f'stats_snapshot:{group_id}'
+        snapshot = await cache.aget(cache_key)
+        if snapshot is not None:
+            return snapshot
+        
+        snapshot = await self._load_stats_snapshot(group_id)
+        cache.set(cache_key, snapshot, ttl=Config.STATS_CACHE_TTL)
+        return snapshot
+    
+    @coalesce()
+    async def _load_stats_snapshot(self, group_id: int) -> Dict[str, int]:
+        """get_bot_stats RPC'si ile tek sorguda sayaçları yükler (yoksa sayımlar paralel yapılır)"""
+        counters = None
+        try:
+            result = await self._execute(self.supabase.rpc('get_bot_stats', {'p_group_id': group_id}))
+            counters = result.data[0] if isinstance(result.data, list) and result.data else result.data
+        except Exception as e:
+            # PGRST202: RPC fonksiyonu bulunamadı (migration uygulanmamış)
+            if 'PGRST202' not in str(e):
+                print(f"İstatistik getirme hatası: {e}")
+        
+        if not isinstance(counters, dict):
+            total_users, pending_payments, total_members, approved_receipts, pending_receipts, rejected_receipts, wishlist_count = await asyncio.gather(
+                self.count_all_users(),
+                self.count_pending_payments(),
+                self.count_group_members(group_id),
+                self.count_approved_receipts(),
+                self.count_receipts_by_status('pending'),
+                self.count_receipts_by_status('rejected'),
+                self.count_wishlist()
+            )
+            counters = {
+                'total_users': total_users,
+                'pending_payments': pending_payments,
+                'total_members': total_members,
+                'approved_receipts': approved_receipts,
+                'pending_receipts': pending_receipts,
+                'rejected_receipts': rejected_receipts,
+                'wishlist_count': wishlist_count
+            }
+        
+        snapshot = {key: int(counters.get(key) or 0) for key in (
+            'total_users', 'pending_payments', 'total_members', 'approved_receipts',
+            'pending_receipts', 'rejected_receipts', 'wishlist_count'
+        )}
+        # Toplam ödeme = Onaylanmış dekontlar (dekont onayı = ödeme onayı)
+        snapshot['total_payments'] = snapshot['approved_receipts']
+        return snapshot
+    
     async def add_to_wishlist(self, user_id: int, payment_id: int = None, receipt_id: int = None) -> Optional[Dict]:
         """Kullanıcıyı bekleme listesine ekler"""
         try:
@@ -802,21 +1139,27 @@ class DatabaseService:
                 'created_at': datetime.now().isoformat()
             }
             
-            result = self.supabase.table('wishlist').insert(wishlist_data).execute()
+            result = await self._execute(self.supabase.table('wishlist').insert(wishlist_data))
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Wishlist ekleme hatası: {e}")
             return None
     
     @db_safe_execute(default_return=[])
-    async def get_wishlist(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+    async def get_wishlist(self, limit: int = 100, offset: int = 0, cursor: Optional[str] = None) -> List[Dict]:
         """
-        Bekleme listesindeki kullanıcıları getirir (pagination ile)
-        Admin panel için limit/offset eklenmiş
+        Bekleme listesindeki kullanıcıları getirir (pagination ile, en eski önce)
+        cursor verilirse (veya ilk sayfada) (created_at, id) keyset pagination kullanılır,
+        offset sadece geriye uyumluluk için
         """
+        # SELECT * yerine sadece gerekli kolonları çek
+        query = self.supabase.table('wishlist').select('id, user_id, payment_id, receipt_id, status, created_at, users(user_id, username, first_name, last_name)').eq('status', 'waiting')
+        if cursor or not offset:
+            query = self._keyset(query, 'created_at', cursor, desc=False).limit(limit)
+        else:
+            query = query.order('created_at', desc=False).order('id', desc=False).range(offset, offset + limit - 1)
         try:
-            # SELECT * yerine sadece gerekli kolonları çek, limit/offset ekle
-            result = self.supabase.table('wishlist').select('id, user_id, payment_id, receipt_id, status, created_at, users(user_id, username, first_name, last_name)').eq('status', 'waiting').order('created_at', desc=False).limit(limit).range(offset, offset + limit - 1).execute()
+            result = await self._execute(query)
             return result.data if result.data else []
         except Exception as e:
             print(f"Wishlist getirme hatası: {e}")
@@ -826,7 +1169,7 @@ class DatabaseService:
     async def count_wishlist(self) -> int:
         """Wishlist sayısını getirir (COUNT query)"""
         try:
-            result = self.supabase.table('wishlist').select('id', count='exact').eq('status', 'waiting').execute()
+            result = await self._execute(self.supabase.table('wishlist').select('id', count='exact').eq('status', 'waiting'))
             return result.count if hasattr(result, 'count') and result.count is not None else (len(result.data) if result.data else 0)
         except Exception as e:
             print(f"Wishlist sayısı getirme hatası: {e}")
@@ -842,7 +1185,7 @@ class DatabaseService:
                 # Status belirtilmemişse waiting veya invited olanları getir
                 query = query.in_('status', ['waiting', 'invited'])
             
-            result = query.execute()
+            result = await self._execute(query)
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Kullanıcı wishlist getirme hatası: {e}")
@@ -851,7 +1194,7 @@ class DatabaseService:
     async def get_wishlist_by_id(self, wishlist_id: int) -> Optional[Dict]:
         """ID'ye göre wishlist kaydını getirir"""
         try:
-            result = self.supabase.table('wishlist').select('*').eq('id', wishlist_id).execute()
+            result = await self._execute(self.supabase.table('wishlist').select('*').eq('id', wishlist_id))
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Wishlist ID getirme hatası: {e}")
@@ -860,7 +1203,7 @@ class DatabaseService:
     async def update_wishlist_status(self, wishlist_id: int, status: str) -> bool:
         """Wishlist durumunu günceller (waiting -> invited)"""
         try:
-            self.supabase.table('wishlist').update({'status': status}).eq('id', wishlist_id).execute()
+            await self._execute(self.supabase.table('wishlist').update({'status': status}).eq('id', wishlist_id))
             return True
         except Exception as e:
             print(f"Wishlist durumu güncelleme hatası: {e}")
@@ -869,7 +1212,7 @@ class DatabaseService:
     async def remove_from_wishlist(self, wishlist_id: int) -> bool:
         """Kullanıcıyı wishlist'ten çıkarır"""
         try:
-            self.supabase.table('wishlist').delete().eq('id', wishlist_id).execute()
+            await self._execute(self.supabase.table('wishlist').delete().eq('id', wishlist_id))
             return True
         except Exception as e:
             print(f"Wishlist çıkarma hatası: {e}")
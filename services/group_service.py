@@ -7,6 +7,7 @@ from typing import List, Optional, Dict
 from aiogram import Bot
 from aiogram.types import ChatMember
 from config import Config
+from services.send_scheduler import send_lane, BULK, NOTIFICATION
 
 class GroupService:
     """Telegram grup yönetimi servisi"""
@@ -28,40 +29,42 @@ class GroupService:
             Başarı durumu
         """
         try:
-            # Onay mesajı gönder
-            if from_wishlist:
-                await self.bot.send_message(
-                    chat_id=user_id,
-                    text=(
-                        "🎉 Tebrikler!\n\n"
-                        "Bekleme listesinden çıkarıldınız ve artık grubumuza katılabilirsiniz!\n\n"
-                        "Davet linki birazdan gönderilecek."
+            # Onaylanan kullanıcıya mesajlar o anki update'in cevabı değildir; wishlist'ten gelenler toplu şeritte
+            with send_lane(BULK if from_wishlist else NOTIFICATION):
+                # Onay mesajı gönder
+                if from_wishlist:
+                    await self.bot.send_message(
+                        chat_id=user_id,
+                        text=(
+                            "🎉 Tebrikler!\n\n"
+                            "Bekleme listesinden çıkarıldınız ve artık grubumuza katılabilirsiniz!\n\n"
+                            "Davet linki birazdan gönderilecek."
+                        )
+                    )
+                else:
+                    await self.bot.send_message(
+                        chat_id=user_id,
+                        text=(
+                            "✅ Ödemeniz/dekontunuz onaylandı!\n\n"
+                            "Şimdi grubumuza katılabilirsiniz. Davet linki birazdan gönderilecek."
+                        )
                     )
+
+                # Kullanıcı için tek kullanımlık davet linki oluştur
+                invite_link = await self.bot.create_chat_invite_link(
+                    chat_id=self.group_id,
+                    member_limit=1
                 )
-            else:
+            
+                # Kullanıcıya davet linkini gönder
                 await self.bot.send_message(
                     chat_id=user_id,
                     text=(
-                        "✅ Ödemeniz/dekontunuz onaylandı!\n\n"
-                        "Şimdi grubumuza katılabilirsiniz. Davet linki birazdan gönderilecek."
+                        "🎉 Tebrikler!\n\n"
+                        "Grubumuza katılmak için aşağıdaki linke tıklayın:\n"
+                        f"{invite_link.invite_link}"
                     )
                 )
-
-            # Kullanıcı için tek kullanımlık davet linki oluştur
-            invite_link = await self.bot.create_chat_invite_link(
-                chat_id=self.group_id,
-                member_limit=1
-            )
-            
-            # Kullanıcıya davet linkini gönder
-            await self.bot.send_message(
-                chat_id=user_id,
-                text=(
-                    "🎉 Tebrikler!\n\n"
-                    "Grubumuza katılmak için aşağıdaki linke tıklayın:\n"
-                    f"{invite_link.invite_link}"
-                )
-            )
             
             # Supabase'e 'invited' olarak kaydet
             try:
@@ -146,16 +149,17 @@ class GroupService:
             if not payment_url:
                 payment_url = "💳 Ödeme linki henüz ayarlanmamış. Lütfen admin ile iletişime geçin."
             
-            # Kullanıcıya mesaj gönder
-            await self.bot.send_message(
-                chat_id=user_id,
-                text=(
-                    "🎉 Tebrikler!\n\n"
-                    "Kontenjana dahil edilme hakkı kazandın.\n\n"
-                    f"Şimdi aboneliğini aşağıdaki linkten gerçekleştirip, ödeme dekontunu bize atıp onaydan sonra gruba hemen katılabilirsin.\n\n"
-                    f"{payment_url}"
+            # Kullanıcıya mesaj gönder (toplu şerit: etkileşimli cevapların önüne geçmez)
+            with send_lane(BULK):
+                await self.bot.send_message(
+                    chat_id=user_id,
+                    text=(
+                        "🎉 Tebrikler!\n\n"
+                        "Kontenjana dahil edilme hakkı kazandın.\n\n"
+                        f"Şimdi aboneliğini aşağıdaki linkten gerçekleştirip, ödeme dekontunu bize atıp onaydan sonra gruba hemen katılabilirsin.\n\n"
+                        f"{payment_url}"
+                    )
                 )
-            )
             
             return True
             
@@ -294,17 +298,18 @@ class GroupService:
         
         for word in banned_words:
             if word in message_lower:
-                # Kullanıcıya uyarı gönder
+                # Kullanıcıya uyarı gönder (toplu şerit)
                 try:
-                    await self.bot.send_message(
-                        chat_id=user_id,
-                        text=(
-                            "⚠️ **Uyarı!**\n\n"
-                            "Grup kurallarına aykırı mesaj gönderdiniz. "
-                            "Lütfen grup kurallarına uyun.\n\n"
-                            "❌ **Yasaklı kelime:** " + word
+                    with send_lane(BULK):
+                        await self.bot.send_message(
+                            chat_id=user_id,
+                            text=(
+                                "⚠️ **Uyarı!**\n\n"
+                                "Grup kurallarına aykırı mesaj gönderdiniz. "
+                                "Lütfen grup kurallarına uyun.\n\n"
+                                "❌ **Yasaklı kelime:** " + word
+                            )
                         )
-                    )
                 except Exception as e:
                     print(f"Uyarı gönderme hatası: {e}")
                 
@@ -344,11 +349,12 @@ class GroupService:
             Başarı durumu
         """
         try:
-            await self.bot.send_message(
-                chat_id=self.group_id,
-                text=message_text,
-                parse_mode=parse_mode
-            )
+            with send_lane(BULK):
+                await self.bot.send_message(
+                    chat_id=self.group_id,
+                    text=message_text,
+                    parse_mode=parse_mode
+                )
             return True
         except Exception as e:
             print(f"Grup mesajı gönderme hatası: {e}")
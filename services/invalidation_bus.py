@@ -0,0 +1,399 @@
+"""
+Cache Invalidation Bus
+Admin paneli (app.py) ile bot (main.py) ayrı process'lerde çalışır ve her birinin
+kendi in-memory cache'i vardır. Bu modül key/tag/generation invalidation'larını çalışan tüm
+bot ve web worker process'lerine yayar; böylece bot uzun TTL'leri güvenle kullanır.
+
+Transport'lar (Config.CACHE_BUS_TRANSPORT):
+- unix:     Aynı makinedeki process'ler; ortak dizinde (CACHE_BUS_DIR) her process
+            bir Unix datagram soketi açar, yayın dizindeki tüm soketlere gönderilir
+- supabase: Farklı makinelerdeki servisler (ör. Render web + worker); mesajlar
+            `cache_invalidations` tablosuna yazılır, diğer process'ler periyodik okur
+- redis:    CACHE_BACKEND=redis ile; Redis pub/sub kanalı (near cache'ler anında temizlenir)
+- none:     Sadece yerel cache temizlenir
+
+Bot tarafı event loop'a bağlanır (start), web tarafı daemon thread kullanır (start_thread).
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import asyncio
+import atexit
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from config import Config
+from services.cache_service import get_cache
+
+logger = logging.getLogger(__name__)
+
+# Datagram başına üst sınır (invalidation mesajları küçük)
+_MAX_DATAGRAM = 64 * 1024
+
+class UnixSocketTransport:
+    """Ortak dizindeki Unix datagram soketleri üzerinden yayın"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path: Optional[str] = None
+        self.sock: Optional[socket.socket] = None
+
+    def open(self, origin: str) -> None:
+        """Bu process'in soketini oluşturur"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f'{origin}.sock')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self.sock = sock
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def send(self, payload: bytes) -> None:
+        """Dizindeki diğer tüm soketlere gönderir; ölü soketleri temizler"""
+        sender = self.sock or socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            for path in glob.glob(os.path.join(self.directory, '*.sock')):
+                if path == self.path:
+                    continue
+                try:
+                    sender.sendto(payload, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Process kapanmış, soket dosyası kalmış
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                except BlockingIOError:
+                    logger.warning("Invalidation alıcısının kuyruğu dolu, mesaj düştü: %s", path)
+        finally:
+            if sender is not self.sock:
+                sender.close()
+
+    def recv_nowait(self) -> List[bytes]:
+        """Bekleyen tüm datagram'ları okur"""
+        messages = []
+        while self.sock is not None:
+            try:
+                messages.append(self.sock.recv(_MAX_DATAGRAM))
+            except (BlockingIOError, InterruptedError):
+                break
+        return messages
+
+
+class SupabaseTransport:
+    """cache_invalidations tablosu üzerinden yayın (farklı makineler için)"""
+
+    TABLE = 'cache_invalidations'
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self.last_id: Optional[int] = None
+
+    def _client(self):
+        from services.supabase_client import get_supabase_client
+        return get_supabase_client()
+
+    def open(self, origin: str) -> None:
+        """Yayın başlangıç noktasını (en son id) belirler; eski mesajlar uygulanmaz"""
+        res = self._client().table(self.TABLE).select('id').order('id', desc=True).limit(1).execute()
+        self.last_id = res.data[0]['id'] if res.data else 0
+
+    def close(self) -> None:
+        pass
+
+    def send(self, payload: bytes) -> None:
+        """Mesajı tabloya yazar (DB executor'ında, çağıranı bloklamaz)"""
+        from services.database import get_db_executor
+        message = json.loads(payload)
+
+        def _insert():
+            try:
+                self._client().table(self.TABLE).insert({'origin': message['origin'], 'payload': message}).execute()
+            except Exception as e:
+                logger.error("Invalidation yayın hatası: %s", e)
+
+        get_db_executor().submit(_insert)
+
+    def cleanup(self) -> None:
+        """Bir saatten eski mesajları siler (senkron; zamanlayıcı işi, yayın yolunda değil)"""
+        cutoff = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() - 3600))
+        self._client().table(self.TABLE).delete().lt('created_at', cutoff).execute()
+
+    def poll(self) -> List[bytes]:
+        """last_id'den sonraki mesajları okur (senkron)"""
+        if self.last_id is None:
+            self.open('')
+        res = (self._client().table(self.TABLE).select('id, payload')
+               .gt('id', self.last_id).order('id').limit(100).execute())
+        messages = []
+        for row in res.data or []:
+            self.last_id = max(self.last_id, row['id'])
+            messages.append(json.dumps(row['payload']).encode('utf-8'))
+        return messages
+
+
+class RedisPubSubTransport:
+    """Redis pub/sub kanalı üzerinden yayın (paylaşılan RedisBackend bağlantısı kullanılır)"""
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.backend = None
+        self.client = None
+        self.pubsub = None
+
+    def open(self, origin: str) -> None:
+        from services.cache_backends import get_shared_backend
+        backend = get_shared_backend()
+        if backend is None:
+            raise RuntimeError("redis transport için CACHE_BACKEND=redis gerekli")
+        self.backend = backend
+        self.client = backend.client
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(self.channel)
+
+    def close(self) -> None:
+        if self.pubsub is not None:
+            try:
+                self.pubsub.close()
+            except Exception:
+                pass
+            self.pubsub = None
+
+    def send(self, payload: bytes) -> None:
+        """Yayınlar; event loop'tan çağrıldıysa redis-io kuyruğuna bırakır (cache silmelerinden sonra uygulanır)"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.backend.publish(self.channel, payload)
+            return
+        if not self.backend.submit(self.backend.publish, self.channel, payload):
+            logger.warning("Redis erişilemez, invalidation diğer process'lere yayınlanamadı")
+
+    def recv(self, timeout: float) -> List[bytes]:
+        """Mesaj gelene kadar en fazla timeout saniye bekler (blocking)"""
+        messages = []
+        message = self.pubsub.get_message(timeout=timeout)
+        while message is not None:
+            if message.get('type') == 'message':
+                messages.append(message['data'])
+            message = self.pubsub.get_message(timeout=0)
+        return messages
+
+
+class InvalidationBus:
+    """Key ve tag invalidation'larını tüm process'lere yayar"""
+
+    def __init__(self, transport: Optional[str] = None):
+        self.transport_name = (transport or Config.CACHE_BUS_TRANSPORT or 'none').lower()
+        self.origin = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._transport: Any = None
+        self._opened = False
+        self._open_lock = threading.Lock()
+        self._listeners: List[Callable[[List[str], List[str], List[str]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._reader_fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # İstatistikler
+        self.published = 0
+        self.received = 0
+
+    def _ensure_transport(self):
+        """Transport'u ilk kullanımda açar; açılamazsa yerel moda düşer"""
+        if self._opened:
+            return self._transport
+        with self._open_lock:
+            if self._opened:
+                return self._transport
+            self._opened = True
+            try:
+                if self.transport_name == 'unix':
+                    transport = UnixSocketTransport(Config.CACHE_BUS_DIR)
+                elif self.transport_name == 'supabase':
+                    transport = SupabaseTransport(Config.CACHE_BUS_POLL_INTERVAL)
+                elif self.transport_name == 'redis':
+                    transport = RedisPubSubTransport(f'{Config.REDIS_KEY_PREFIX}cache_invalidations')
+                else:
+                    return None
+                transport.open(self.origin)
+                atexit.register(transport.close)
+                self._transport = transport
+                logger.info("Cache invalidation bus hazır (%s, origin=%s)", self.transport_name, self.origin)
+            except Exception as e:
+                logger.error("Cache invalidation bus açılamadı, sadece yerel invalidation yapılacak: %s", e)
+                self._transport = None
+            return self._transport
+
+    def add_listener(self, listener: Callable[[List[str], List[str], List[str]], None]) -> None:
+        """Her invalidation'da (yerel veya uzak) çağrılacak fonksiyon ekler: listener(keys, tags, generations)"""
+        self._listeners.append(listener)
+
+    # Yayın
+    def publish(self, keys: Optional[Iterable[str]] = None, tags: Optional[Iterable[str]] = None,
+                generations: Optional[Iterable[str]] = None) -> None:
+        """
+        Key/tag'leri yerel cache'den siler ve diğer process'lere yayar
+
+        Args:
+            keys: Silinecek cache key'leri
+            tags: Silinecek cache tag'leri (bkz. CacheService.invalidate_tag)
+            generations: Artırılacak generation'lar (bkz. CacheService.versioned_key)
+        """
+        keys = list(keys or [])
+        tags = list(tags or [])
+        generations = list(generations or [])
+        if not keys and not tags and not generations:
+            return
+        self._apply(keys, tags, generations, local=True)
+        transport = self._ensure_transport()
+        if transport is None:
+            return
+        payload = json.dumps({'origin': self.origin, 'keys': keys, 'tags': tags,
+                              'generations': generations}).encode('utf-8')
+        try:
+            transport.send(payload)
+            self.published += 1
+        except Exception as e:
+            logger.error("Invalidation yayın hatası: %s", e)
+
+    def _apply(self, keys: List[str], tags: List[str], generations: List[str] = (), local: bool = False) -> None:
+        """Invalidation'ı bu process'in cache'ine uygular (local: yayını bu process yaptı)"""
+        cache = get_cache()
+        for key in keys:
+            cache.delete(key)
+        for tag in tags:
+            cache.invalidate_tag(tag)
+        for name in generations:
+            if local:
+                cache.bump_generation(name)
+            else:
+                cache.forget_generation(name)
+        for listener in self._listeners:
+            try:
+                listener(keys, tags, list(generations))
+            except Exception as e:
+                logger.error("Invalidation listener hatası: %s", e)
+
+    def _handle(self, payloads: List[bytes]) -> None:
+        """Gelen mesajları uygular (kendi yayınlarımız atlanır)"""
+        for payload in payloads:
+            try:
+                message: Dict[str, Any] = json.loads(payload)
+            except ValueError:
+                continue
+            if message.get('origin') == self.origin:
+                continue
+            self.received += 1
+            self._apply(list(message.get('keys') or []), list(message.get('tags') or []),
+                        list(message.get('generations') or []))
+
+    # Dinleme
+    def start(self) -> None:
+        """Bot event loop'unda dinlemeye başlar (unix: add_reader, supabase: polling task, redis: thread)"""
+        transport = self._ensure_transport()
+        if transport is None or self._task is not None or self._reader_fd is not None or self._thread is not None:
+            return
+        loop = asyncio.get_running_loop()
+        if isinstance(transport, UnixSocketTransport):
+            self._reader_fd = transport.sock.fileno()
+            loop.add_reader(self._reader_fd, lambda: self._handle(transport.recv_nowait()))
+        elif isinstance(transport, RedisPubSubTransport):
+            # pub/sub okuması blocking; mesajlar event loop'a aktarılır
+            self._thread = threading.Thread(target=self._listen_blocking, args=(transport, loop),
+                                            name='cache-invalidation-bus', daemon=True)
+            self._thread.start()
+        else:
+            self._task = loop.create_task(self._poll_async(transport))
+
+    async def _poll_async(self, transport: SupabaseTransport) -> None:
+        from services.database import get_db_executor
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                self._handle(await loop.run_in_executor(get_db_executor(), transport.poll))
+            except Exception as e:
+                logger.warning("Invalidation okuma hatası: %s", e)
+            await asyncio.sleep(transport.poll_interval)
+
+    async def stop(self) -> None:
+        """Bot tarafında dinlemeyi durdurur ve soketi kapatır"""
+        if self._reader_fd is not None:
+            asyncio.get_running_loop().remove_reader(self._reader_fd)
+            self._reader_fd = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._transport is not None:
+            self._transport.close()
+
+    def start_thread(self) -> None:
+        """Web process'inde (Flask/gunicorn worker) daemon thread ile dinler"""
+        transport = self._ensure_transport()
+        if transport is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._listen_blocking, args=(transport,),
+                                        name='cache-invalidation-bus', daemon=True)
+        self._thread.start()
+
+    def _listen_blocking(self, transport, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        import select
+        while True:
+            try:
+                if isinstance(transport, UnixSocketTransport):
+                    select.select([transport.sock], [], [], 5.0)
+                    self._handle(transport.recv_nowait())
+                elif isinstance(transport, RedisPubSubTransport):
+                    if transport.pubsub is None:
+                        return
+                    messages = transport.recv(5.0)
+                    if messages and loop is not None:
+                        loop.call_soon_threadsafe(self._handle, messages)
+                    elif messages:
+                        self._handle(messages)
+                else:
+                    self._handle(transport.poll())
+                    time.sleep(transport.poll_interval)
+            except Exception as e:
+                logger.warning("Invalidation okuma hatası: %s", e)
+                time.sleep(1.0)
+
+    def cleanup(self) -> None:
+        """Transport'un eski kayıtlarını temizler (sadece supabase; zamanlayıcı işi olarak çalışır)"""
+        transport = self._ensure_transport()
+        if isinstance(transport, SupabaseTransport):
+            transport.cleanup()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Bus durumu ve sayaçları"""
+        return {
+            'transport': self.transport_name if self._transport is not None else 'none',
+            'origin': self.origin,
+            'published': self.published,
+            'received': self.received,
+        }
+
+
+# Global invalidation bus instance
+_invalidation_bus = InvalidationBus()
+
+def get_invalidation_bus() -> InvalidationBus:
+    """Global invalidation bus instance'ını döndürür"""
+    return _invalidation_bus
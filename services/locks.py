@@ -0,0 +1,70 @@
+"""
+Lock Modları
+CacheService ve ThrottleService'in in-memory durumunu nasıl koruyacağını belirler.
+- none: tek sahip (bot event loop'u); lock alınmaz
+- global: tek threading.Lock (tüm çağrılar sıralanır)
+- striped: durum LOCK_STRIPES dilime bölünür, her dilimin kendi lock'u vardır;
+  key hash'ine göre dilim seçilir, farklı key'lere gelen thread'ler birbirini beklemez
+  (gunicorn thread'li web worker'ları)
+Process modu set_lock_mode() ile, global servisler oluşturulmadan önce seçilir
+(main.py: BOT_LOCK_MODE, app.py: WEB_LOCK_MODE). Ölçüm: benchmarks/bench_lock_contention.py
+"""
+
+from typing import Any, List, Optional
+import logging
+import threading
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+LOCK_MODES = ('none', 'global', 'striped')
+
+class NullLock:
+    """Tek sahipli mod için lock yerine geçen boş context manager"""
+    __slots__ = ()
+
+    def __enter__(self) -> 'NullLock':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
+
+_NULL_LOCK = NullLock()
+
+def stripe_count(mode: str, stripes: Optional[int] = None) -> int:
+    """Moddaki dilim sayısı (striped: 2'nin kuvvetine yuvarlanır, diğerleri: 1)"""
+    if mode != 'striped':
+        return 1
+    count = max(1, stripes or Config.LOCK_STRIPES)
+    return 1 << (count - 1).bit_length()
+
+def make_lock(mode: str):
+    """Mod için tek bir lock (none: NullLock)"""
+    return _NULL_LOCK if mode == 'none' else threading.Lock()
+
+def make_locks(mode: str, stripes: Optional[int] = None) -> List[Any]:
+    """Mod için dilim lock'ları"""
+    return [make_lock(mode) for _ in range(stripe_count(mode, stripes))]
+
+
+# Process lock modu (servisler oluşturulurken okunur)
+_lock_mode = 'global'
+
+def set_lock_mode(mode: str) -> None:
+    """Process'in lock modunu seçer; global cache/throttle oluşturulmadan önce çağrılmalıdır"""
+    global _lock_mode
+    if mode not in LOCK_MODES:
+        logger.warning("Geçersiz lock modu '%s', 'global' kullanılıyor", mode)
+        mode = 'global'
+    _lock_mode = mode
+
+def get_lock_mode() -> str:
+    """Process'in lock modu"""
+    return _lock_mode
@@ -0,0 +1,146 @@
+"""
+Mesaj Şablonları
+Mesaj içeriklerindeki {payment_link}, {username} gibi placeholder'ları işler.
+Optimizasyonlar:
+- Şablonlar bir kez parse edilir (metin -> literal/placeholder parçaları, LRU ile sınırlı)
+- Ayar placeholder'ları ({payment_link}) cache'teki bot_settings snapshot'ından bağlanır;
+  bağlanmış mesaj dizisi kaynak liste ve ayar versiyonu değişene kadar yeniden kullanılır,
+  yani show_payment gibi akışlar DB'ye hiç gitmez
+- Kullanıcıya özel placeholder'lar ({username}) gönderim anında doldurulur; şablonda
+  kalmadıysa render hazır metni döndürür
+- DB'deki mesajlar placeholder'lı kalır: ödeme linki değişince satırları yeniden yazmak
+  gerekmez, bot_settings invalidation'ı yeter
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+from functools import lru_cache
+import re
+import threading
+
+from config import Config
+from services.cache_service import get_cache
+
+# {isim} biçimindeki placeholder'lar; diğer süslü parantezler metin olarak kalır
+_PLACEHOLDER_RE = re.compile(r'\{([a-z_][a-z0-9_]*)\}')
+
+# Ödeme linki ayarlanmamışsa {payment_link} yerine gösterilecek metin
+MISSING_PAYMENT_LINK = '💳 Ödeme linki henüz ayarlanmamış. Lütfen admin ile iletişime geçin.'
+
+class CompiledTemplate:
+    """Parse edilmiş şablon: literal metinler ve placeholder isimleri"""
+    __slots__ = ('parts', 'names', 'text')
+
+    def __init__(self, parts: Tuple[Tuple[bool, str], ...]):
+        # (is_placeholder, literal veya placeholder ismi)
+        self.parts = parts
+        self.names = frozenset(value for is_name, value in parts if is_name)
+        # Placeholder kalmadıysa hazır metin
+        self.text = ''.join(value for _, value in parts) if not self.names else None
+
+    def bind(self, values: Dict[str, Any]) -> 'CompiledTemplate':
+        """Verilen placeholder'ları doldurur, kalanlar için yeni şablon döndürür"""
+        if not self.names.intersection(values):
+            return self
+        parts: List[Tuple[bool, str]] = []
+        for is_name, value in self.parts:
+            if is_name and value in values:
+                is_name, value = False, str(values[value])
+            if not is_name and parts and not parts[-1][0]:
+                # Ardışık literal'leri birleştir
+                parts[-1] = (False, parts[-1][1] + value)
+            else:
+                parts.append((is_name, value))
+        return CompiledTemplate(tuple(parts))
+
+    def render(self, **values: Any) -> str:
+        """Şablonu doldurur; değeri verilmeyen placeholder'lar olduğu gibi kalır"""
+        if self.text is not None:
+            return self.text
+        return ''.join(
+            str(values[value]) if is_name and value in values else (f'{{{value}}}' if is_name else value)
+            for is_name, value in self.parts
+        )
+
+
+@lru_cache(maxsize=512)
+def compile_template(text: str) -> CompiledTemplate:
+    """Metni şablona çevirir (aynı metin için sonuç cache'lenir)"""
+    parts: List[Tuple[bool, str]] = []
+    position = 0
+    for match in _PLACEHOLDER_RE.finditer(text):
+        if match.start() > position:
+            parts.append((False, text[position:match.start()]))
+        parts.append((True, match.group(1)))
+        position = match.end()
+    if position < len(text):
+        parts.append((False, text[position:]))
+    return CompiledTemplate(tuple(parts))
+
+
+async def get_settings_snapshot(loader: Callable) -> Dict[str, Any]:
+    """bot_settings'i cache'ten döndürür (miss'te loader tek sefer çalışır)"""
+    return await get_cache().get_or_load('bot_settings', loader,
+                                         ttl=Config.CONTENT_CACHE_TTL, soft_ttl=Config.CONTENT_CACHE_SOFT_TTL,
+                                         tags=['bot_settings']) or {}
+
+
+def settings_bindings(settings: Dict[str, Any]) -> Dict[str, str]:
+    """Ayarlardan bağlanan placeholder değerleri"""
+    return {
+        'payment_link': (settings or {}).get('shopier_payment_url') or MISSING_PAYMENT_LINK,
+    }
+
+
+class MessageTemplates:
+    """Ayarlara bağlanmış mesaj dizilerini kaynak anahtarı bazında tutar"""
+
+    def __init__(self):
+        # source_key -> (kaynak liste, ayar versiyonu, [(şablon, delay), ...])
+        # Kaynak listenin referansı tutulur: cache yeniden yüklenince liste değişir ve dizi yeniden bağlanır
+        self._bound: Dict[str, Tuple[List[Dict], Tuple, List[Tuple[CompiledTemplate, float]]]] = {}
+        self._lock = threading.Lock()
+        self.binds = 0
+
+    def bind_sequence(self, source_key: str, messages: List[Dict],
+                      settings: Dict[str, Any]) -> List[Tuple[CompiledTemplate, float]]:
+        """
+        Mesaj dizisini ayar placeholder'ları bağlanmış şablonlara çevirir
+
+        Args:
+            source_key: Dizinin cache anahtarı (ör. 'payment_messages')
+            messages: Cache'ten gelen mesaj listesi
+            settings: bot_settings snapshot'ı
+
+        Returns:
+            [(şablon, delay), ...]; kullanıcı placeholder'ları render() ile doldurulur
+        """
+        values = settings_bindings(settings)
+        version = tuple(sorted(values.items()))
+        with self._lock:
+            cached = self._bound.get(source_key)
+            if cached is not None and cached[0] is messages and cached[1] == version:
+                return cached[2]
+        bound = [(compile_template(msg.get('content') or '').bind(values), msg.get('delay', 1.0)) for msg in messages]
+        with self._lock:
+            self._bound[source_key] = (messages, version, bound)
+            self.binds += 1
+        return bound
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bound.clear()
+
+
+def user_bindings(user: Any) -> Dict[str, str]:
+    """Telegram kullanıcısından bağlanan placeholder değerleri"""
+    if user is None:
+        return {}
+    return {'username': user.username or user.first_name or str(user.id)}
+
+
+# Global şablon instance
+_message_templates = MessageTemplates()
+
+def get_message_templates() -> MessageTemplates:
+    """Global şablon instance'ını döndürür"""
+    return _message_templates
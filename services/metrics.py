@@ -0,0 +1,110 @@
+"""
+Metrik Toplama
+Cache, throttle, single-flight, içerik aynası, invalidation bus ve cevap kuyruğu
+sayaçlarını tek bir sözlükte toplar.
+- Python API: collect_metrics()
+- Web: app.py /api/internal/metrics (admin oturumu veya METRICS_TOKEN)
+- Bot: log_metrics() zamanlayıcıda (services/scheduler.py) periyodik çalışır, log satırı
+  yazar ve son snapshot'ı METRICS_SNAPSHOT_PATH dosyasına bırakır (aynı makinedeki web paneli okur)
+"""
+
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import logging
+import os
+import time
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_started_at = time.time()
+
+def collect_metrics(role: str) -> Dict[str, Any]:
+    """
+    Bu process'in tüm sayaçlarını toplar
+
+    Args:
+        role: Process rolü ('bot' veya 'web')
+    """
+    from services.cache_service import get_cache
+    from services.throttle_service import get_throttle
+    from services.singleflight import get_singleflight
+    from services.content_mirror import get_content_mirror
+    from services.invalidation_bus import get_invalidation_bus
+    from services.answer_queue import get_answer_queue
+    from services.scheduler import get_scheduler
+    from services.outbox import get_outbox
+
+    metrics = {
+        'process': {
+            'role': role,
+            'pid': os.getpid(),
+            'uptime_seconds': int(time.time() - _started_at),
+            'collected_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'cache': get_cache().get_stats(),
+        'throttle': get_throttle().get_stats(),
+        'singleflight': get_singleflight().get_stats(),
+        'content_mirror': get_content_mirror().get_stats(),
+        'invalidation_bus': get_invalidation_bus().get_stats(),
+        'answer_queue': get_answer_queue().get_stats(),
+        'scheduler': get_scheduler().get_stats(),
+        'outbox': get_outbox().get_stats(),
+    }
+    if role == 'bot':
+        from middlewares.rate_limit import get_rate_limiter
+        from services.send_scheduler import get_send_scheduler
+        metrics['rate_limit'] = get_rate_limiter().get_stats()
+        metrics['send_scheduler'] = get_send_scheduler().get_stats()
+    return metrics
+
+def format_metrics_line(metrics: Dict[str, Any]) -> str:
+    """Metrikleri tek satırlık log özetine çevirir"""
+    cache = metrics['cache']
+    totals = cache['totals']
+    throttle_ops = metrics['throttle']['operations']
+    throttled = sum(op['throttled'] for op in throttle_ops.values())
+    allowed = sum(op['allowed'] for op in throttle_ops.values())
+    hit_ratio = totals['hit_ratio']
+    return (
+        f"cache entries={cache['entries']}/{cache['max_entries']} "
+        f"hit_ratio={hit_ratio if hit_ratio is not None else '-'} "
+        f"stale={totals['stale_hits']} evictions={totals['evictions']} "
+        f"loads={totals['loads']} load_avg_ms={totals['load_time_avg_ms'] or '-'} | "
+        f"throttle allowed={allowed} throttled={throttled} | "
+        f"answers pending={metrics['answer_queue']['pending']} spilled={metrics['answer_queue']['spilled_rows']} | "
+        f"mirror synced={metrics['content_mirror']['synced']} failures={metrics['content_mirror']['refresh_failures']}"
+    )
+
+def write_metrics_snapshot(metrics: Dict[str, Any], path: Optional[str] = None) -> None:
+    """Snapshot'ı atomik olarak dosyaya yazar"""
+    path = path or Config.METRICS_SNAPSHOT_PATH
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning("Metrik snapshot yazma hatası: %s", e)
+
+def read_metrics_snapshot(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Bot'un son metrik snapshot'ını okur (yoksa None); 'snapshot_age_seconds' eklenir"""
+    path = path or Config.METRICS_SNAPSHOT_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            metrics = json.load(f)
+        metrics['snapshot_age_seconds'] = int(time.time() - os.path.getmtime(path))
+        return metrics
+    except (FileNotFoundError, ValueError):
+        return None
+
+async def log_metrics(role: str = 'bot') -> None:
+    """Metrik log satırı yazar ve snapshot'ı günceller (zamanlayıcı işi)"""
+    metrics = collect_metrics(role)
+    logger.info("Metrikler: %s", format_metrics_line(metrics))
+    await asyncio.to_thread(write_metrics_snapshot, metrics)
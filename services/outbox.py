@@ -0,0 +1,198 @@
+"""
+Bot Gönderim Kuyruğu (outbox)
+Admin panelinin (app.py) kullanıcıya mesaj gönderen işlemleri (onay sonrası davet,
+wishlist'ten davet) web process'inde ayrı bir Bot ile gönderilmez; `bot_outbox`
+tablosuna komut olarak yazılır ve bot process'i bu komutları kendi Bot'u ile çalıştırır.
+Böylece tüm gönderimler bot'taki tek SendScheduler bütçesinden (global/sohbet token'ları,
+öncelik şeritleri, RetryAfter beklemesi) geçer; web ve bot ayrı ayrı limit harcamaz.
+Optimizasyonlar:
+- Bot komutları zamanlayıcı işiyle (OUTBOX_POLL_INTERVAL) toplu okur; her turda en fazla
+  OUTBOX_BATCH_SIZE komut, hepsi eşzamanlı başlatılır ve SendScheduler şeritlerine göre sıralanır
+- Komutlar koşullu UPDATE ile sahiplenilir (status='pending' → 'processing'); birden fazla
+  bot replikası aynı komutu çalıştırmaz. Çöken process'in sahiplendiği komutlar
+  OUTBOX_CLAIM_TIMEOUT sonra tekrar alınır (en az bir kez teslim)
+- Başarısız komutlar OUTBOX_MAX_ATTEMPTS denemeye kadar tekrar kuyruğa döner
+- Tamamlanan komutlar bir günden sonra silinir (tablo küçük kalır)
+- Kuyruğa yazılamazsa (tablo yok / Supabase erişilemez) web eski yola düşer ve doğrudan gönderir
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Komut adları (app.py bunları yazar, bot çalıştırır)
+INVITE_USER = 'invite_user'
+INVITE_FROM_WISHLIST = 'invite_from_wishlist'
+
+# Tamamlanan komutların saklanma süresi (saniye)
+_DONE_RETENTION = 24 * 3600
+
+def _timestamp(seconds: float) -> str:
+    """Supabase timestamp filtresi için UTC ISO zaman"""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(seconds))
+
+async def _invite_user(bot, payload: Dict[str, Any]) -> bool:
+    from services.group_service import GroupService
+    return await GroupService(bot).add_user_to_group(
+        int(payload['user_id']), from_wishlist=bool(payload.get('from_wishlist')))
+
+async def _invite_from_wishlist(bot, payload: Dict[str, Any]) -> bool:
+    from services.group_service import GroupService
+    return await GroupService(bot).invite_from_wishlist(int(payload['user_id']))
+
+# Komut → bot tarafı işleyici (şerit seçimi GroupService metodlarında yapılır)
+HANDLERS: Dict[str, Callable[[Any, Dict[str, Any]], Awaitable[bool]]] = {
+    INVITE_USER: _invite_user,
+    INVITE_FROM_WISHLIST: _invite_from_wishlist,
+}
+
+class BotOutbox:
+    """Web → bot gönderim komutları kuyruğu (Supabase `bot_outbox` tablosu)"""
+
+    TABLE = 'bot_outbox'
+
+    def __init__(self):
+        self.origin = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.batch_size = max(1, Config.OUTBOX_BATCH_SIZE)
+        self.claim_timeout = Config.OUTBOX_CLAIM_TIMEOUT
+        self.max_attempts = max(1, Config.OUTBOX_MAX_ATTEMPTS)
+        self._last_cleanup = 0.0
+
+        # İstatistikler
+        self.enqueued = 0
+        self.enqueue_failures = 0
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+
+    def _client(self):
+        from services.supabase_client import get_supabase_client
+        return get_supabase_client()
+
+    # Web tarafı
+    def enqueue(self, action: str, payload: Dict[str, Any]) -> bool:
+        """
+        Komutu kuyruğa yazar (senkron; web thread'inden çağrılır)
+
+        Args:
+            action: Komut adı (INVITE_USER, INVITE_FROM_WISHLIST)
+            payload: Komut parametreleri (JSON)
+
+        Returns:
+            Yazıldı mı (False: çağıran doğrudan göndermeli)
+        """
+        try:
+            self._client().table(self.TABLE).insert({
+                'action': action, 'payload': payload, 'origin': self.origin,
+            }).execute()
+            self.enqueued += 1
+            return True
+        except Exception as e:
+            self.enqueue_failures += 1
+            logger.error("Outbox'a yazma hatası (%s): %s", action, e)
+            return False
+
+    # Bot tarafı
+    def _claim(self) -> List[Dict[str, Any]]:
+        """Bekleyen (veya sahibi zaman aşımına uğramış) komutları sahiplenir (senkron)"""
+        now = time.time()
+        available = f'status.eq.pending,and(status.eq.processing,claimed_at.lt.{_timestamp(now - self.claim_timeout)})'
+        table = self._client().table(self.TABLE)
+        res = table.select('id').or_(available).order('id').limit(self.batch_size).execute()
+        ids = [row['id'] for row in res.data or []]
+        if not ids:
+            return []
+        # Koşullu UPDATE: aynı anda okuyan başka replika sahiplendiyse o satırlar dönmez
+        res = (table.update({'status': 'processing', 'claimed_at': _timestamp(now), 'claimed_by': self.origin})
+               .in_('id', ids).or_(available).execute())
+        return sorted(res.data or [], key=lambda row: row['id'])
+
+    def _finish(self, row: Dict[str, Any], ok: bool, error: Optional[str]) -> None:
+        """Komutun sonucunu yazar; başarısızsa deneme hakkı kaldıysa kuyruğa geri koyar (senkron)"""
+        attempts = int(row.get('attempts') or 0) + 1
+        if ok:
+            status = 'done'
+        elif attempts < self.max_attempts:
+            status = 'pending'
+        else:
+            status = 'failed'
+        (self._client().table(self.TABLE)
+         .update({'status': status, 'attempts': attempts, 'last_error': error})
+         .eq('id', row['id']).eq('claimed_by', self.origin).execute())
+
+    def _cleanup(self) -> None:
+        """Bir günden eski tamamlanmış komutları siler (senkron)"""
+        cutoff = _timestamp(time.time() - _DONE_RETENTION)
+        self._client().table(self.TABLE).delete().eq('status', 'done').lt('created_at', cutoff).execute()
+
+    async def _run(self, bot, row: Dict[str, Any]) -> None:
+        from services.database import get_db_executor
+        loop = asyncio.get_running_loop()
+        handler = HANDLERS.get(row.get('action'))
+        error = None
+        if handler is None:
+            ok, error = False, f"bilinmeyen komut: {row.get('action')}"
+        else:
+            try:
+                ok = await handler(bot, row.get('payload') or {})
+                if not ok:
+                    error = 'gönderilemedi'
+            except Exception as e:
+                ok, error = False, str(e)
+        if ok:
+            self.processed += 1
+        elif int(row.get('attempts') or 0) + 1 < self.max_attempts:
+            self.retried += 1
+        else:
+            self.failed += 1
+            logger.error("Outbox komutu başarısız (id=%s, %s): %s", row.get('id'), row.get('action'), error)
+        try:
+            await loop.run_in_executor(get_db_executor(), self._finish, row, ok, error)
+        except Exception as e:
+            logger.error("Outbox sonucu yazılamadı (id=%s): %s", row.get('id'), e)
+
+    async def process(self, bot) -> int:
+        """
+        Bekleyen komutları bot'un kendi Bot'u (SendScheduler middleware'li) ile çalıştırır
+        Zamanlayıcı işi olarak bot process'inde çağrılır
+
+        Returns:
+            Çalıştırılan komut sayısı
+        """
+        from services.database import get_db_executor
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(get_db_executor(), self._claim)
+        if rows:
+            await asyncio.gather(*(self._run(bot, row) for row in rows))
+        if time.monotonic() - self._last_cleanup > 3600:
+            self._last_cleanup = time.monotonic()
+            try:
+                await loop.run_in_executor(get_db_executor(), self._cleanup)
+            except Exception as e:
+                logger.warning("Outbox temizleme hatası: %s", e)
+        return len(rows)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Kuyruk sayaçları"""
+        return {
+            'enqueued': self.enqueued,
+            'enqueue_failures': self.enqueue_failures,
+            'processed': self.processed,
+            'retried': self.retried,
+            'failed': self.failed,
+        }
+
+
+# Global outbox instance
+_outbox = BotOutbox()
+
+def get_outbox() -> BotOutbox:
+    """Global outbox instance'ını döndürür"""
+    return _outbox
@@ -0,0 +1,249 @@
+"""
+Periyodik Bakım Zamanlayıcısı
+Cache, throttle ve rate limit sweep'leri gibi periyodik işleri tek yerden çalıştırır.
+- Bot: start() ile event loop'ta, her iş kendi task'ında (main.main içinde başlatılır)
+- Web: start_thread() ile tek daemon thread'de, işler sıradaki çalışma zamanına göre (heap)
+Optimizasyonlar:
+- Her çalışma aralığına jitter eklenir (SCHEDULER_JITTER); aynı aralıklı işler ve
+  aynı anda başlayan process'ler (bot + gunicorn worker'ları) senkronize olmaz
+- İş süreleri (son/ortalama/maks) ve hata sayıları get_stats() ile metriklere girer
+- Diğer modüller get_scheduler().register(...) ile kendi işlerini ekleyebilir;
+  zamanlayıcı çalışırken eklenen işler de hemen planlanır
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import random
+import threading
+import time
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ScheduledJob:
+    """Kayıtlı periyodik iş ve çalışma istatistikleri"""
+    __slots__ = ('name', 'func', 'interval', 'jitter', 'blocking', 'runs', 'failures',
+                 'total_duration', 'last_duration', 'max_duration', 'last_run_at', 'last_error', 'cancelled')
+
+    def __init__(self, name: str, func: Callable, interval: float, jitter: float, blocking: bool):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        # Senkron iş event loop'u bloklayabiliyorsa (I/O) thread'de çalıştırılır
+        self.blocking = blocking
+        self.runs = 0
+        self.failures = 0
+        self.total_duration = 0.0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.last_run_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.cancelled = False
+
+    def next_delay(self) -> float:
+        """Jitter uygulanmış bir sonraki bekleme süresi"""
+        return self.interval * (1.0 + random.uniform(-self.jitter, self.jitter))
+
+    def record(self, duration: float, error: Optional[BaseException] = None) -> None:
+        self.runs += 1
+        self.total_duration += duration
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.last_run_at = time.time()
+        if error is not None:
+            self.failures += 1
+            self.last_error = f'{type(error).__name__}: {error}'
+            logger.warning("Zamanlanmış iş hatası (%s): %s", self.name, error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'interval': self.interval,
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_duration_ms': round(self.last_duration * 1000, 2),
+            'avg_duration_ms': round(self.total_duration / self.runs * 1000, 2) if self.runs else None,
+            'max_duration_ms': round(self.max_duration * 1000, 2),
+            'last_run_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.last_run_at)) if self.last_run_at else None,
+            'last_error': self.last_error,
+        }
+
+class JobScheduler:
+    """Periyodik iş zamanlayıcısı (asyncio veya thread modunda çalışır)"""
+
+    def __init__(self, jitter: Optional[float] = None):
+        self.jitter = Config.SCHEDULER_JITTER if jitter is None else jitter
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._lock = threading.Lock()
+        # asyncio modu
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Thread modu: (çalışma zamanı, sıra, iş) heap'i
+        self._thread: Optional[threading.Thread] = None
+        self._heap: List[Tuple[float, int, ScheduledJob]] = []
+        self._sequence = itertools.count()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def register(self, name: str, func: Callable, interval: float,
+                 jitter: Optional[float] = None, blocking: bool = False) -> ScheduledJob:
+        """
+        Periyodik iş ekler (aynı isimli iş varsa yerine geçer)
+
+        Args:
+            name: İş adı (metriklerde görünür)
+            func: Senkron fonksiyon veya coroutine fonksiyonu (argümansız)
+            interval: Çalışma aralığı (saniye)
+            jitter: Aralığa uygulanacak ± oran (varsayılan SCHEDULER_JITTER)
+            blocking: Senkron iş I/O yapıyorsa True (asyncio modunda thread'de çalışır)
+        """
+        job = ScheduledJob(name, func, float(interval), self.jitter if jitter is None else jitter, blocking)
+        self.unregister(name)
+        with self._lock:
+            self._jobs[name] = job
+        self._schedule(job)
+        return job
+
+    def unregister(self, name: str) -> None:
+        """İşi kaldırır (çalışıyorsa bir sonraki tur planlanmaz)"""
+        with self._lock:
+            job = self._jobs.pop(name, None)
+        if job is None:
+            return
+        job.cancelled = True
+        task = self._tasks.pop(name, None)
+        if task is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(task.cancel)
+
+    def _schedule(self, job: ScheduledJob) -> None:
+        """Zamanlayıcı çalışıyorsa işi hemen planlar"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._spawn, job)
+        elif self._thread is not None:
+            with self._lock:
+                heapq.heappush(self._heap, (time.monotonic() + job.next_delay(), next(self._sequence), job))
+            self._wakeup.set()
+
+    # asyncio modu (bot)
+    def start(self) -> None:
+        """Bot event loop'unda kayıtlı tüm işleri başlatır"""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self._spawn(job)
+        logger.info("Zamanlayıcı başlatıldı (%d iş)", len(jobs))
+
+    def _spawn(self, job: ScheduledJob) -> None:
+        if job.cancelled or job.name in self._tasks:
+            return
+        self._tasks[job.name] = self._loop.create_task(self._run_loop(job), name=f'job:{job.name}')
+
+    async def _run_loop(self, job: ScheduledJob) -> None:
+        while not job.cancelled:
+            await asyncio.sleep(job.next_delay())
+            started = time.perf_counter()
+            try:
+                result = await asyncio.to_thread(job.func) if job.blocking else job.func()
+                if inspect.isawaitable(result):
+                    await result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.record(time.perf_counter() - started, e)
+            else:
+                job.record(time.perf_counter() - started)
+
+    async def stop(self) -> None:
+        """Tüm iş task'larını iptal eder ve bitmelerini bekler"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+
+    # Thread modu (web)
+    def start_thread(self) -> None:
+        """Web process'inde (Flask/gunicorn worker) daemon thread ile çalıştırır"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        now = time.monotonic()
+        with self._lock:
+            self._heap = [(now + job.next_delay(), next(self._sequence), job) for job in self._jobs.values()]
+            heapq.heapify(self._heap)
+        self._thread = threading.Thread(target=self._run_thread, name='job-scheduler', daemon=True)
+        self._thread.start()
+
+    def _run_thread(self) -> None:
+        while not self._stopping.is_set():
+            with self._lock:
+                # İptal edilmiş işlerin kayıtlarını at
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                due_at = self._heap[0][0] if self._heap else None
+            timeout = None if due_at is None else max(0.0, due_at - time.monotonic())
+            if timeout is None or timeout > 0:
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+                continue
+            with self._lock:
+                _, _, job = heapq.heappop(self._heap)
+            started = time.perf_counter()
+            try:
+                result = job.func()
+                if inspect.isawaitable(result):
+                    asyncio.run(result)
+            except Exception as e:
+                job.record(time.perf_counter() - started, e)
+            else:
+                job.record(time.perf_counter() - started)
+            if not job.cancelled:
+                with self._lock:
+                    heapq.heappush(self._heap, (time.monotonic() + job.next_delay(), next(self._sequence), job))
+
+    def stop_thread(self, timeout: float = 5.0) -> None:
+        """Thread'i durdurur (çalışan iş varsa bitmesini en fazla timeout saniye bekler)"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """İş bazında çalışma sayıları ve süreleri"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        mode = 'async' if self._loop is not None else ('thread' if self._thread is not None else 'stopped')
+        return {'mode': mode, 'jobs': {job.name: job.stats() for job in jobs}}
+
+
+def register_maintenance_jobs(scheduler: 'JobScheduler') -> None:
+    """Bot ve web process'lerinde ortak bakım işleri (cache ve throttle sweep'leri, invalidation tablosu)"""
+    from services.cache_service import get_cache
+    from services.throttle_service import get_throttle
+    from services.invalidation_bus import get_invalidation_bus
+
+    scheduler.register('cache_sweep', get_cache().cleanup_expired, Config.CACHE_SWEEP_INTERVAL)
+    scheduler.register('throttle_sweep', get_throttle().cleanup_old_records, Config.THROTTLE_SWEEP_INTERVAL)
+    if (Config.CACHE_BUS_TRANSPORT or '').lower() == 'supabase':
+        # Eski cache_invalidations kayıtları yayın yolunda değil, burada toplu silinir
+        scheduler.register('invalidation_cleanup', get_invalidation_bus().cleanup,
+                           Config.CACHE_BUS_CLEANUP_INTERVAL, blocking=True)
+
+
+# Global zamanlayıcı instance
+_scheduler = JobScheduler()
+
+def get_scheduler() -> JobScheduler:
+    """Global zamanlayıcı instance'ını döndürür"""
+    return _scheduler
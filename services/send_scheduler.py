@@ -0,0 +1,344 @@
+"""
+Giden Mesaj Zamanlayıcısı
+Bot'un tüm mesaj gönderimlerini Telegram API limitlerine göre sıraya koyar
+(aiogram request-session middleware'i; main.py'de bot.session'a eklenir).
+Optimizasyonlar:
+- Token bucket'lar: global (SEND_GLOBAL_RATE, ~30 mesaj/sn), özel sohbet başına
+  (SEND_CHAT_RATE, ~1 mesaj/sn) ve grup başına (SEND_GROUP_PER_MINUTE, ~20 mesaj/dk);
+  gönderimler limit kadar hızlı çıkar, limit aşılmaz
+- Sohbet içi sıra FIFO'dur (asyncio.Lock); aynı sohbete giden mesajların sırası korunur
+- Öncelik şeritleri (contextvar ile seçilir, bkz. send_lane): interactive (o anki update'e
+  cevaplar, varsayılan), notification (admin bildirimleri), bulk (wishlist davetleri, grup
+  uyarıları). Global token'lar şeritlere ağırlıklı adil sırayla (SEND_LANE_WEIGHTS) dağıtılır:
+  boşta olan şerit öne geçer, dolu şeritler ağırlıkları oranında pay alır, bulk aç kalmaz
+- Şerit başına gönderim süresi (çağrıdan Telegram cevabına) p50/p99 metrikleri
+- TelegramRetryAfter alınırsa tüm gönderimler retry_after kadar durdurulur ve istek
+  otomatik tekrarlanır (SEND_MAX_RETRIES); mesaj kaybolmaz
+- Kuyruk derinliği, bekleme süreleri ve retry sayaçları get_stats() ile metriklere girer
+- Boşta kalan sohbet kayıtları zamanlayıcı işiyle (sweep) silinir; bellek aktif sohbet sayısıyla sınırlı
+"""
+
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import logging
+import time
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage, ForwardMessage, SendAnimation, SendAudio, SendContact, SendDice, SendDocument,
+    SendLocation, SendMediaGroup, SendMessage, SendPhoto, SendPoll, SendSticker, SendVenue,
+    SendVideo, SendVideoNote, SendVoice,
+)
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Mesaj limitlerine tabi method'lar (chat_id alanı olan gönderimler)
+LIMITED_METHODS = (
+    SendMessage, SendPhoto, SendDocument, SendVideo, SendAnimation, SendAudio, SendVoice,
+    SendVideoNote, SendSticker, SendMediaGroup, SendLocation, SendVenue, SendContact,
+    SendPoll, SendDice, CopyMessage, ForwardMessage,
+)
+
+# Öncelik şeritleri (sıra: eşit paylı durumda önce gelen)
+INTERACTIVE = 'interactive'
+NOTIFICATION = 'notification'
+BULK = 'bulk'
+LANES = (INTERACTIVE, NOTIFICATION, BULK)
+
+# O anki gönderimlerin şeridi; task'lar oluşturuldukları context'i kopyaladığı için
+# asyncio.gather ile başlatılan gönderimler de şeridi devralır
+_current_lane: ContextVar[str] = ContextVar('send_lane', default=INTERACTIVE)
+
+@contextmanager
+def send_lane(lane: str) -> Iterator[None]:
+    """
+    Blok içindeki gönderimlerin şeridini belirler
+
+    Örnek:
+        with send_lane(BULK):
+            await bot.send_message(...)
+    """
+    token = _current_lane.set(lane if lane in LANES else INTERACTIVE)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+def parse_lane_weights(spec: str) -> Dict[str, float]:
+    """'interactive=6,notification=3,bulk=1' biçimindeki ağırlıkları parse eder (eksik şerit: 1)"""
+    weights = {lane: 1.0 for lane in LANES}
+    for item in (spec or '').split(','):
+        name, _, value = item.partition('=')
+        name = name.strip()
+        try:
+            if name in weights and float(value) > 0:
+                weights[name] = float(value)
+        except ValueError:
+            logger.warning("Geçersiz şerit ağırlığı atlandı: %s", item)
+    return weights
+
+def percentile(sorted_samples: List[float], q: float) -> Optional[float]:
+    """Sıralı örneklerden q (0-1) yüzdelik değeri"""
+    if not sorted_samples:
+        return None
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))]
+
+class TokenBucket:
+    """Saniyede rate token dolan, en fazla capacity token tutan kova"""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """cost kadar token için beklenmesi gereken süre (0 = hemen)"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        missing = min(cost, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, cost: float = 1.0, now: Optional[float] = None) -> None:
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= min(cost, self.capacity)
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+class _ChatState:
+    """Bir sohbetin kovası, FIFO kilidi ve bekleyen sayısı"""
+    __slots__ = ('bucket', 'lock', 'waiting')
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+
+class _Lane:
+    """Öncelik şeridi: global token bekleyenleri, sanal zamanı ve gönderim süreleri"""
+    __slots__ = ('name', 'weight', 'waiters', 'vtime', 'pending', 'sent', 'latencies')
+
+    def __init__(self, name: str, weight: float, samples: int):
+        self.name = name
+        self.weight = weight
+        # (future, cost) FIFO'su
+        self.waiters: Deque[Tuple[asyncio.Future, int]] = deque()
+        # Ağırlıklı adil sıra: her token verilişinde cost / weight kadar ilerler
+        self.vtime = 0.0
+        # Bu şeritte sırada veya gönderimde olan istek sayısı
+        self.pending = 0
+        self.sent = 0
+        # Son gönderim süreleri (saniye, sınırlı örnek)
+        self.latencies: Deque[float] = deque(maxlen=samples)
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self.latencies)
+        p50 = percentile(samples, 0.50)
+        p99 = percentile(samples, 0.99)
+        return {
+            'weight': self.weight,
+            'pending': self.pending,
+            'waiting_tokens': len(self.waiters),
+            'sent': self.sent,
+            'p50_ms': round(p50 * 1000, 2) if p50 is not None else None,
+            'p99_ms': round(p99 * 1000, 2) if p99 is not None else None,
+        }
+
+class SendScheduler(BaseRequestMiddleware):
+    """Global ve sohbet başına limitleri uygulayan gönderim zamanlayıcısı"""
+
+    def __init__(self, global_rate: Optional[float] = None, chat_rate: Optional[float] = None,
+                 group_per_minute: Optional[float] = None, max_retries: Optional[int] = None,
+                 lane_weights: Optional[Dict[str, float]] = None):
+        global_rate = global_rate or Config.SEND_GLOBAL_RATE
+        self.chat_rate = chat_rate or Config.SEND_CHAT_RATE
+        self.group_rate = (group_per_minute or Config.SEND_GROUP_PER_MINUTE) / 60.0
+        self.max_retries = Config.SEND_MAX_RETRIES if max_retries is None else max_retries
+        # Global kova bir saniyelik burst'e izin verir
+        self._global = TokenBucket(global_rate, global_rate)
+        # Global token'lar şeritlere _dispatch task'ı ile dağıtılır (bekleyen varken)
+        weights = lane_weights or parse_lane_weights(Config.SEND_LANE_WEIGHTS)
+        self._lanes = {lane: _Lane(lane, weights.get(lane, 1.0), Config.SEND_LATENCY_SAMPLES) for lane in LANES}
+        self._vtime = 0.0
+        self._dispatcher: Optional[asyncio.Task] = None
+        # RetryAfter sonrası tüm gönderimlerin bekleyeceği an (monotonic)
+        self._paused_until = 0.0
+        self._chats: Dict[Union[int, str], _ChatState] = {}
+        # İstatistikler
+        self.queued = 0
+        self.max_queued = 0
+        self.acquired = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.retry_after_seconds = 0.0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _chat(self, chat_id: Union[int, str]) -> _ChatState:
+        state = self._chats.get(chat_id)
+        if state is None:
+            # Negatif id'ler ve @kanal isimleri grup/kanal limitine tabidir
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            state = self._chats[chat_id] = _ChatState(TokenBucket(self.group_rate if is_group else self.chat_rate, 1))
+        return state
+
+    @staticmethod
+    def _cost(method: Any) -> int:
+        """Gönderimin mesaj sayısı (medya grubu her öğe için ayrı sayılır)"""
+        if isinstance(method, SendMediaGroup):
+            return max(1, len(method.media))
+        return 1
+
+    async def _acquire(self, chat_id: Union[int, str], cost: int, lane: _Lane) -> float:
+        """Sohbet ve global kovadan token alır, beklenen süreyi döndürür"""
+        started = time.monotonic()
+        state = self._chat(chat_id)
+        state.waiting += 1
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            async with state.lock:
+                while (delay := state.bucket.delay()) > 0:
+                    await asyncio.sleep(delay)
+                await self._acquire_global(lane, cost)
+                state.bucket.take(1)
+        finally:
+            state.waiting -= 1
+            self.queued -= 1
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        return waited
+
+    def _global_delay(self, cost: int, now: float) -> float:
+        return max(self._paused_until - now, self._global.delay(cost, now))
+
+    async def _acquire_global(self, lane: _Lane, cost: int) -> None:
+        """Global token'ı şeridin adil payına göre bekler"""
+        if self._dispatcher is None and self._global_delay(cost, time.monotonic()) <= 0:
+            # Bekleyen yok ve token var: sıraya girmeden al
+            self._global.take(cost)
+            lane.vtime = max(lane.vtime, self._vtime) + cost / lane.weight
+            return
+        if not lane.waiters:
+            # Boşta kalan şerit geçmiş payını biriktirmez, sistemin sanal zamanından başlar
+            lane.vtime = max(lane.vtime, self._vtime)
+        future = asyncio.get_running_loop().create_future()
+        lane.waiters.append((future, cost))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+        await future
+
+    def _next_lane(self) -> Optional[_Lane]:
+        """Bekleyeni olan, sanal zamanı en küçük şerit (iptal edilmiş bekleyenler atılır)"""
+        chosen = None
+        for lane in self._lanes.values():
+            while lane.waiters and lane.waiters[0][0].done():
+                lane.waiters.popleft()
+            if lane.waiters and (chosen is None or lane.vtime < chosen.vtime):
+                chosen = lane
+        return chosen
+
+    async def _dispatch(self) -> None:
+        """Bekleyen kalmayana kadar global token'ları şeritlere dağıtır"""
+        try:
+            while (lane := self._next_lane()) is not None:
+                future, cost = lane.waiters[0]
+                now = time.monotonic()
+                delay = self._global_delay(cost, now)
+                if delay > 0:
+                    # Beklerken daha öncelikli bir istek gelebilir; uyanınca şerit yeniden seçilir
+                    await asyncio.sleep(delay)
+                    continue
+                lane.waiters.popleft()
+                self._global.take(cost, now)
+                self._vtime = lane.vtime
+                lane.vtime += cost / lane.weight
+                future.set_result(None)
+        finally:
+            self._dispatcher = None
+
+    def pause(self, seconds: float) -> None:
+        """Tüm gönderimleri seconds saniye durdurur (TelegramRetryAfter)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.retry_after_seconds += seconds
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Any, method: Any) -> Any:
+        if not isinstance(method, LIMITED_METHODS):
+            return await make_request(bot, method)
+        cost = self._cost(method)
+        lane = self._lanes[_current_lane.get()]
+        started = time.monotonic()
+        attempt = 0
+        lane.pending += 1
+        try:
+            while True:
+                await self._acquire(method.chat_id, cost, lane)
+                try:
+                    response = await make_request(bot, method)
+                except TelegramRetryAfter as e:
+                    self.retries += 1
+                    self.pause(e.retry_after)
+                    if attempt >= self.max_retries:
+                        self.failed += 1
+                        raise
+                    attempt += 1
+                    logger.warning("Telegram flood limiti: %s sn bekleniyor (chat=%s, şerit=%s, deneme %d)",
+                                   e.retry_after, method.chat_id, lane.name, attempt)
+                    continue
+                self.sent += 1
+                lane.sent += 1
+                lane.latencies.append(time.monotonic() - started)
+                return response
+        finally:
+            lane.pending -= 1
+
+    def sweep(self) -> int:
+        """Bekleyeni olmayan ve kovası dolmuş (boşta) sohbet kayıtlarını siler"""
+        now = time.monotonic()
+        idle = [chat_id for chat_id, state in self._chats.items()
+                if not state.waiting and not state.lock.locked() and state.bucket.is_full(now)]
+        for chat_id in idle:
+            del self._chats[chat_id]
+        return len(idle)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Kuyruk derinliği, gönderim ve bekleme sayaçları"""
+        return {
+            'queued': self.queued,
+            'max_queued': self.max_queued,
+            'max_chat_queue': max((state.waiting for state in self._chats.values()), default=0),
+            'chats': len(self._chats),
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'retry_after_seconds': self.retry_after_seconds,
+            'paused_for': round(max(0.0, self._paused_until - time.monotonic()), 2),
+            'wait_avg_ms': round(self.wait_total / self.acquired * 1000, 2) if self.acquired else None,
+            'wait_max_ms': round(self.wait_max * 1000, 2),
+            'lanes': {name: lane.stats() for name, lane in self._lanes.items()},
+        }
+
+
+# Global zamanlayıcı instance
+_send_scheduler = SendScheduler()
+
+def get_send_scheduler() -> SendScheduler:
+    """Global gönderim zamanlayıcısını döndürür"""
+    return _send_scheduler
@@ -0,0 +1,105 @@
+"""
+Single-Flight Request Coalescing
+Aynı anda gelen özdeş okuma isteklerini tek bir sorguda birleştirir.
+Cache miss anında gelen burst'te (ör. /start) her kullanıcı ayrı sorgu göndermez;
+ilk çağrı sorguyu başlatır, diğerleri aynı sonucu bekler.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from collections import defaultdict
+import asyncio
+import functools
+import threading
+
+class SingleFlight:
+    """Anahtar bazlı in-flight çağrı birleştirici"""
+
+    def __init__(self):
+        # (loop_id, key) -> çalışan Task
+        self._inflight: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        # İstatistikler: isim -> sayaç
+        self._calls: Dict[str, int] = defaultdict(int)
+        self._collapsed: Dict[str, int] = defaultdict(int)
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]], name: Optional[str] = None) -> Any:
+        """
+        loader'ı çalıştırır; aynı key ile zaten çalışan bir çağrı varsa onun sonucunu bekler
+
+        Args:
+            key: Birleştirme anahtarı (hashable)
+            loader: Coroutine döndüren fonksiyon (sadece lider çağrıda çalışır)
+            name: İstatistik grubu (varsayılan: key)
+
+        Returns:
+            loader sonucu (tüm bekleyenler aynı nesneyi alır)
+        """
+        loop = asyncio.get_running_loop()
+        # Future'lar loop'a bağlı; app.py her istekte yeni loop açtığı için key'e loop dahil
+        inflight_key = (id(loop), key)
+        stat_name = name or str(key)
+
+        with self._lock:
+            self._calls[stat_name] += 1
+            task = self._inflight.get(inflight_key)
+            if task is not None and not task.done():
+                self._collapsed[stat_name] += 1
+            else:
+                # Lider: sorguyu ayrı task olarak başlat (lider iptal edilirse diğerleri etkilenmez)
+                task = loop.create_task(loader())
+                self._inflight[inflight_key] = task
+                task.add_done_callback(functools.partial(self._forget, inflight_key))
+
+        return await asyncio.shield(task)
+
+    def _forget(self, inflight_key: Tuple[int, Hashable], task: asyncio.Task) -> None:
+        """Tamamlanan task'ı in-flight tablosundan çıkarır"""
+        with self._lock:
+            if self._inflight.get(inflight_key) is task:
+                del self._inflight[inflight_key]
+        # Bekleyen kalmadıysa "exception was never retrieved" uyarısını engelle
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Çağrı ve birleştirilen (collapsed) çağrı sayılarını döndürür"""
+        with self._lock:
+            return {
+                name: {'calls': calls, 'collapsed': self._collapsed.get(name, 0)}
+                for name, calls in self._calls.items()
+            }
+
+    @property
+    def collapsed_total(self) -> int:
+        """Toplam birleştirilen çağrı sayısı"""
+        with self._lock:
+            return sum(self._collapsed.values())
+
+
+# Global single-flight instance
+_singleflight = SingleFlight()
+
+def get_singleflight() -> SingleFlight:
+    """Global single-flight instance'ını döndürür"""
+    return _singleflight
+
+def coalesce(name: Optional[str] = None):
+    """
+    DatabaseService metodları için single-flight decorator
+    Anahtar: metod adı + argümanlar. `self` anahtara dahil değildir; tüm
+    DatabaseService instance'ları aynı paylaşılan client'ı kullanır.
+    """
+    def decorator(func):
+        stat_name = name or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            try:
+                key = (stat_name, args, tuple(sorted(kwargs.items())))
+                hash(key)
+            except TypeError:
+                # Hashlenemeyen argüman: birleştirme yapmadan çalıştır
+                return await func(self, *args, **kwargs)
+            return await _singleflight.do(key, lambda: func(self, *args, **kwargs), name=stat_name)
+        return wrapper
+    return decorator
@@ -7,8 +7,9 @@ import os
 import uuid
 from typing import Optional, Tuple
 from datetime import datetime
-from supabase import create_client, Client
+from supabase import Client
 from config import Config
+from services.supabase_client import get_supabase_client
 
 
 class StorageService:
@@ -17,7 +18,8 @@ class StorageService:
     def __init__(self):
         """Storage servisini başlatır"""
         try:
-            self.supabase: Client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+            # Paylaşılan client (create_client her update'te çağrılmaz)
+            self.supabase: Client = get_supabase_client()
             self.bucket_name = "receipts"
             self.project_id = self._extract_project_id(Config.SUPABASE_URL)
         except Exception as e:
@@ -0,0 +1,60 @@
+"""
+Paylaşılan Supabase İstemcisi
+Process başına tek bir Supabase client'ı oluşturur, tüm servisler bunu kullanır.
+Optimizasyonlar:
+- create_client() update başına değil, process başına bir kez çağrılır
+- PostgREST/Storage httpx oturumları keep-alive bağlantı havuzu tutar,
+  TLS handshake'i her istekte tekrarlanmaz
+- Lazy oluşturma (ilk kullanımda), thread-safe
+"""
+
+from supabase import create_client, Client
+from typing import Dict, Optional, Tuple
+import threading
+from config import Config
+
+# (url, key) -> Client
+_clients: Dict[Tuple[str, str], Client] = {}
+_clients_lock = threading.Lock()
+
+def _build_client(url: str, key: str) -> Client:
+    """Yeni bir Supabase client'ı oluşturur"""
+    try:
+        return create_client(url, key)
+    except Exception as e:
+        print(f"Supabase client initialization error: {e}")
+        # Try alternative initialization method
+        try:
+            from supabase import Client as SupabaseClient
+            return SupabaseClient(url, key)
+        except Exception as e2:
+            print(f"Alternative Supabase client initialization failed: {e2}")
+            raise e
+
+def get_supabase_client(url: Optional[str] = None, key: Optional[str] = None) -> Client:
+    """
+    Paylaşılan Supabase client'ını döndürür (yoksa oluşturur)
+
+    Args:
+        url: Supabase URL'i (varsayılan: Config.SUPABASE_URL)
+        key: Supabase key'i (varsayılan: Config.SUPABASE_KEY)
+
+    Returns:
+        Process genelinde tekil Client
+    """
+    registry_key = (url or Config.SUPABASE_URL, key or Config.SUPABASE_KEY)
+    client = _clients.get(registry_key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(registry_key)
+        if client is None:
+            client = _build_client(*registry_key)
+            _clients[registry_key] = client
+        return client
+
+def reset_supabase_clients() -> None:
+    """Kayıtlı client'ları unutur (test ve benchmark için)"""
+    with _clients_lock:
+        _clients.clear()
@@ -1,23 +1,66 @@
 """
 DB Write Throttling Service
 Aynı kullanıcıdan çok kısa sürede gelen mesajlarda DB write'ı engeller
-Redis olmadan in-memory throttling
+Kayıtlar cache backend'inde tutulur (bkz. services/cache_backends.py):
+- memory (varsayılan): GCRA; scope (işlem) başına bir tablo, kullanıcı başına array('d')
+  içinde tek float, kontrol O(1), tablo THROTTLE_MAX_KEYS ile sınırlı (LRU);
+  kontrol ve istatistik sayımı tek lock altında; lock modu services/locks.py'den
+  (bot: lock yok, web: user_id'ye göre dilimlenmiş lock'lar)
+- redis: limitler tüm bot replikaları arasında paylaşılır, kontrol tek pipeline round-trip'i;
+  bot should_throttle_async ile kontrolü redis-io thread'inde bekler (loop bloklanmaz),
+  kayıtlar kuyruğa bırakılır. Redis'e ulaşılamazsa (devre açık) process-local GCRA
+  tablosuna düşülür; limitler kesinti boyunca process başına uygulanır
+Ölçüm: benchmarks/bench_throttle.py
 """
 
-from typing import Dict, Set
-from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
 from collections import defaultdict
 import threading
 
+from config import Config
+from services.cache_backends import CacheBackend, MemoryBackend, get_shared_backend
+from services.cache_service import in_event_loop
+from services.locks import get_lock_mode, make_locks
+
+class _ThrottleShard:
+    """Throttle durumunun bir dilimi: backend, lock ve operation sayaçları"""
+    __slots__ = ('backend', 'lock', 'stats', 'fallback')
+
+    def __init__(self, backend: CacheBackend, lock: Any, fallback: Optional[MemoryBackend] = None):
+        self.backend = backend
+        self.lock = lock
+        # İstatistikler: operation -> {'allowed': n, 'throttled': n, 'recorded': n}
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'allowed': 0, 'throttled': 0, 'recorded': 0})
+        # Paylaşılan backend'e ulaşılamazken kullanılan yerel limitler (lock altında)
+        self.fallback = fallback
+
+    @property
+    def local_backend(self) -> CacheBackend:
+        """Yerel karar için backend (memory modunda kendisi, Redis modunda yedek tablo)"""
+        return self.fallback if self.fallback is not None else self.backend
+
 class ThrottleService:
     """DB write throttling servisi"""
     
-    def __init__(self):
-        # user_id -> [timestamp1, timestamp2, ...]
-        self._user_write_timestamps: Dict[int, list] = defaultdict(list)
-        # user_id -> {operation: timestamp}
-        self._user_operation_timestamps: Dict[int, Dict[str, datetime]] = defaultdict(dict)
-        self._lock = threading.Lock()
+    def __init__(self, backend: Optional[CacheBackend] = None, lock_mode: Optional[str] = None,
+                 stripes: Optional[int] = None, max_keys: Optional[int] = None):
+        # Lock modu (bkz. services/locks.py). Paylaşılan backend atomik işlemler yapar,
+        # lock sadece sayaçları korur; memory modunda dilimler user_id'ye göre seçilir
+        self.lock_mode = lock_mode or get_lock_mode()
+        if backend is not None:
+            locks = make_locks(self.lock_mode, 1)
+            backends = [backend]
+        else:
+            locks = make_locks(self.lock_mode, stripes)
+            per_shard = max(1, (max_keys or Config.THROTTLE_MAX_KEYS) // len(locks))
+            backends = [MemoryBackend(max_limit_keys=per_shard) for _ in locks]
+        self._shared = backends[0].shared
+        self._shards = [
+            _ThrottleShard(shard_backend, lock,
+                           MemoryBackend(max_limit_keys=max_keys or Config.THROTTLE_MAX_KEYS) if self._shared else None)
+            for shard_backend, lock in zip(backends, locks)
+        ]
+        self._mask = len(self._shards) - 1
         
         # Throttle ayarları
         self.WRITE_WINDOW_SECONDS = 5  # 5 saniye içinde
@@ -30,10 +73,40 @@ class ThrottleService:
             'save_receipt': 10, # 10 saniyede bir dekont kaydetme
             'create_payment': 30, # 30 saniyede bir ödeme kaydı
         }
+        
+        # Limit scope'ları (key = (scope, user_id)); string'ler her çağrıda yeniden üretilmez
+        self._window_scope = 'throttle:w'
+        self._operation_scopes = {op: f'throttle:op:{op}' for op in self.OPERATION_THROTTLE_SECONDS}
+    
+    def _shard(self, user_id: int) -> _ThrottleShard:
+        return self._shards[hash(user_id) & self._mask]
+    
+    def _check_args(self, user_id: int, operation: Optional[str]) -> tuple:
+        """throttle_check argümanları: (cooldown key, cooldown süresi, window key, window, limit)"""
+        cooldown_key = None
+        cooldown_seconds = 0
+        scope = self._operation_scopes.get(operation) if operation else None
+        if scope is not None:
+            cooldown_key = (scope, user_id)
+            cooldown_seconds = self.OPERATION_THROTTLE_SECONDS[operation]
+        return (cooldown_key, cooldown_seconds, (self._window_scope, user_id),
+                self.WRITE_WINDOW_SECONDS, self.MAX_WRITES_PER_WINDOW)
+    
+    def _count(self, shard: _ThrottleShard, operation: Optional[str], args: tuple, allowed: Optional[bool]) -> bool:
+        """
+        Sonucu sayar ve throttle kararını döndürür
+        allowed None ise (paylaşılan backend'e ulaşılamadı) yerel tabloyla karar verilir
+        """
+        with shard.lock:
+            if allowed is None:
+                allowed = shard.local_backend.throttle_check(*args)
+            shard.stats[operation or 'write']['allowed' if allowed else 'throttled'] += 1
+        return not allowed
     
     def should_throttle(self, user_id: int, operation: str = None) -> bool:
         """
         Kullanıcı için throttle kontrolü yapar
+        Redis modunda bloklayan çağrıdır; event loop'ta should_throttle_async kullanılır.
         
         Args:
             user_id: Kullanıcı ID'si
@@ -43,34 +116,18 @@ class ThrottleService:
             True: Throttle uygulanmalı (DB write yapma)
             False: DB write yapılabilir
         """
-        with self._lock:
-            now = datetime.now()
-            
-            # Operation-specific throttle kontrolü
-            if operation and operation in self.OPERATION_THROTTLE_SECONDS:
-                last_timestamp = self._user_operation_timestamps[user_id].get(operation)
-                if last_timestamp:
-                    elapsed = (now - last_timestamp).total_seconds()
-                    if elapsed < self.OPERATION_THROTTLE_SECONDS[operation]:
-                        return True  # Throttle uygula
-                # Throttle yok, timestamp'i güncelle
-                self._user_operation_timestamps[user_id][operation] = now
-            
-            # Genel write throttle kontrolü
-            timestamps = self._user_write_timestamps[user_id]
-            # Eski kayıtları temizle
-            timestamps[:] = [
-                ts for ts in timestamps
-                if (now - ts).total_seconds() < self.WRITE_WINDOW_SECONDS
-            ]
-            
-            # Throttle kontrolü
-            if len(timestamps) >= self.MAX_WRITES_PER_WINDOW:
-                return True  # Throttle uygula
-            
-            # Write yapılabilir, timestamp ekle
-            timestamps.append(now)
-            return False
+        args = self._check_args(user_id, operation)
+        shard = self._shard(user_id)
+        # Memory: kontrol ve sayım tek lock altında (_count içinde)
+        allowed = shard.backend.throttle_check(*args) if self._shared else None
+        return self._count(shard, operation, args, allowed)
+    
+    async def should_throttle_async(self, user_id: int, operation: str = None) -> bool:
+        """should_throttle'ın event loop karşılığı (Redis kontrolü redis-io thread'inde beklenir)"""
+        args = self._check_args(user_id, operation)
+        shard = self._shard(user_id)
+        allowed = await shard.backend.offload(shard.backend.throttle_check, *args) if self._shared else None
+        return self._count(shard, operation, args, allowed)
     
     def record_write(self, user_id: int, operation: str = None) -> None:
         """
@@ -80,45 +137,72 @@ class ThrottleService:
             user_id: Kullanıcı ID'si
             operation: İşlem tipi
         """
-        with self._lock:
-            now = datetime.now()
-            self._user_write_timestamps[user_id].append(now)
-            if operation:
-                self._user_operation_timestamps[user_id][operation] = now
+        shard = self._shard(user_id)
+        seconds = scope = None
+        if operation:
+            seconds = self.OPERATION_THROTTLE_SECONDS.get(operation, self.WRITE_WINDOW_SECONDS)
+            scope = self._operation_scopes.get(operation) or f'throttle:op:{operation}'
+        if self._shared and shard.backend.available:
+            with shard.lock:
+                shard.stats[operation or 'write']['recorded'] += 1
+            # Event loop'ta kayıtlar redis-io kuyruğuna bırakılır (sonuç beklenmez)
+            write = shard.backend.submit if in_event_loop() else (lambda func, *args: func(*args))
+            write(shard.backend.window_add, (self._window_scope, user_id), self.WRITE_WINDOW_SECONDS, self.MAX_WRITES_PER_WINDOW)
+            if scope is not None:
+                write(shard.backend.set_cooldown, (scope, user_id), seconds)
+            return
+        backend = shard.local_backend
+        with shard.lock:
+            shard.stats[operation or 'write']['recorded'] += 1
+            backend.window_add((self._window_scope, user_id), self.WRITE_WINDOW_SECONDS, self.MAX_WRITES_PER_WINDOW)
+            if scope is not None:
+                backend.set_cooldown((scope, user_id), seconds)
     
     def cleanup_old_records(self) -> None:
-        """Eski throttle kayıtlarını temizler"""
-        with self._lock:
-            now = datetime.now()
-            
-            # Genel write timestamps temizleme
-            for user_id in list(self._user_write_timestamps.keys()):
-                timestamps = self._user_write_timestamps[user_id]
-                timestamps[:] = [
-                    ts for ts in timestamps
-                    if (now - ts).total_seconds() < self.WRITE_WINDOW_SECONDS * 2
-                ]
-                if not timestamps:
-                    del self._user_write_timestamps[user_id]
-            
-            # Operation timestamps temizleme
-            max_throttle = max(self.OPERATION_THROTTLE_SECONDS.values()) if self.OPERATION_THROTTLE_SECONDS else 60
-            for user_id in list(self._user_operation_timestamps.keys()):
-                operations = self._user_operation_timestamps[user_id]
-                operations_to_remove = []
-                for op, timestamp in operations.items():
-                    if (now - timestamp).total_seconds() > max_throttle * 2:
-                        operations_to_remove.append(op)
-                for op in operations_to_remove:
-                    del operations[op]
-                if not operations:
-                    del self._user_operation_timestamps[user_id]
+        """Süresi geçmiş throttle kayıtlarını temizler (Redis'te kayıtlar kendiliğinden düşer)"""
+        for shard in self._shards:
+            with shard.lock:
+                shard.local_backend.cleanup_limits()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Operation bazında izin verilen/throttle edilen sayıları ve backend durumunu döndürür"""
+        operations: Dict[str, Dict[str, int]] = {}
+        limits: Dict[str, Any] = {}
+        tracked_keys = None
+        for shard in self._shards:
+            with shard.lock:
+                for op, counts in shard.stats.items():
+                    merged = operations.setdefault(op, {'allowed': 0, 'throttled': 0, 'recorded': 0})
+                    for field, count in counts.items():
+                        merged[field] += count
+                shard_limits = shard.backend.limit_stats()
+            if self._shared:
+                limits = shard_limits
+                continue
+            tracked_keys = (tracked_keys or 0) + shard_limits.get('keys', 0)
+            for scope, table in shard_limits.get('tables', {}).items():
+                merged = limits.setdefault(scope, {'keys': 0, 'max_keys': 0, 'evictions': 0})
+                for field in merged:
+                    merged[field] += table.get(field, 0)
+        return {
+            'backend': 'redis' if self._shared else 'memory',
+            'lock_mode': self.lock_mode,
+            'shards': len(self._shards),
+            'tracked_keys': tracked_keys,
+            'limits': limits,
+            'operations': operations,
+        }
 
 
-# Global throttle instance
-_throttle_service = ThrottleService()
+# Global throttle instance (ilk kullanımda, process lock modu ile oluşturulur)
+_throttle_service: Optional[ThrottleService] = None
+_throttle_service_lock = threading.Lock()
 
 def get_throttle() -> ThrottleService:
     """Global throttle instance'ını döndürür"""
+    global _throttle_service
+    if _throttle_service is None:
+        with _throttle_service_lock:
+            if _throttle_service is None:
+                _throttle_service = ThrottleService(get_shared_backend())
     return _throttle_service
-
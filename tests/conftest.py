@@ -0,0 +1,15 @@
+"""
+Test ortamı: Config import'u için sahte değerler (ağ kullanılmaz)
+Çalıştırma: python -m pytest -q
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('SUPABASE_URL', 'https://tests.supabase.co')
+os.environ.setdefault('SUPABASE_KEY', 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.tests')
+os.environ.setdefault('BOT_TOKEN', '123456:TESTTESTTESTTESTTESTTESTTESTTESTTES')
+os.environ.setdefault('CACHE_BACKEND', 'memory')
+os.environ.setdefault('CACHE_BUS_TRANSPORT', 'none')
@@ -0,0 +1,163 @@
+"""AnswerWriteQueue: diske aktarma, tekrar gönderme ve hatalı satırların ayıklanması"""
+
+import asyncio
+
+import services.database
+from services.answer_queue import AnswerWriteQueue
+
+
+class PoisonRow(Exception):
+    """Satırın kendisinden kaynaklanan (tekrar denemekle düzelmeyen) hata"""
+
+
+class FakeDatabase:
+    """save_answers_bulk davranışı: down iken False (bağlantı hatası), poison satırda exception"""
+    down = False
+    poison = set()
+    written = []
+    calls = 0
+
+    async def save_answers_bulk(self, rows):
+        FakeDatabase.calls += 1
+        if FakeDatabase.down:
+            return False
+        if any(row['question_id'] in FakeDatabase.poison for row in rows):
+            raise PoisonRow('violates foreign key constraint')
+        FakeDatabase.written.extend(rows)
+        return True
+
+
+def make_queue(monkeypatch, tmp_path, batch_size=4):
+    monkeypatch.setattr(services.database, 'DatabaseService', FakeDatabase)
+    FakeDatabase.down, FakeDatabase.poison, FakeDatabase.written, FakeDatabase.calls = False, set(), [], 0
+    return AnswerWriteQueue(batch_size=batch_size, flush_interval=60,
+                            spill_path=str(tmp_path / 'answers.jsonl'), spill_max_bytes=1024 * 1024)
+
+
+def fill(queue, question_ids):
+    # enqueue flush task'ı başlatmasın: kuyruk doğrudan doldurulur
+    for question_id in question_ids:
+        queue._buffer.append({'user_id': 1, 'question_id': question_id, 'answer_text': f'a{question_id}'})
+
+
+def written_ids():
+    return [row['question_id'] for row in FakeDatabase.written]
+
+
+def test_unreachable_db_spills_and_replays_in_order(monkeypatch, tmp_path):
+    queue = make_queue(monkeypatch, tmp_path)
+    FakeDatabase.down = True
+    fill(queue, [1, 2, 3])
+    asyncio.run(queue.flush())
+    assert queue.pending == 0
+    assert queue.spilled_rows == 3
+    assert (tmp_path / 'answers.jsonl').exists()
+
+    # Hâlâ erişilemez: yeni cevaplar da diskte, eskilerin arkasında
+    fill(queue, [4])
+    asyncio.run(queue.flush())
+    assert len(queue._read_spill()) == 4
+
+    FakeDatabase.down = False
+    fill(queue, [5])
+    asyncio.run(queue.flush())
+    assert written_ids() == [1, 2, 3, 4, 5]
+    assert not (tmp_path / 'answers.jsonl').exists()
+    assert queue.dropped_rows == 0
+
+
+def test_poison_rows_are_dropped_without_spilling_the_batch(monkeypatch, tmp_path):
+    queue = make_queue(monkeypatch, tmp_path, batch_size=8)
+    FakeDatabase.poison = {3, 6}
+    fill(queue, range(1, 9))
+    asyncio.run(queue.flush())
+
+    assert written_ids() == [1, 2, 4, 5, 7, 8]
+    assert queue.rejected_rows == 2
+    assert queue.flushed_rows == 6
+    assert queue.spilled_rows == 0
+    assert not (tmp_path / 'answers.jsonl').exists()
+
+
+def test_connection_error_during_isolation_spills_the_rest(monkeypatch, tmp_path):
+    queue = make_queue(monkeypatch, tmp_path, batch_size=4)
+    FakeDatabase.poison = {2}
+    original = FakeDatabase.save_answers_bulk
+
+    async def flaky(self, rows):
+        # İlk (tam batch) deneme veri hatası, sonra bağlantı kopar
+        try:
+            return await original(self, rows)
+        finally:
+            FakeDatabase.down = True
+
+    monkeypatch.setattr(FakeDatabase, 'save_answers_bulk', flaky)
+    fill(queue, [1, 2, 3, 4, 5])
+    asyncio.run(queue.flush())
+
+    assert queue.rejected_rows == 0
+    assert [row['question_id'] for row in queue._read_spill()] == [1, 2, 3, 4, 5]
+
+
+def test_spill_file_is_bounded(monkeypatch, tmp_path):
+    queue = make_queue(monkeypatch, tmp_path)
+    queue.spill_max_bytes = 200
+    FakeDatabase.down = True
+    fill(queue, range(10))
+    asyncio.run(queue.flush())
+
+    assert (tmp_path / 'answers.jsonl').stat().st_size <= 200
+    assert queue.spilled_rows + queue.dropped_rows == 10
+    assert queue.dropped_rows > 0
+
+
+def test_spill_survives_crash_during_replay(monkeypatch, tmp_path):
+    queue = make_queue(monkeypatch, tmp_path, batch_size=2)
+    FakeDatabase.down = True
+    fill(queue, [1, 2, 3, 4])
+    asyncio.run(queue.flush())
+
+    # İlk batch yazılır, bağlantı kopar ve kalanlar diske geri yazılırken process çöker
+    FakeDatabase.down = False
+    original = FakeDatabase.save_answers_bulk
+
+    async def drop_after_first(self, rows):
+        result = await original(self, rows)
+        FakeDatabase.down = True
+        return result
+
+    def crash(rows, replace=False):
+        raise RuntimeError('killed')
+
+    monkeypatch.setattr(FakeDatabase, 'save_answers_bulk', drop_after_first)
+    monkeypatch.setattr(queue, '_spill', crash)
+    try:
+        asyncio.run(queue.flush())
+    except RuntimeError:
+        pass
+    # Diskteki cevaplar kaybolmaz (yazılmış olanlar en fazla tekrar gönderilir)
+    assert [row['question_id'] for row in queue._read_spill()] == [1, 2, 3, 4]
+
+
+def test_partial_replay_rewrites_spill_atomically(monkeypatch, tmp_path):
+    queue = make_queue(monkeypatch, tmp_path, batch_size=2)
+    FakeDatabase.down = True
+    fill(queue, [1, 2, 3, 4])
+    asyncio.run(queue.flush())
+
+    # İlk batch yazılır, sonra bağlantı kopar: kalanlar ve yeni cevaplar dosyanın yerine geçer
+    FakeDatabase.down = False
+    original = FakeDatabase.save_answers_bulk
+
+    async def drop_after_first(self, rows):
+        result = await original(self, rows)
+        FakeDatabase.down = True
+        return result
+
+    monkeypatch.setattr(FakeDatabase, 'save_answers_bulk', drop_after_first)
+    fill(queue, [5])
+    asyncio.run(queue.flush())
+
+    assert written_ids() == [1, 2]
+    assert [row['question_id'] for row in queue._read_spill()] == [3, 4, 5]
+    assert not (tmp_path / 'answers.jsonl.tmp').exists()
@@ -0,0 +1,68 @@
+"""GCRA limit tablosu ve MemoryBackend limit işlemleri (zaman parametreyle verilir)"""
+
+import pytest
+
+from services.cache_backends import CacheBackend, GCRATable, MemoryBackend, RedisBackend
+
+
+def test_gcra_allows_burst_then_spaces_requests():
+    table = GCRATable(max_keys=10)
+    # 10 saniyede 5 istek: emission interval 2 sn, burst 5
+    interval, limit = 10 / 5, 5
+    assert [table.hit('u', interval, limit, now=0.0) for _ in range(5)] == [True] * 5
+    assert table.hit('u', interval, limit, now=0.0) is False
+    # Token'lar interval aralığıyla geri gelir
+    assert table.hit('u', interval, limit, now=1.9) is False
+    assert table.hit('u', interval, limit, now=2.0) is True
+    assert table.hit('u', interval, limit, now=2.0) is False
+    # Reddedilen istek TAT'i ilerletmez
+    assert table.hit('u', interval, limit, now=4.0) is True
+    # Tam pencere boşluk sonrası burst yeniden açılır
+    assert [table.hit('u', interval, limit, now=100.0) for _ in range(6)] == [True] * 5 + [False]
+
+
+def test_gcra_cooldown_and_reset():
+    table = GCRATable(max_keys=10)
+    assert table.hit('u', 60, now=0.0) is True
+    assert table.hit('u', 60, now=59.9) is False
+    assert table.hit('u', 60, now=60.0) is True
+    # reset cooldown'u now'dan yeniden başlatır; add kabul edilmiş isteği iki kez saymaz
+    table.reset('u', 60, now=70.0)
+    assert table.hit('u', 60, now=129.0) is False
+    table.add('v', 5, now=0.0)
+    table.add('v', 5, now=0.0)
+    assert table.hit('v', 5, now=5.0) is True
+
+
+def test_gcra_keys_are_independent_and_bounded():
+    table = GCRATable(max_keys=8)
+    assert table.hit('a', 10, now=0.0) is True
+    assert table.hit('b', 10, now=0.0) is True
+    assert table.hit('a', 10, now=1.0) is False
+    for key in range(20):
+        table.hit(key, 10, now=2.0)
+    assert len(table._index) <= 8
+    assert table.evictions > 0
+
+
+def test_memory_throttle_check_combines_cooldown_and_window():
+    backend = MemoryBackend(max_limit_keys=100)
+    args = (('op', 1), 30, ('w', 1), 5, 1)
+    assert backend.throttle_check(*args) is True
+    # Operasyon cooldown'u sürüyor
+    assert backend.throttle_check(*args) is False
+    # Farklı operasyon ama aynı kullanıcının write penceresi dolu
+    assert backend.throttle_check(('other', 1), 30, ('w', 1), 5, 1) is False
+    assert backend.throttle_check(('other', 2), 30, ('w', 2), 5, 1) is True
+
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class PartialBackend(CacheBackend):
+        def get_entry(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialBackend()
+    # Gerçek backend'ler tüm zorunlu metodları uygular
+    assert not MemoryBackend.__abstractmethods__
+    assert not RedisBackend.__abstractmethods__
@@ -0,0 +1,59 @@
+"""CacheService.get_or_load: hangi loader sonuçları cache'lenir"""
+
+import asyncio
+
+import pytest
+
+from services.cache_service import CacheService
+
+
+def make_loader(results):
+    calls = []
+
+    async def loader():
+        calls.append(len(calls))
+        result = results[min(len(calls) - 1, len(results) - 1)]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return loader, calls
+
+
+@pytest.mark.parametrize('value', [0, [], {}, ''])
+def test_falsy_results_are_cached(value):
+    cache = CacheService(max_entries=100, lock_mode='none')
+    loader, calls = make_loader([value])
+
+    async def main():
+        return [await cache.get_or_load('key', loader, ttl=60) for _ in range(3)]
+
+    assert asyncio.run(main()) == [value] * 3
+    assert len(calls) == 1
+
+
+def test_loader_errors_are_not_cached():
+    cache = CacheService(max_entries=100, lock_mode='none')
+    loader, calls = make_loader([ConnectionError('down'), 5])
+
+    async def main():
+        with pytest.raises(ConnectionError):
+            await cache.get_or_load('key', loader, ttl=60)
+        return await cache.get_or_load('key', loader, ttl=60), await cache.get_or_load('key', loader, ttl=60)
+
+    assert asyncio.run(main()) == (5, 5)
+    assert len(calls) == 2
+
+
+def test_none_is_cached_only_as_negative_entry():
+    cache = CacheService(max_entries=100, lock_mode='none')
+    loader, calls = make_loader([None])
+
+    async def main():
+        await cache.get_or_load('plain', loader, ttl=60)
+        await cache.get_or_load('plain', loader, ttl=60)
+        await cache.get_or_load('negative', loader, ttl=60, negative_ttl=30)
+        return await cache.get_or_load('negative', loader, ttl=60, negative_ttl=30)
+
+    assert asyncio.run(main()) is None
+    assert len(calls) == 3
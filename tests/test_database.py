@@ -0,0 +1,98 @@
+"""DatabaseService: cursor token'ları ve keyset pagination (Supabase çağrıları bellekteki tabloya yönlendirilir)"""
+
+import asyncio
+import base64
+import json
+import re
+from urllib.parse import unquote
+
+import pytest
+
+from services.database import DatabaseService, decode_cursor, encode_cursor, next_cursor
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+def make_db(rows):
+    """_execute'u group_members satırları üzerinde çalışan sahte sorguyla değiştirir"""
+    db = DatabaseService()
+    queries = []
+
+    async def execute(query):
+        params = dict(query.request.params.multi_items())
+        queries.append(params)
+        matched = [row for row in rows if str(row['group_id']) == params['group_id'][3:]]
+        if 'user_id' in params:
+            user_ids = {int(value) for value in params['user_id'][4:-1].split(',')}
+            matched = [row for row in matched if row['user_id'] in user_ids]
+        if 'or' in params:
+            joined_at, row_id = re.search(r'joined_at\.lt\."([^"]+)".*id\.lt\.(\d+)', unquote(params['or'])).groups()
+            matched = [row for row in matched if (row['joined_at'], row['id']) < (joined_at, int(row_id))]
+        matched.sort(key=lambda row: (row['joined_at'], row['id']), reverse=True)
+        offset = int(params.get('offset', 0))
+        limit = int(params['limit']) if 'limit' in params else len(matched)
+        return FakeResult([dict(row) for row in matched[offset:offset + limit]])
+
+    db._execute = execute
+    return db, queries
+
+
+def member(row_id, user_id, minute):
+    return {'id': row_id, 'user_id': user_id, 'group_id': 1, 'status': 'member',
+            'joined_at': f'2026-01-01T00:{minute:02d}:00+00:00'}
+
+
+def collect_pages(db, limit):
+    pages, cursor = [], None
+    while True:
+        page = asyncio.run(db.get_group_members(1, limit=limit, cursor=cursor))
+        pages.append([row['user_id'] for row in page])
+        cursor = next_cursor(page, limit, 'joined_at')
+        if not cursor:
+            return pages
+
+
+def test_group_members_pages_are_full_despite_duplicates():
+    # user 1'in 5 kaydı en yeni kayıtlar; eski davranışta ilk sayfa tek üyeyle kalıp pagination bitiyordu
+    rows = [member(10 + i, 1, 50 + i) for i in range(5)]
+    rows += [member(i, 100 + i, i) for i in range(1, 6)]
+    db, _ = make_db(rows)
+
+    assert collect_pages(db, limit=2) == [[1, 105], [104, 103], [102, 101], []]
+
+
+def test_group_member_duplicates_do_not_repeat_across_pages():
+    # user 7'nin yeni kaydı ilk sayfada, eski kaydı sonraki sayfanın aralığında
+    rows = [member(1, 7, 1), member(2, 8, 2), member(3, 9, 3), member(4, 7, 4)]
+    db, _ = make_db(rows)
+
+    pages = collect_pages(db, limit=2)
+    assert pages == [[7, 9], [8]]
+    assert sum(len(page) for page in pages) == 3
+
+
+def test_cursor_round_trip():
+    for sort_value, row_id in [('2026-01-01T00:00:00.123+00:00', 42), (17, 1), (1.5, 999999999999)]:
+        token = encode_cursor(sort_value, row_id)
+        assert '=' not in token
+        assert decode_cursor(token) == (sort_value, row_id)
+
+
+def test_invalid_cursors_are_rejected():
+    def raw(value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+    for token in ['not-a-cursor', raw([1]), raw(['x', 'y']), raw([None, 1]),
+                  raw(['a"),id.gt.0', 1]), raw(['a\\', 1])]:
+        with pytest.raises(ValueError):
+            decode_cursor(token)
+
+
+def test_next_cursor_only_for_full_pages():
+    rows = [{'id': 3, 'created_at': 'c'}, {'id': 2, 'created_at': 'b'}]
+    assert next_cursor(rows, 3, 'created_at') is None
+    assert next_cursor([], 3, 'created_at') is None
+    assert decode_cursor(next_cursor(rows, 2, 'created_at')) == ('b', 2)
@@ -0,0 +1,57 @@
+"""Invalidation bus: supabase transport yayını tek INSERT, eski kayıtlar periyodik işte silinir"""
+
+import json
+
+from services import database
+from services.invalidation_bus import SupabaseTransport
+from services.scheduler import JobScheduler, register_maintenance_jobs
+
+
+class RecordingTable:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append(name)
+            return self
+        return method
+
+
+class RecordingClient:
+    def __init__(self):
+        self.calls = []
+
+    def table(self, _name):
+        return RecordingTable(self.calls)
+
+
+class InlineExecutor:
+    def submit(self, func, *args):
+        func(*args)
+
+
+def test_publish_only_inserts(monkeypatch):
+    client = RecordingClient()
+    transport = SupabaseTransport(poll_interval=1.0)
+    monkeypatch.setattr(transport, '_client', lambda: client)
+    monkeypatch.setattr(database, 'get_db_executor', lambda: InlineExecutor())
+
+    for _ in range(3):
+        transport.send(json.dumps({'origin': 'o', 'keys': ['k']}).encode('utf-8'))
+    assert client.calls == ['insert', 'execute'] * 3
+
+    transport.cleanup()
+    assert client.calls[-3:] == ['delete', 'lt', 'execute']
+
+
+def test_cleanup_job_registered_only_for_supabase(monkeypatch):
+    from config import Config
+
+    scheduler = JobScheduler(jitter=0)
+    register_maintenance_jobs(scheduler)
+    assert 'invalidation_cleanup' not in scheduler.get_stats()['jobs']
+
+    monkeypatch.setattr(Config, 'CACHE_BUS_TRANSPORT', 'supabase')
+    register_maintenance_jobs(scheduler)
+    assert scheduler.get_stats()['jobs']['invalidation_cleanup']['interval'] == Config.CACHE_BUS_CLEANUP_INTERVAL
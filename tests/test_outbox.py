@@ -0,0 +1,173 @@
+"""Bot outbox: komut sahiplenme, tekrar deneme ve zaman aşımı sonrası tekrar alma"""
+
+import asyncio
+import re
+
+from services import outbox as outbox_module
+from services.outbox import INVITE_USER, BotOutbox
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """bot_outbox sorgularının kullandığı kadar postgrest zinciri (tek tablo, bellekte)"""
+
+    def __init__(self, rows, action, values=None):
+        self.rows = rows
+        self.action = action
+        self.values = values
+        self.filters = []
+        self.limit_count = None
+
+    def select(self, _columns):
+        self.action = 'select'
+        return self
+
+    def insert(self, values):
+        self.action, self.values = 'insert', values
+        return self
+
+    def update(self, values):
+        self.action, self.values = 'update', values
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] < value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def or_(self, expression):
+        cutoff = re.search(r'claimed_at\.lt\.([^)]+)\)', expression).group(1)
+        self.filters.append(lambda row: row['status'] == 'pending' or (
+            row['status'] == 'processing' and row['claimed_at'] < cutoff))
+        return self
+
+    def order(self, _column):
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def execute(self):
+        if self.action == 'insert':
+            row = {'id': len(self.rows) + 1, 'status': 'pending', 'attempts': 0,
+                   'claimed_at': None, 'claimed_by': None,
+                   'created_at': outbox_module._timestamp(outbox_module.time.time()), **self.values}
+            self.rows.append(row)
+            return FakeResult([dict(row)])
+        matched = [row for row in self.rows if all(check(row) for check in self.filters)]
+        if self.action == 'update':
+            for row in matched:
+                row.update(self.values)
+        elif self.action == 'delete':
+            for row in matched:
+                self.rows.remove(row)
+        return FakeResult([dict(row) for row in matched[:self.limit_count]])
+
+
+class FakeClient:
+    def __init__(self):
+        self.rows = []
+
+    def table(self, _name):
+        return FakeQuery(self.rows, 'select')
+
+
+def make_outbox(monkeypatch, results):
+    """Sahte client ve sırayla results döndüren invite_user işleyicisi ile outbox"""
+    client = FakeClient()
+    outbox = BotOutbox()
+    outbox.max_attempts = 2
+    monkeypatch.setattr(outbox, '_client', lambda: client)
+    calls = []
+
+    async def handler(bot, payload):
+        calls.append(payload['user_id'])
+        return results.pop(0)
+
+    monkeypatch.setitem(outbox_module.HANDLERS, INVITE_USER, handler)
+    return outbox, client, calls
+
+
+def test_commands_run_once_and_are_marked_done(monkeypatch):
+    outbox, client, calls = make_outbox(monkeypatch, [True, True])
+    assert outbox.enqueue(INVITE_USER, {'user_id': 1})
+    assert outbox.enqueue(INVITE_USER, {'user_id': 2})
+
+    assert asyncio.run(outbox.process(bot=None)) == 2
+    assert calls == [1, 2]
+    assert [row['status'] for row in client.rows] == ['done', 'done']
+    # Tamamlanan komutlar tekrar alınmaz
+    assert asyncio.run(outbox.process(bot=None)) == 0
+    assert outbox.get_stats()['processed'] == 2
+
+
+def test_failed_command_is_retried_until_max_attempts(monkeypatch):
+    outbox, client, calls = make_outbox(monkeypatch, [False, False])
+    outbox.enqueue(INVITE_USER, {'user_id': 7})
+
+    asyncio.run(outbox.process(bot=None))
+    assert client.rows[0]['status'] == 'pending'
+    asyncio.run(outbox.process(bot=None))
+    assert client.rows[0]['status'] == 'failed'
+    assert client.rows[0]['attempts'] == 2
+    assert asyncio.run(outbox.process(bot=None)) == 0
+    assert calls == [7, 7]
+
+
+def test_stale_claims_are_taken_over(monkeypatch):
+    outbox, client, calls = make_outbox(monkeypatch, [True])
+    outbox.enqueue(INVITE_USER, {'user_id': 3})
+    # Başka bir process sahiplenmiş ve çökmüş
+    client.rows[0].update({'status': 'processing', 'claimed_by': 'dead', 'claimed_at': '2000-01-01T00:00:00Z'})
+
+    assert asyncio.run(outbox.process(bot=None)) == 1
+    assert client.rows[0]['status'] == 'done'
+    assert client.rows[0]['claimed_by'] == outbox.origin
+
+    # Yeni sahiplenilmiş komut zaman aşımına uğramadan başkası tarafından alınmaz
+    outbox.enqueue(INVITE_USER, {'user_id': 4})
+    client.rows[1].update({'status': 'processing', 'claimed_by': 'alive',
+                           'claimed_at': outbox_module._timestamp(outbox_module.time.time())})
+    assert asyncio.run(outbox.process(bot=None)) == 0
+    assert calls == [3]
+
+
+def test_wishlist_invites_run_in_bulk_lane(monkeypatch):
+    from services import send_scheduler
+    from services.database import DatabaseService
+    from services.outbox import INVITE_FROM_WISHLIST
+
+    async def get_bot_settings(self):
+        return {'shopier_payment_url': 'https://pay.example'}
+
+    monkeypatch.setattr(DatabaseService, 'get_bot_settings', get_bot_settings)
+    lanes = []
+
+    class FakeBot:
+        async def send_message(self, chat_id, text):
+            lanes.append((chat_id, send_scheduler._current_lane.get()))
+
+    client = FakeClient()
+    outbox = BotOutbox()
+    monkeypatch.setattr(outbox, '_client', lambda: client)
+    outbox.enqueue(INVITE_FROM_WISHLIST, {'user_id': 42})
+
+    assert asyncio.run(outbox.process(FakeBot())) == 1
+    assert lanes == [(42, send_scheduler.BULK)]
+    assert client.rows[0]['status'] == 'done'
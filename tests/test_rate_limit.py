@@ -0,0 +1,91 @@
+"""Rate limit middleware: sliding window counter ve paylaşılan (Redis) sayaçlar"""
+
+import asyncio
+
+import pytest
+
+from middlewares.rate_limit import ALLOWED, LIMITED, SUPPRESSED, RateLimitMiddleware, SlidingWindowCounter
+
+
+def test_evictions_count_only_dropped_keys():
+    counter = SlidingWindowCounter(limit=5, window=60, max_keys=16)
+    for user_id in range(16):
+        counter.hit(user_id, now=0.0)
+    counter._evict()
+    assert counter.evictions == 2
+    assert len(counter) == 14
+    # Tabloda batch'ten az key varsa sadece var olanlar sayılır
+    small = SlidingWindowCounter(limit=5, window=60, max_keys=16)
+    small.hit(1, now=0.0)
+    small._evict()
+    assert small.evictions == 1
+
+
+def test_memory_mode_uses_local_counter():
+    middleware = RateLimitMiddleware(rules={'start': (2, 60)}, max_keys=100, backend=None)
+
+    async def main():
+        counter = middleware._counter('start')
+        return [await middleware._hit('start', counter, 1) for _ in range(4)]
+
+    assert asyncio.run(main()) == [ALLOWED, ALLOWED, LIMITED, SUPPRESSED]
+
+
+def test_redis_mode_shares_limits_between_replicas():
+    fakeredis = pytest.importorskip('fakeredis')
+    from services.cache_backends import RedisBackend
+
+    backend = RedisBackend(client=fakeredis.FakeRedis(), prefix='test:')
+    first = RateLimitMiddleware(rules={'start': (2, 60)}, max_keys=100, backend=backend)
+    second = RateLimitMiddleware(rules={'start': (2, 60)}, max_keys=100, backend=backend)
+
+    async def main():
+        results = [await first._hit('start', first._counter('start'), 9)]
+        results.append(await second._hit('start', second._counter('start'), 9))
+        results.append(await first._hit('start', first._counter('start'), 9))
+        results.append(await second._hit('start', second._counter('start'), 9))
+        return results
+
+    assert asyncio.run(main()) == [ALLOWED, ALLOWED, LIMITED, SUPPRESSED]
+    # Yerel sayaçlar kullanılmadı
+    assert len(first._counter('start')) == 0
+
+
+def test_redis_outage_falls_back_to_local_counter():
+    from services.cache_backends import CircuitBreaker, RedisBackend
+
+    class Down:
+        def __getattr__(self, name):
+            def _fail(*args, **kwargs):
+                raise ConnectionError('redis down')
+            return _fail
+
+    backend = RedisBackend(client=Down(), prefix='test:', breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    middleware = RateLimitMiddleware(rules={'start': (1, 60)}, max_keys=100, backend=backend)
+
+    async def main():
+        counter = middleware._counter('start')
+        return [await middleware._hit('start', counter, 3) for _ in range(2)]
+
+    assert asyncio.run(main()) == [ALLOWED, LIMITED]
+    assert middleware.fallbacks == 2
+
+
+def test_sliding_window_limits_then_suppresses():
+    counter = SlidingWindowCounter(limit=2, window=10, max_keys=100)
+    assert [counter.hit('u', now=t) for t in (0.0, 1.0, 2.0, 3.0)] == [ALLOWED, ALLOWED, LIMITED, SUPPRESSED]
+    # Başka kullanıcı etkilenmez
+    assert counter.hit('v', now=3.0) == ALLOWED
+
+
+def test_sliding_window_weights_previous_window():
+    counter = SlidingWindowCounter(limit=2, window=10, max_keys=100)
+    counter.hit('u', now=0.0)
+    counter.hit('u', now=1.0)
+    # Yeni pencerenin yarısında önceki pencerenin 2 isteği 1 sayılır: bir istek daha sığar
+    assert counter.hit('u', now=15.0) == ALLOWED
+    assert counter.hit('u', now=15.0) == LIMITED
+    # Uyarı bayrağı pencere kayınca sıfırlanır; iki pencere boşluktan sonra sayaçlar da sıfırdır
+    assert counter.hit('u', now=35.0) == ALLOWED
+    assert counter.hit('u', now=35.0) == ALLOWED
+    assert counter.hit('u', now=35.0) == LIMITED
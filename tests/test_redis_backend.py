@@ -0,0 +1,175 @@
+"""RedisBackend: fakeredis ile paylaşılan cache/limitler, devre kesici ve event loop'u bloklamama"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip('fakeredis')
+
+from services.cache_backends import CacheEntry, CircuitBreaker, RedisBackend
+from services.cache_service import CacheService
+from services.throttle_service import ThrottleService
+
+
+class FailingClient:
+    """Her çağrıda bağlantı hatası veren istemci (çağrı sayısını tutar)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        def _fail(*args, **kwargs):
+            self.calls += 1
+            raise ConnectionError('redis down')
+        return _fail
+
+
+class SlowClient:
+    """fakeredis'i saran, her GET'te bekleyen istemci"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.inner = fakeredis.FakeRedis()
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return self.inner.get(key)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def make_backend(client=None, **kwargs):
+    return RedisBackend(client=client or fakeredis.FakeRedis(), prefix='test:', **kwargs)
+
+
+def test_cache_is_shared_between_services():
+    backend = make_backend()
+    writer = CacheService(shared=backend, lock_mode='none')
+    reader = CacheService(shared=backend, lock_mode='none')
+    writer.set('questions', [{'id': 1}], ttl=60, tags=['questions'])
+    assert reader.get('questions') == [{'id': 1}]
+    writer.invalidate_tag('questions')
+    reader.clear()
+    assert reader.get('questions') is None
+
+
+def test_breaker_opens_and_stops_calling_redis():
+    client = FailingClient()
+    backend = make_backend(client, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    for _ in range(10):
+        assert backend.get_entry('k') is None
+    assert client.calls == 3
+    assert backend.breaker.state == CircuitBreaker.OPEN
+    assert not backend.available
+
+
+def test_breaker_half_open_trial_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    backend = make_backend(breaker=breaker)
+    breaker.failure()
+    assert backend.get_entry('k') is None and breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    backend.set_entry('k', CacheEntry(1, 60))
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert backend.get_entry('k').data == 1
+
+
+def test_limits_return_none_when_unavailable():
+    backend = make_backend(FailingClient(), breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    assert backend.throttle_check(None, 0, ('throttle:w', 1), 5, 1) is None
+    assert backend.window_hit(('rate:start', 1), 60, 5) is None
+
+
+def test_throttle_falls_back_to_memory_when_redis_is_down():
+    backend = make_backend(FailingClient(), breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    throttle = ThrottleService(backend, lock_mode='none')
+    assert throttle.should_throttle(7, 'save_answer') is False
+    # Redis yok ama limitler yerel tabloda uygulanmaya devam eder
+    assert throttle.should_throttle(7, 'save_answer') is True
+
+
+def test_throttle_shared_limits_across_services():
+    backend = make_backend()
+    first = ThrottleService(backend, lock_mode='none')
+    second = ThrottleService(backend, lock_mode='none')
+    assert first.should_throttle(42, 'create_user') is False
+    assert second.should_throttle(42, 'create_user') is True
+
+
+def test_throttle_async_check_uses_shared_backend():
+    backend = make_backend()
+    throttle = ThrottleService(backend, lock_mode='none')
+
+    async def main():
+        first = await throttle.should_throttle_async(5, 'save_receipt')
+        throttle.record_write(5, 'create_payment')
+        second = await throttle.should_throttle_async(5, 'save_receipt')
+        payment = await throttle.should_throttle_async(5, 'create_payment')
+        return first, second, payment
+
+    assert asyncio.run(main()) == (False, True, True)
+
+
+def test_event_loop_is_not_blocked_by_redis_reads():
+    client = SlowClient(0.2)
+    backend = make_backend(client)
+    cache = CacheService(shared=backend, lock_mode='none')
+    client.inner.set('test:k', '{"v": 1, "e": %f, "s": %f}' % (time.time() + 60, time.time() + 60))
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        # Senkron get loop içinde Redis'e gitmez
+        started = time.monotonic()
+        assert cache.get('k') is None
+        assert time.monotonic() - started < 0.05
+        value = await cache.aget('k')
+        task.cancel()
+        return value, ticks
+
+    value, ticks = asyncio.run(main())
+    assert value == 1
+    assert ticks >= 10
+    assert client.threads and all(name.startswith('redis-io') for name in client.threads)
+
+
+def test_loop_writes_are_applied_in_order():
+    backend = make_backend()
+    cache = CacheService(shared=backend, lock_mode='none')
+    other = CacheService(shared=backend, lock_mode='none')
+
+    async def main():
+        cache.set('user:1', {'id': 1}, ttl=60)
+        cache.delete('user:1')
+        cache.set('user:2', {'id': 2}, ttl=60)
+        before = await cache.ageneration('messages')
+        cache.bump_generation('messages')
+        return before, await other.aget('user:1'), await other.aget('user:2'), await other.ageneration('messages')
+
+    before, deleted, kept, generation = asyncio.run(main())
+    assert deleted is None
+    assert kept == {'id': 2}
+    assert generation == before + 1
+
+
+def test_offload_skips_when_queue_is_full():
+    backend = make_backend(SlowClient(0.05), max_pending=1)
+
+    async def main():
+        return await asyncio.gather(*(backend.offload(backend.get_entry, 'k', fallback='skipped') for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert results.count('skipped') == 2
+    assert backend.skipped == 2
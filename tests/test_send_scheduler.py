@@ -0,0 +1,96 @@
+"""SendScheduler: öncelik şeritlerinin ağırlıklı paylaşımı ve token bucket zamanlaması"""
+
+import asyncio
+
+from aiogram.methods import GetMe, SendMessage
+
+from services.send_scheduler import (
+    BULK, INTERACTIVE, NOTIFICATION, SendScheduler, TokenBucket, parse_lane_weights, send_lane,
+)
+
+
+def test_parse_lane_weights():
+    assert parse_lane_weights('interactive=6,notification=3,bulk=1') == {INTERACTIVE: 6.0, NOTIFICATION: 3.0, BULK: 1.0}
+    # Eksik, bilinmeyen ve geçersiz değerler 1'e düşer
+    assert parse_lane_weights('bulk=x,other=5,notification=0') == {INTERACTIVE: 1.0, NOTIFICATION: 1.0, BULK: 1.0}
+
+
+def test_token_bucket_delay():
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    assert bucket.delay(now=now) == 0.0
+    bucket.take(now=now)
+    bucket.take(now=now)
+    assert bucket.delay(now=now) == 0.5
+    assert bucket.delay(now=now + 0.5) == 0.0
+    assert bucket.is_full(now + 1.0)
+
+
+def run_lanes(weights, phases):
+    """
+    Global kovası boşaltılmış zamanlayıcıdan gönderim yapar; phases [(bekleme, şerit, adet)]
+    sırayla, her faz bekleme saniye sonra başlatılır. Her gönderim ayrı sohbete gider
+    (sohbet limiti sıralamayı etkilemez); gönderim sırası ve zamanlayıcı döner
+    """
+    order = []
+
+    async def make_request(bot, method):
+        order.append(method.text)
+        return True
+
+    async def main():
+        scheduler = SendScheduler(global_rate=200, chat_rate=100, max_retries=0, lane_weights=weights)
+        scheduler._global.tokens = 0.0
+        tasks = []
+        chat_id = 0
+        for delay, lane, count in phases:
+            await asyncio.sleep(delay)
+            with send_lane(lane):
+                for _ in range(count):
+                    chat_id += 1
+                    tasks.append(asyncio.ensure_future(
+                        scheduler(make_request, None, SendMessage(chat_id=chat_id, text=lane))))
+        await asyncio.gather(*tasks)
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    return order, scheduler
+
+
+def test_lanes_share_tokens_by_weight():
+    order, scheduler = run_lanes({INTERACTIVE: 3, NOTIFICATION: 1, BULK: 1},
+                                 [(0, BULK, 20), (0, INTERACTIVE, 20)])
+    # Her iki şerit doluyken 4 token'dan 3'ü interactive'e gider
+    first = order[:16]
+    assert first.count(INTERACTIVE) == 12
+    assert first.count(BULK) == 4
+    # Bulk aç kalmaz, hepsi gönderilir
+    assert order.count(BULK) == 20
+    lanes = scheduler.get_stats()['lanes']
+    assert lanes[INTERACTIVE]['sent'] == 20 and lanes[BULK]['sent'] == 20
+    assert lanes[BULK]['pending'] == 0
+
+
+def test_idle_lane_does_not_bank_share():
+    # Bulk bir süre tek başına gönderir (~10 token); sonra gelen interactive hemen sıraya girer
+    # ama boşta geçen süre için biriktirilmiş pay kullanmaz: eşit ağırlıkta dönüşümlü gider
+    order, _ = run_lanes({INTERACTIVE: 1, NOTIFICATION: 1, BULK: 1},
+                         [(0, BULK, 30), (0.05, INTERACTIVE, 10)])
+    start = order.index(INTERACTIVE)
+    assert 0 < start < 20
+    window = order[start:start + 10]
+    assert 4 <= window.count(INTERACTIVE) <= 6
+
+
+def test_unlimited_methods_bypass_scheduler():
+    async def main():
+        scheduler = SendScheduler(global_rate=1, chat_rate=1, max_retries=0)
+        scheduler._global.tokens = 0.0
+
+        async def make_request(bot, method):
+            return 'ok'
+
+        result = await asyncio.wait_for(scheduler(make_request, None, GetMe()), timeout=0.5)
+        return result, scheduler.get_stats()['sent']
+
+    assert asyncio.run(main()) == ('ok', 0)